@@ -1,7 +1,14 @@
-from functools import lru_cache
-from typing import Optional
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from typing import Dict, Iterator, Optional
 import os
-from processing import DocumentProcessor, ChatEngine
+import threading
+from fastapi import Request
+from processing import (
+    DocumentProcessor, ChatEngine, BlockingExecutor, DocumentExtractor, IngestionJobManager, AnswerCache, SessionStore,
+    TenantRegistry, TenantLimiter
+)
+from processing.utils import EmbeddingBatcher, EmbeddingsManager
 
 @lru_cache()
 def get_settings():
@@ -9,15 +16,245 @@ def get_settings():
     return {
         "STORAGE_PATH": os.getenv("STORAGE_PATH", "./storage"),
         "OLLAMA_HOST": os.getenv("OLLAMA_HOST", "http://localhost:11434"),
+        # Comma-separated pool of Ollama servers; defaults to OLLAMA_HOST alone
+        "OLLAMA_HOSTS": [
+            host.strip() for host in os.getenv("OLLAMA_HOSTS", "").split(",") if host.strip()
+        ],
+        "OLLAMA_HEALTH_INTERVAL": float(os.getenv("OLLAMA_HEALTH_INTERVAL", "10")),
         "OLLAMA_MODEL": os.getenv("OLLAMA_MODEL", "mistral"),
+        "OLLAMA_CONTEXT_WINDOW": int(os.getenv("OLLAMA_CONTEXT_WINDOW", "4096")),
+        "ANSWER_TOKEN_RESERVE": int(os.getenv("ANSWER_TOKEN_RESERVE", "512")),
+        "OLLAMA_KEEP_ALIVE": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+        "CHAT_SESSION_MAX": int(os.getenv("CHAT_SESSION_MAX", "1000")),
+        "CHAT_SESSION_TTL": float(os.getenv("CHAT_SESSION_TTL", "1800")),
+        "STREAM_COALESCE_CHARS": int(os.getenv("STREAM_COALESCE_CHARS", "64")),
+        "STREAM_COALESCE_MS": float(os.getenv("STREAM_COALESCE_MS", "50")),
+        "OLLAMA_MAX_CONNECTIONS": int(os.getenv("OLLAMA_MAX_CONNECTIONS", "20")),
+        "OLLAMA_MAX_KEEPALIVE": int(os.getenv("OLLAMA_MAX_KEEPALIVE", "10")),
+        "OLLAMA_KEEPALIVE_EXPIRY": float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "30")),
+        "OLLAMA_CONNECT_TIMEOUT": float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5")),
+        "OLLAMA_READ_TIMEOUT": float(os.getenv("OLLAMA_READ_TIMEOUT", "120")),
+        "OLLAMA_MAX_CONCURRENT": int(os.getenv("OLLAMA_MAX_CONCURRENT", "8")),
+        "EXECUTOR_WORKERS": int(os.getenv("EXECUTOR_WORKERS", "4")),
+        "EXECUTOR_MAX_QUEUE": int(os.getenv("EXECUTOR_MAX_QUEUE", "64")),
+        "INGEST_WORKERS": int(os.getenv("INGEST_WORKERS", "2")),
+        "INGEST_MAX_QUEUE": int(os.getenv("INGEST_MAX_QUEUE", "16")),
+        "QUERY_BATCH_SIZE": int(os.getenv("QUERY_BATCH_SIZE", "32")),
+        "QUERY_BATCH_WAIT_MS": float(os.getenv("QUERY_BATCH_WAIT_MS", "5")),
+        "EMBEDDING_CACHE_SIZE": int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+        "EMBEDDING_DISK_CACHE_SIZE": int(os.getenv("EMBEDDING_DISK_CACHE_SIZE", "500000")),
+        "INGEST_BATCH_SIZE": int(os.getenv("INGEST_BATCH_SIZE", "64")),
+        "EMBEDDING_WORKERS": int(os.getenv("EMBEDDING_WORKERS", "0")),
+        "EMBEDDING_BACKEND": os.getenv("EMBEDDING_BACKEND", "torch"),
+        "EMBEDDING_DTYPE": os.getenv("EMBEDDING_DTYPE", "float32"),
+        "SEARCH_MODE": os.getenv("SEARCH_MODE", "vector"),
+        "VECTOR_STORE": os.getenv("VECTOR_STORE", "chroma"),
+        "VECTOR_STORE_INDEX": os.getenv("VECTOR_STORE_INDEX", "flat"),
+        "VECTOR_STORE_IVF_LISTS": int(os.getenv("VECTOR_STORE_IVF_LISTS", "1024")),
+        "VECTOR_STORE_IVF_PROBES": int(os.getenv("VECTOR_STORE_IVF_PROBES", "16")),
+        "CHUNK_UNIT": os.getenv("CHUNK_UNIT", "chars"),
+        "EXTRACT_WORKERS": int(os.getenv("EXTRACT_WORKERS", "2")),
+        "EXTRACT_PAGES_PER_TASK": int(os.getenv("EXTRACT_PAGES_PER_TASK", "8")),
+        "INGEST_JOB_WORKERS": int(os.getenv("INGEST_JOB_WORKERS", "2")),
+        "INGEST_JOB_RETENTION_SECONDS": float(os.getenv("INGEST_JOB_RETENTION_SECONDS", "604800")),
+        "ANSWER_CACHE_SIZE": int(os.getenv("ANSWER_CACHE_SIZE", "1024")),
+        "ANSWER_CACHE_TTL": float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+        "ANSWER_CACHE_THRESHOLD": float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+        "WARM_UP_ON_STARTUP": os.getenv("WARM_UP_ON_STARTUP", "true").lower() in ("1", "true", "yes"),
+        "METRICS_ENABLED": os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes"),
+        "TENANT_MAX_OPEN": int(os.getenv("TENANT_MAX_OPEN", "64")),
+        "TENANT_IDLE_SECONDS": float(os.getenv("TENANT_IDLE_SECONDS", "600")),
+        "TENANT_RATE_LIMIT": float(os.getenv("TENANT_RATE_LIMIT", "0")),
+        "TENANT_RATE_BURST": int(os.getenv("TENANT_RATE_BURST", "20")),
+        "TENANT_MAX_CONCURRENT": int(os.getenv("TENANT_MAX_CONCURRENT", "0")),
     }
 
+@lru_cache()
+def get_executor() -> BlockingExecutor:
+    """Get or create the executor for blocking embedding and storage calls."""
+    settings = get_settings()
+    return BlockingExecutor(
+        max_workers=settings["EXECUTOR_WORKERS"],
+        max_queue=settings["EXECUTOR_MAX_QUEUE"]
+    )
+
+@lru_cache()
+def get_ingest_executor() -> BlockingExecutor:
+    """Get or create the executor that runs uploads and bulk ingestion, apart from queries."""
+    settings = get_settings()
+    return BlockingExecutor(
+        max_workers=settings["INGEST_WORKERS"],
+        max_queue=settings["INGEST_MAX_QUEUE"],
+        thread_name_prefix="ingest"
+    )
+
+@lru_cache()
+def get_extractor() -> DocumentExtractor:
+    """Get or create the process pool that parses uploaded files."""
+    settings = get_settings()
+    return DocumentExtractor(
+        max_workers=settings["EXTRACT_WORKERS"],
+        pages_per_task=settings["EXTRACT_PAGES_PER_TASK"]
+    )
+
+def _built_once(getter):
+    """Make concurrent first calls of a cached getter wait for one construction.
+
+    lru_cache alone lets two threads that miss at the same time both build the
+    component; the startup warm-up and early requests would each load the model.
+    """
+    lock = threading.Lock()
+
+    @wraps(getter)
+    def wrapper():
+        with lock:
+            return getter()
+    wrapper.cache_info = getter.cache_info
+    wrapper.cache_clear = getter.cache_clear
+    return wrapper
+
+@_built_once
+@lru_cache()
+def get_embeddings() -> EmbeddingsManager:
+    """Get or create the embedding model, cache and encoder pool shared by every collection."""
+    settings = get_settings()
+    return EmbeddingsManager(
+        cache_dir=os.path.join(settings["STORAGE_PATH"], "embedding_cache"),
+        cache_size=settings["EMBEDDING_CACHE_SIZE"],
+        disk_cache_size=settings["EMBEDDING_DISK_CACHE_SIZE"],
+        num_workers=settings["EMBEDDING_WORKERS"],
+        backend=settings["EMBEDDING_BACKEND"],
+        backend_options={"onnx_dir": os.path.join(settings["STORAGE_PATH"], "onnx")},
+        dtype=settings["EMBEDDING_DTYPE"]
+    )
+
+@_built_once
+@lru_cache()
+def get_query_batcher() -> EmbeddingBatcher:
+    """Get or create the batcher that groups concurrent query embeddings from every collection."""
+    settings = get_settings()
+    return EmbeddingBatcher(
+        get_embeddings().get_embeddings,
+        get_executor(),
+        max_batch_size=settings["QUERY_BATCH_SIZE"],
+        max_wait_ms=settings["QUERY_BATCH_WAIT_MS"]
+    )
+
+def _processor_options(settings: Dict) -> Dict:
+    """DocumentProcessor settings shared by the default collection and every tenant's."""
+    return dict(
+        embeddings=get_embeddings(),
+        query_batcher=get_query_batcher(),
+        executor=get_executor(),
+        ingest_executor=get_ingest_executor(),
+        ingest_batch_size=settings["INGEST_BATCH_SIZE"],
+        search_mode=settings["SEARCH_MODE"],
+        vector_store=settings["VECTOR_STORE"],
+        vector_store_options={
+            "dtype": settings["EMBEDDING_DTYPE"],
+            "index": settings["VECTOR_STORE_INDEX"],
+            "ivf_lists": settings["VECTOR_STORE_IVF_LISTS"],
+            "ivf_probes": settings["VECTOR_STORE_IVF_PROBES"]
+        } if settings["VECTOR_STORE"] == "numpy" else None,
+        chunk_unit=settings["CHUNK_UNIT"],
+        extractor=get_extractor()
+    )
+
+def _invalidate_answers(processor: DocumentProcessor, tenant_id: Optional[str] = None) -> DocumentProcessor:
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        processor.add_change_listener(lambda document_id: answer_cache.invalidate_documents([document_id], tenant_id))
+    return processor
+
+@_built_once
 @lru_cache()
 def get_document_processor() -> DocumentProcessor:
-    """Get or create DocumentProcessor instance."""
+    """Get or create the DocumentProcessor of the default (tenant-less) collection."""
+    settings = get_settings()
+    return _invalidate_answers(DocumentProcessor(
+        storage_path=settings["STORAGE_PATH"],
+        **_processor_options(settings)
+    ))
+
+def _open_tenant_processor(tenant_id: str) -> DocumentProcessor:
+    """A tenant's own stores under STORAGE_PATH/tenants, sharing the embedding model and batcher."""
+    settings = get_settings()
+    return _invalidate_answers(DocumentProcessor(
+        storage_path=os.path.join(settings["STORAGE_PATH"], "tenants", tenant_id),
+        **_processor_options(settings)
+    ), tenant_id)
+
+@lru_cache()
+def get_tenant_registry() -> TenantRegistry:
+    """Get or create the LRU of open tenant collections."""
+    settings = get_settings()
+    return TenantRegistry(
+        _open_tenant_processor,
+        max_open=settings["TENANT_MAX_OPEN"],
+        idle_seconds=settings["TENANT_IDLE_SECONDS"]
+    )
+
+@lru_cache()
+def get_tenant_limiter() -> TenantLimiter:
+    """Get or create the per-tenant rate and concurrency limiter."""
+    settings = get_settings()
+    return TenantLimiter(
+        rate=settings["TENANT_RATE_LIMIT"],
+        burst=settings["TENANT_RATE_BURST"],
+        max_concurrent=settings["TENANT_MAX_CONCURRENT"]
+    )
+
+def get_tenant_id(request: Request) -> Optional[str]:
+    """The request's tenant, validated by the tenant middleware; None for the default collection."""
+    return getattr(request.state, "tenant_id", None)
+
+def get_request_processor(request: Request) -> DocumentProcessor:
+    """The DocumentProcessor of the request's tenant, opened on first use."""
+    tenant_id = get_tenant_id(request)
+    if tenant_id is None:
+        return get_document_processor()
+    # The tenant middleware holds a lease for the whole request, streams included
+    return get_tenant_registry().get(tenant_id)
+
+@contextmanager
+def lease_processor(tenant_id: Optional[str]) -> Iterator[DocumentProcessor]:
+    """Hold a tenant's processor open for blocking work outside a request."""
+    if tenant_id is None:
+        yield get_document_processor()
+    else:
+        with get_tenant_registry().lease(tenant_id) as processor:
+            yield processor
+
+@lru_cache()
+def get_answer_cache() -> Optional[AnswerCache]:
+    """Get or create the semantic answer cache; None when ANSWER_CACHE_SIZE is 0."""
+    settings = get_settings()
+    if settings["ANSWER_CACHE_SIZE"] <= 0:
+        return None
+    return AnswerCache(
+        max_entries=settings["ANSWER_CACHE_SIZE"],
+        ttl_seconds=settings["ANSWER_CACHE_TTL"],
+        similarity_threshold=settings["ANSWER_CACHE_THRESHOLD"]
+    )
+
+@lru_cache()
+def get_job_manager() -> IngestionJobManager:
+    """Get or create the background ingestion job manager."""
+    settings = get_settings()
+    return IngestionJobManager(
+        jobs_path=os.path.join(settings["STORAGE_PATH"], "jobs"),
+        lease_processor=lease_processor,
+        max_workers=settings["INGEST_JOB_WORKERS"],
+        retention_seconds=settings["INGEST_JOB_RETENTION_SECONDS"]
+    )
+
+@lru_cache()
+def get_session_store() -> SessionStore:
+    """Get or create the store of server-side chat sessions."""
     settings = get_settings()
-    return DocumentProcessor(
-        storage_path=settings["STORAGE_PATH"]
+    return SessionStore(
+        max_sessions=settings["CHAT_SESSION_MAX"],
+        ttl_seconds=settings["CHAT_SESSION_TTL"]
     )
 
 @lru_cache()
@@ -26,5 +263,17 @@ def get_chat_engine() -> ChatEngine:
     settings = get_settings()
     return ChatEngine(
         model_name=settings["OLLAMA_MODEL"],
-        ollama_base_url=settings["OLLAMA_HOST"]
+        ollama_base_url=settings["OLLAMA_HOST"],
+        ollama_urls=settings["OLLAMA_HOSTS"] or None,
+        health_interval=settings["OLLAMA_HEALTH_INTERVAL"],
+        context_window=settings["OLLAMA_CONTEXT_WINDOW"],
+        answer_token_reserve=settings["ANSWER_TOKEN_RESERVE"],
+        keep_alive=settings["OLLAMA_KEEP_ALIVE"],
+        max_connections=settings["OLLAMA_MAX_CONNECTIONS"],
+        max_keepalive_connections=settings["OLLAMA_MAX_KEEPALIVE"],
+        keepalive_expiry=settings["OLLAMA_KEEPALIVE_EXPIRY"],
+        connect_timeout=settings["OLLAMA_CONNECT_TIMEOUT"],
+        read_timeout=settings["OLLAMA_READ_TIMEOUT"],
+        max_concurrent_generations=settings["OLLAMA_MAX_CONCURRENT"],
+        answer_cache=get_answer_cache()
     )
\ No newline at end of file
@@ -1,18 +1,142 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 import uvicorn
+import asyncio
+import time
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 
+from processing.utils.metrics import metrics
 from .routes import chat, documents
+from .middleware.metrics import MetricsMiddleware
+from .middleware.tenants import TenantMiddleware
+from .dependencies import (
+    get_chat_engine, get_executor, get_ingest_executor, get_extractor, get_job_manager, get_document_processor, get_answer_cache,
+    get_embeddings, get_settings, get_tenant_registry, get_tenant_limiter
+)
+
+def component_metrics():
+    """Counters the components already keep, read when /metrics is scraped."""
+    for pool, executor in (("query", get_executor()), ("ingest", get_ingest_executor())):
+        executor = executor.stats()
+        labels = {"pool": pool}
+        yield ("intellidoc_executor_queue_depth", "Calls waiting for a blocking executor worker", "gauge", labels, executor["queue_depth"])
+        yield ("intellidoc_executor_running", "Calls running on the blocking executor", "gauge", labels, executor["running"])
+        yield ("intellidoc_executor_rejected_total", "Calls rejected because the executor queue was full", "counter", labels, executor["rejected"])
+    
+    chat_engine = get_chat_engine()
+    try:
+        backends = chat_engine.router.stats()
+    except RuntimeError:
+        # Not started yet, or already shut down
+        backends = []
+    for backend in backends:
+        labels = {"backend": backend["url"]}
+        yield ("intellidoc_llm_backend_up", "Whether the Ollama backend passed its last health check", "gauge", labels, int(backend["healthy"]))
+        yield ("intellidoc_llm_backend_in_flight", "Requests outstanding on the Ollama backend", "gauge", labels, backend["outstanding"])
+        yield ("intellidoc_llm_backend_requests_total", "Requests sent to the Ollama backend", "counter", labels, backend["requests"])
+        yield ("intellidoc_llm_backend_failures_total", "Failed requests to the Ollama backend", "counter", labels, backend["failures"])
+    flights = {"chat": chat_engine.flights.stats()}
+    
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        cache = answer_cache.stats()
+        yield ("intellidoc_answer_cache_requests_total", "Answer cache lookups by result", "counter", {"result": "hit"}, cache["hits"])
+        yield ("intellidoc_answer_cache_requests_total", "Answer cache lookups by result", "counter", {"result": "miss"}, cache["misses"])
+        yield ("intellidoc_answer_cache_entries", "Answers held in the answer cache", "gauge", {}, cache["entries"])
+    
+    # Never load the model just to report on it
+    if get_document_processor.cache_info().currsize:
+        processor = get_document_processor().stats()
+        cache = processor["embedding_cache"]
+        for result, key in (("memory_hit", "hits"), ("disk_hit", "disk_hits"), ("miss", "misses")):
+            yield ("intellidoc_embedding_cache_requests_total", "Embedding cache lookups by result", "counter", {"result": result}, cache[key])
+        yield ("intellidoc_vector_store_chunks", "Chunks in the vector store", "gauge", {}, processor["vector_store"]["chunks"])
+        flights["search"] = processor["singleflight"]
+    
+    tenants = get_tenant_registry().stats()
+    yield ("intellidoc_tenants_open", "Tenant collections currently open", "gauge", {}, tenants["open"])
+    yield ("intellidoc_tenants_evicted_total", "Tenant collections closed to bound memory", "counter", {}, tenants["evicted"])
+    yield ("intellidoc_tenant_requests_rejected_total", "Requests refused by per-tenant limits", "counter", {}, get_tenant_limiter().stats()["rejected"])
+    
+    for kind, stats in flights.items():
+        yield ("intellidoc_singleflight_in_flight", "Distinct calls in flight that callers can join", "gauge", {"kind": kind}, stats["in_flight"])
+        yield ("intellidoc_singleflight_shared_total", "Callers that joined a call already in flight", "counter", {"kind": kind}, stats["shared"])
+
+metrics.enabled = get_settings()["METRICS_ENABLED"]
+metrics.add_collector(component_metrics)
+
+async def warm_up(app: FastAPI, started: float) -> None:
+    """Load the embedding model and vector store off the event loop, then mark the app ready."""
+    try:
+        # The model is shared by every collection, so it loads outside the processor
+        loading = time.perf_counter()
+        await run_in_threadpool(get_embeddings)
+        timings = {"embedding_model": time.perf_counter() - loading}
+        processor = await run_in_threadpool(get_document_processor)
+        timings.update(await run_in_threadpool(processor.warm_up))
+    except Exception as e:
+        app.state.startup["error"] = f"{type(e).__name__}: {e}"
+        print(f"Warm-up failed: {app.state.startup['error']}")
+        return
+    app.state.startup["phases_ms"].update({phase: round(seconds * 1000, 1) for phase, seconds in timings.items()})
+    for phase, seconds in timings.items():
+        print(f"Startup phase {phase}: {seconds * 1000:.0f} ms")
+    app.state.startup["ready_after_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    app.state.startup["ready"] = True
+    print(f"Ready after {app.state.startup['ready_after_ms']:.0f} ms")
+
+async def evict_idle_tenants(interval: float) -> None:
+    """Close tenant collections that have not been used for TENANT_IDLE_SECONDS."""
+    registry = get_tenant_registry()
+    while True:
+        await asyncio.sleep(interval)
+        evicted = await run_in_threadpool(registry.evict_idle)
+        if evicted:
+            print(f"Closed {evicted} idle tenant collection(s)")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Starting up...")
+    started = time.perf_counter()
+    app.state.startup = {"ready": False, "error": None, "phases_ms": {}, "ready_after_ms": None}
+    chat_engine = get_chat_engine()
+    await chat_engine.start()
+    app.state.startup["phases_ms"]["chat_engine"] = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Startup phase chat_engine: {app.state.startup['phases_ms']['chat_engine']:.0f} ms")
+    resumed = get_job_manager().resume()
+    if resumed:
+        print(f"Resuming {resumed} ingestion job(s)")
+    # The server accepts connections (and answers /health) while the model loads
+    warm_up_task = None
+    if get_settings()["WARM_UP_ON_STARTUP"]:
+        warm_up_task = asyncio.create_task(warm_up(app, started))
+    else:
+        app.state.startup["ready"] = True
+    tenant_sweeper = asyncio.create_task(
+        evict_idle_tenants(max(1.0, min(60.0, get_settings()["TENANT_IDLE_SECONDS"] / 2)))
+    )
     yield
     # Shutdown
     print("Shutting down...")
+    if warm_up_task is not None:
+        # The load itself runs in a thread and cannot be interrupted
+        await warm_up_task
+    tenant_sweeper.cancel()
+    await chat_engine.close()
+    get_job_manager().shutdown()
+    get_tenant_registry().close()
+    get_executor().shutdown()
+    get_ingest_executor().shutdown()
+    get_extractor().shutdown()
+    if get_document_processor.cache_info().currsize:
+        get_document_processor().close()
+    # Closed last: every collection's processor embeds with it
+    if get_embeddings.cache_info().currsize:
+        get_embeddings().close()
 
 app = FastAPI(
     title="Document Chat API",
@@ -21,7 +145,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add middleware
+# Add middleware; the last one added is the outermost. Tenant checks run
+# inside CORS, so preflights are answered and rejections carry CORS headers.
+app.add_middleware(TenantMiddleware, get_registry=get_tenant_registry, get_limiter=get_tenant_limiter)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -30,6 +156,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(chat.router)
@@ -37,7 +164,39 @@ app.include_router(documents.router)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    """Liveness: the process is up and serving, whether or not warm-up has finished."""
+    answer_cache = get_answer_cache()
+    try:
+        backends = get_chat_engine().router.stats()
+    except RuntimeError:
+        # Not started yet, or already shut down
+        backends = []
+    return {
+        "status": "healthy",
+        "ready": app.state.startup["ready"],
+        "executor": get_executor().stats(),
+        "ingest_executor": get_ingest_executor().stats(),
+        "llm_backends": backends,
+        "chat_singleflight": get_chat_engine().flights.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "tenants": get_tenant_registry().stats()
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 until the embedding model and vector store are loaded and warmed."""
+    startup = app.state.startup
+    if not startup["ready"]:
+        status = "failed" if startup["error"] else "starting"
+        return JSONResponse(status_code=503, content={"status": status, **startup})
+    return {"status": "ready", **startup}
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus text-format metrics: per-stage latency histograms, batch sizes, token rates, cache and in-flight counts."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled; set METRICS_ENABLED=true")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,52 @@
+import time
+
+from processing.utils.metrics import metrics
+
+_request_seconds = metrics.histogram(
+    "intellidoc_http_request_seconds",
+    "Seconds from request to the end of the response body, streams included",
+    labels=("method", "route", "status")
+)
+_in_flight = metrics.gauge("intellidoc_http_requests_in_flight", "HTTP requests being handled")
+
+class MetricsMiddleware:
+    """Record latency and in-flight counts of HTTP requests, labelled by route template.
+
+    Written as plain ASGI rather than ``BaseHTTPMiddleware`` so streamed
+    responses are timed until their last chunk, not just their headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        _in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _in_flight.dec()
+            # The template ("/documents/{document_id}") keeps label cardinality bounded
+            route = getattr(scope.get("route"), "path", None) or _route_path(scope)
+            _request_seconds.observe(time.perf_counter() - started, scope["method"], route, status)
+
+def _route_path(scope) -> str:
+    """Route template of the matched endpoint, for Starlette versions that do not set ``scope["route"]``."""
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        if getattr(route, "endpoint", None) is endpoint and endpoint is not None:
+            return route.path
+    return "unmatched"
@@ -0,0 +1,70 @@
+import json
+import math
+
+from starlette.concurrency import run_in_threadpool
+
+from processing import InvalidTenantError, TenantLimitError, validate_tenant_id
+
+# Probes and scrapes are never limited or tenant-scoped
+EXEMPT_PATHS = {"/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json"}
+# Limits for requests without a tenant header are tracked under this key,
+# which no valid tenant id can equal
+DEFAULT_TENANT = ""
+
+class TenantMiddleware:
+    """Resolve the X-Tenant-ID header, apply per-tenant limits and hold the tenant open.
+
+    The validated id is put on ``request.state.tenant_id`` (None without a
+    header). Requests over the tenant's rate or concurrency limit get 429
+    with Retry-After. A tenant's collection is leased from the registry for
+    the whole request, including a streamed body, so it is never evicted
+    while in use. Plain ASGI so that the lease and the concurrency slot
+    last until the last chunk is sent.
+    """
+
+    def __init__(self, app, get_registry, get_limiter):
+        self.app = app
+        self.get_registry = get_registry
+        self.get_limiter = get_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        header = dict(scope["headers"]).get(b"x-tenant-id")
+        tenant_id = None
+        if header:
+            try:
+                tenant_id = validate_tenant_id(header.decode("latin-1").strip())
+            except InvalidTenantError as e:
+                await _respond(send, 400, str(e))
+                return
+        scope.setdefault("state", {})["tenant_id"] = tenant_id
+
+        limiter = self.get_limiter()
+        limit_key = DEFAULT_TENANT if tenant_id is None else tenant_id
+        if limiter.enabled:
+            try:
+                limiter.acquire(limit_key)
+            except TenantLimitError as e:
+                await _respond(send, 429, str(e), {"retry-after": str(max(1, math.ceil(e.retry_after)))})
+                return
+        registry = self.get_registry() if tenant_id is not None else None
+        if registry is not None:
+            registry.acquire(tenant_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if registry is not None:
+                # Releasing may close evicted tenants' stores, which blocks
+                await run_in_threadpool(registry.release, tenant_id)
+            if limiter.enabled:
+                limiter.release(limit_key)
+
+async def _respond(send, status: int, detail: str, headers=None) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(name.encode(), value.encode()) for name, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
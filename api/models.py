@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 from datetime import datetime
 
 class Message(BaseModel):
@@ -9,10 +9,12 @@ class Message(BaseModel):
 class ChatRequest(BaseModel):
     messages: List[Message] = Field(..., description="List of chat messages")
     stream: bool = Field(default=False, description="Whether to stream the response")
+    session_id: Optional[str] = Field(None, description="Server-side conversation to continue; an unknown id starts a new one")
     
 class ChatResponse(BaseModel):
     response: str = Field(..., description="Assistant's response")
     context_used: int = Field(..., description="Number of context chunks used")
+    session_id: Optional[str] = Field(None, description="Server-side conversation the answer belongs to")
     
 class DocumentMetadata(BaseModel):
     title: Optional[str] = Field(None, description="Document title")
@@ -24,11 +26,50 @@ class ProcessedDocument(BaseModel):
     document_id: str = Field(..., description="Unique identifier for the document")
     chunk_count: int = Field(..., description="Number of chunks created")
     metadata: DocumentMetadata = Field(..., description="Document metadata")
+    added: Optional[int] = Field(None, description="Chunks embedded because they are new or changed")
+    unchanged: Optional[int] = Field(None, description="Chunks already stored and reused")
+    removed: Optional[int] = Field(None, description="Previously stored chunks that were deleted")
+    status: str = Field("completed", description="Document status (completed/failed)")
+    error: Optional[str] = Field(None, description="Why the document could not be read, if it failed")
+    
+class DocumentInfo(BaseModel):
+    document_id: str = Field(..., description="Unique identifier for the document")
+    chunk_count: int = Field(..., description="Number of chunks stored")
+    content_hash: str = Field(..., description="Hash of the document's chunk contents")
+    metadata: Dict = Field(..., description="Document metadata")
+    created_at: datetime = Field(..., description="When the document was first ingested")
+    updated_at: datetime = Field(..., description="When the document was last ingested")
+    
+class DocumentList(BaseModel):
+    documents: List[DocumentInfo] = Field(..., description="Documents on this page")
+    total: int = Field(..., description="Total number of documents")
+    offset: int = Field(..., description="Offset of the first document on this page")
+    limit: int = Field(..., description="Maximum number of documents per page")
+    
+class BulkIngestResult(BaseModel):
+    documents: List[ProcessedDocument] = Field(..., description="Documents in the upload, including any that failed")
+    chunk_count: int = Field(..., description="Total number of chunks created")
+    failed: int = Field(0, description="Number of documents that could not be read and were skipped")
+    elapsed_seconds: float = Field(..., description="Time spent chunking, embedding and storing")
+    
+class IngestionJob(BaseModel):
+    job_id: str = Field(..., description="Unique identifier for the ingestion job")
+    status: str = Field(..., description="Job status (queued/running/completed/failed)")
+    document_id: str = Field(..., description="Identifier the document is stored under")
+    filename: Optional[str] = Field(None, description="Uploaded file name")
+    chunks_embedded: int = Field(..., description="Number of chunks embedded and stored so far")
+    elapsed_seconds: float = Field(..., description="Processing time so far")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    added: Optional[int] = Field(None, description="Chunks embedded because they are new or changed")
+    unchanged: Optional[int] = Field(None, description="Chunks already stored and reused")
+    removed: Optional[int] = Field(None, description="Previously stored chunks that were deleted")
+    created_at: datetime = Field(..., description="When the job was submitted")
     
 class SearchQuery(BaseModel):
     query: str = Field(..., description="Search query")
     filters: Optional[Dict] = Field(None, description="Metadata filters")
     limit: int = Field(default=3, description="Number of results to return")
+    mode: Optional[Literal["vector", "keyword", "hybrid"]] = Field(None, description="Retrieval mode (vector/keyword/hybrid); defaults to the server's SEARCH_MODE")
     
 class SearchResult(BaseModel):
     content: str = Field(..., description="Content of the chunk")
@@ -1,19 +1,34 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sse_starlette.sse import EventSourceResponse
-from typing import List, Optional
-import asyncio
+from typing import Dict, List, Optional
+import json
+import time
 
 from ..models import ChatRequest, ChatResponse, Message
-from ..dependencies import get_chat_engine, get_document_processor
-from processing import ChatEngine, DocumentProcessor
+from ..dependencies import get_chat_engine, get_request_processor, get_session_store, get_settings, get_tenant_id
+from processing import ChatEngine, DocumentProcessor, ExecutorBusyError, SessionStore, AllBackendsFailedError
+from processing.utils import coalesce
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+def _history_from_messages(messages: List[Message]) -> List[Dict]:
+    """Pair earlier user/assistant messages into history exchanges."""
+    history = []
+    for i in range(0, len(messages) - 1, 2):
+        if i + 1 < len(messages):
+            history.append({
+                "user": messages[i].content,
+                "assistant": messages[i + 1].content
+            })
+    return history
+
 @router.post("/", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
     chat_engine: ChatEngine = Depends(get_chat_engine),
-    doc_processor: DocumentProcessor = Depends(get_document_processor)
+    doc_processor: DocumentProcessor = Depends(get_request_processor),
+    session_store: SessionStore = Depends(get_session_store),
+    tenant_id: Optional[str] = Depends(get_tenant_id)
 ):
     try:
         # Get the latest question
@@ -21,31 +36,40 @@ async def chat(
             raise HTTPException(status_code=400, detail="Last message must be from user")
         
         question = request.messages[-1].content
+        # A session keeps the history server-side, so only the last message is used
+        session = session_store.get_or_create(request.session_id, tenant_id) if request.session_id else None
         
-        # Search for relevant context
-        context = doc_processor.search_similar(question)
+        # Search for relevant context; the embedding also keys the answer cache
+        query_embedding = await doc_processor.aembed_query(question)
+        context = await doc_processor.asearch_similar(question, query_embedding=query_embedding)
         
         # Format previous messages for history
-        history = []
-        for i in range(0, len(request.messages) - 1, 2):
-            if i + 1 < len(request.messages):
-                history.append({
-                    "user": request.messages[i].content,
-                    "assistant": request.messages[i + 1].content
-                })
+        history = _history_from_messages(request.messages)
+        
+        # Fit context and history into the model's context window
+        if session is None:
+            context, history = chat_engine.pack_prompt(question, context, history)
         
         # Generate response
         response = await chat_engine.generate_response(
             question=question,
             context=context,
             chat_history=history,
-            stream=False
+            stream=False,
+            query_embedding=query_embedding,
+            session=session,
+            tenant_id=tenant_id
         )
         
         return ChatResponse(
             response=response,
-            context_used=len(context)
+            context_used=len(context),
+            session_id=request.session_id if session else None
         )
+    except HTTPException:
+        raise
+    except (ExecutorBusyError, AllBackendsFailedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -53,28 +77,74 @@ async def chat(
 async def chat_stream(
     request: ChatRequest,
     chat_engine: ChatEngine = Depends(get_chat_engine),
-    doc_processor: DocumentProcessor = Depends(get_document_processor)
+    doc_processor: DocumentProcessor = Depends(get_request_processor),
+    session_store: SessionStore = Depends(get_session_store),
+    settings: dict = Depends(get_settings),
+    tenant_id: Optional[str] = Depends(get_tenant_id)
 ):
+    # Reject bad requests with a status code before the event stream starts
+    if not request.messages or request.messages[-1].role != "user":
+        raise HTTPException(status_code=400, detail="Last message must be from user")
+    
     async def event_generator():
+        started = time.perf_counter()
+        timings = {}
+        
+        def elapsed_ms() -> float:
+            return round((time.perf_counter() - started) * 1000, 1)
+        
         try:
-            # Get context and prepare response
+            # Tell the client we are working before anything slow happens
+            yield {
+                "event": "status",
+                "data": "retrieving"
+            }
+            
             question = request.messages[-1].content
-            context = doc_processor.search_similar(question)
+            session = session_store.get_or_create(request.session_id, tenant_id) if request.session_id else None
+            
+            query_embedding = await doc_processor.aembed_query(question)
+            context = await doc_processor.asearch_similar(question, query_embedding=query_embedding)
+            timings["retrieval_ms"] = elapsed_ms()
+            
+            history = None if session else _history_from_messages(request.messages)
+            
+            if session is None:
+                context, history = chat_engine.pack_prompt(question, context, history)
             
-            async for chunk in chat_engine.generate_response(
+            pieces = await chat_engine.generate_response(
                 question=question,
                 context=context,
-                stream=True
+                chat_history=history,
+                stream=True,
+                query_embedding=query_embedding,
+                session=session,
+                tenant_id=tenant_id
+            )
+            frames = 0
+            async for chunk in coalesce(
+                pieces,
+                max_chars=settings["STREAM_COALESCE_CHARS"],
+                max_delay_ms=settings["STREAM_COALESCE_MS"]
             ):
-                if chunk:
-                    yield {
-                        "event": "message",
-                        "data": chunk
-                    }
+                if not frames:
+                    timings["first_token_ms"] = elapsed_ms()
+                frames += 1
+                yield {
+                    "event": "message",
+                    "data": chunk
+                }
             
+            timings["generation_ms"] = round(elapsed_ms() - timings["retrieval_ms"], 1)
+            timings["total_ms"] = elapsed_ms()
             yield {
                 "event": "done",
-                "data": ""
+                "data": json.dumps({
+                    "session_id": request.session_id if session else None,
+                    "context_used": len(context),
+                    "frames": frames,
+                    "timings": timings
+                })
             }
         
         except Exception as e:
@@ -83,4 +153,14 @@ async def chat_stream(
                 "data": str(e)
             }
     
-    return EventSourceResponse(event_generator())
\ No newline at end of file
+    return EventSourceResponse(event_generator())
+
+@router.delete("/sessions/{session_id}")
+async def end_session(
+    session_id: str,
+    session_store: SessionStore = Depends(get_session_store),
+    tenant_id: Optional[str] = Depends(get_tenant_id)
+):
+    if not session_store.delete(session_id, tenant_id):
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found")
+    return {"status": "success", "message": f"Session {session_id} ended"}
@@ -1,53 +1,47 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
-from typing import List, Optional
-import os
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Query
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Union
 from datetime import datetime
-import chardet
+import time
 
-from ..models import ProcessedDocument, DocumentMetadata, SearchQuery, SearchResult
-from ..dependencies import get_document_processor
-from processing import DocumentProcessor
+from ..models import (
+    ProcessedDocument, DocumentMetadata, SearchQuery, SearchResult, IngestionJob, BulkIngestResult,
+    DocumentInfo, DocumentList
+)
+from ..dependencies import get_request_processor, get_job_manager, get_tenant_id
+from processing import DocumentProcessor, ExecutorBusyError, IngestionJobManager
+from processing.utils import iter_files, UndecodableContentError, ExtractionError
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-@router.post("/upload", response_model=ProcessedDocument)
+@router.get("", response_model=DocumentList)
+async def list_documents(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+    doc_processor: DocumentProcessor = Depends(get_request_processor)
+):
+    documents, total = await doc_processor.executor.run(
+        doc_processor.list_documents, offset, limit
+    )
+    return DocumentList(
+        documents=[DocumentInfo(**document) for document in documents],
+        total=total,
+        offset=offset,
+        limit=limit
+    )
+
+@router.post("/upload", response_model=Union[ProcessedDocument, IngestionJob])
 async def upload_document(
     file: UploadFile = File(...),
     title: Optional[str] = None,
     tags: Optional[str] = None,
-    doc_processor: DocumentProcessor = Depends(get_document_processor)
+    document_id: Optional[str] = None,
+    background: bool = False,
+    doc_processor: DocumentProcessor = Depends(get_request_processor),
+    job_manager: IngestionJobManager = Depends(get_job_manager),
+    tenant_id: Optional[str] = Depends(get_tenant_id)
 ):
     try:
-        # Create temporary file path
-        upload_dir = os.path.join("storage", "uploads")
-        os.makedirs(upload_dir, exist_ok=True)
-        file_path = os.path.join(upload_dir, file.filename)
-        
-        # Read file content
-        content = await file.read()
-        
-        # Detect the file encoding
-        result = chardet.detect(content)
-        encoding = result['encoding'] if result['encoding'] else 'utf-8'
-        
-        try:
-            # Try to decode with detected encoding
-            text_content = content.decode(encoding)
-        except UnicodeDecodeError:
-            # If that fails, try some common encodings
-            encodings = ['utf-8', 'latin1', 'cp1252', 'iso-8859-1']
-            for enc in encodings:
-                try:
-                    text_content = content.decode(enc)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Could not decode file content. Please ensure it's a valid text file."
-                )
-        
         # Prepare metadata
         metadata = DocumentMetadata(
             title=title or file.filename,
@@ -55,31 +49,95 @@ async def upload_document(
             tags=tags.split(",") if tags else None
         )
         
-        # Process document
-        doc_id = doc_processor.process_document(
-            content=text_content,
-            metadata=metadata.dict()
+        if background:
+            # Spool the upload and return immediately; a worker ingests it
+            job = await run_in_threadpool(
+                job_manager.submit,
+                file.file,
+                filename=file.filename,
+                metadata=metadata.dict(),
+                document_id=document_id,
+                tenant_id=tenant_id
+            )
+            return IngestionJob(**job)
+        
+        # Extract, chunk and embed the upload incrementally on the worker pool;
+        # PDF, DOCX, HTML and Markdown are parsed in worker processes
+        # Re-uploading under an existing document_id only embeds changed chunks
+        summary = await doc_processor.aprocess_file(
+            file.file,
+            filename=file.filename,
+            metadata=metadata.dict(),
+            document_id=document_id
         )
         
-        return ProcessedDocument(
-            document_id=doc_id,
-            chunk_count=len(text_content.split()) // 512 + 1,  # Rough estimate
-            metadata=metadata
+        return ProcessedDocument(**summary, metadata=metadata)
+    
+    except (UndecodableContentError, ExtractionError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk", response_model=BulkIngestResult)
+async def bulk_upload_documents(
+    files: List[UploadFile] = File(...),
+    tags: Optional[str] = None,
+    id_prefix: Optional[str] = None,
+    doc_processor: DocumentProcessor = Depends(get_request_processor)
+):
+    try:
+        date = datetime.utcnow()
+        metadatas: List[DocumentMetadata] = []
+        
+        def documents():
+            # Consumed lazily on the worker pool, one file or archive member at a time
+            for upload in files:
+                for name, stream in iter_files(upload.file, upload.filename):
+                    metadata = DocumentMetadata(
+                        title=name,
+                        date=date,
+                        tags=tags.split(",") if tags else None
+                    )
+                    metadatas.append(metadata)
+                    # With a prefix, ids are stable across syncs so unchanged
+                    # chunks are not re-embedded
+                    document_id = f"{id_prefix}{name}" if id_prefix else None
+                    yield doc_processor.extractor.extract(stream, name), metadata.dict(), document_id
+        
+        start = time.perf_counter()
+        # A file that cannot be read is skipped and reported, not fatal to the rest
+        summaries = await doc_processor.aprocess_documents(
+            documents(), skip_errors=(UndecodableContentError, ExtractionError)
+        )
+        
+        return BulkIngestResult(
+            documents=[
+                ProcessedDocument(**summary, metadata=metadata, status="failed" if "error" in summary else "completed")
+                for summary, metadata in zip(summaries, metadatas)
+            ],
+            chunk_count=sum(summary["chunk_count"] for summary in summaries),
+            failed=sum("error" in summary for summary in summaries),
+            elapsed_seconds=time.perf_counter() - start
         )
     
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/search", response_model=List[SearchResult])
 async def search_documents(
     query: SearchQuery,
-    doc_processor: DocumentProcessor = Depends(get_document_processor)
+    doc_processor: DocumentProcessor = Depends(get_request_processor)
 ):
     try:
-        results = doc_processor.search_similar(
+        results = await doc_processor.asearch_similar(
             query=query.query,
             n_results=query.limit,
-            metadata_filter=query.filters
+            metadata_filter=query.filters,
+            mode=query.mode
         )
         
         return [
@@ -91,17 +149,60 @@ async def search_documents(
             for result in results
         ]
     
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/{document_id}")
+@router.get("/jobs", response_model=List[IngestionJob])
+async def list_jobs(
+    job_manager: IngestionJobManager = Depends(get_job_manager),
+    tenant_id: Optional[str] = Depends(get_tenant_id)
+):
+    return [IngestionJob(**job) for job in job_manager.list_jobs(tenant_id)]
+
+@router.get("/jobs/{job_id}", response_model=IngestionJob)
+async def get_job(
+    job_id: str,
+    job_manager: IngestionJobManager = Depends(get_job_manager),
+    tenant_id: Optional[str] = Depends(get_tenant_id)
+):
+    job = job_manager.get(job_id)
+    # Other tenants' jobs are indistinguishable from missing ones
+    if job is None or job.get("tenant_id") != tenant_id:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return IngestionJob(**job)
+
+@router.get("/stats")
+async def document_stats(
+    doc_processor: DocumentProcessor = Depends(get_request_processor)
+):
+    # Counts rows in SQLite and the vector store, so keep it off the event loop
+    try:
+        return await doc_processor.executor.run(doc_processor.stats)
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/{document_id:path}", response_model=DocumentInfo)
+async def get_document(
+    document_id: str,
+    doc_processor: DocumentProcessor = Depends(get_request_processor)
+):
+    document = await doc_processor.executor.run(doc_processor.get_document, document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
+    return DocumentInfo(**document)
+
+@router.delete("/{document_id:path}")
 async def delete_document(
     document_id: str,
-    doc_processor: DocumentProcessor = Depends(get_document_processor)
+    doc_processor: DocumentProcessor = Depends(get_request_processor)
 ):
     try:
-        doc_processor.delete_document(document_id)
+        await doc_processor.adelete_document(document_id)
         return {"status": "success", "message": f"Document {document_id} deleted"}
     
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Ingestion throughput: one document per call vs pooled bulk ingestion.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bulk_ingest --docs 2000
+"""
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+from processing import DocumentProcessor
+
+WORDS = (
+    "invoice order shipment warehouse error code retry timeout customer account "
+    "refund policy release version deploy server cluster node cache index query"
+).split()
+
+def make_documents(count: int, words_per_doc: int, seed: int):
+    """Small synthetic documents; the seed keeps each run's texts distinct."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(words_per_doc)) + f" ref-{seed}-{i}"
+        for i in range(count)
+    ]
+
+def run(mode: str, texts, batch_size: int) -> float:
+    storage = tempfile.mkdtemp(prefix=f"bench_{mode}_")
+    try:
+        processor = DocumentProcessor(storage_path=storage, ingest_batch_size=batch_size)
+        start = time.perf_counter()
+        if mode == "single":
+            for text in texts:
+                processor.process_document(text)
+        else:
+            processor.process_documents(([text], None, None) for text in texts)
+        elapsed = time.perf_counter() - start
+        processor.executor.shutdown()
+        processor.ingest_executor.shutdown()
+        return len(texts) / elapsed
+    finally:
+        shutil.rmtree(storage, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000, help="Number of documents")
+    parser.add_argument("--words", type=int, default=80, help="Words per document")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding batch")
+    args = parser.parse_args()
+
+    single = run("single", make_documents(args.docs, args.words, seed=1), args.batch_size)
+    bulk = run("bulk", make_documents(args.docs, args.words, seed=2), args.batch_size)
+    print(f"per-document: {single:8.1f} docs/sec")
+    print(f"bulk:         {bulk:8.1f} docs/sec ({bulk / single:.1f}x)")
@@ -0,0 +1,87 @@
+"""Embedding backend parity and speed against the PyTorch fp32 reference.
+
+For every backend, reports cosine agreement with the fp32 vectors plus
+single-query latency and batch throughput. Exits non-zero when a backend's
+minimum cosine falls below --threshold, so it doubles as a parity check
+before switching EMBEDDING_BACKEND in production.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_embedding_backends --backends onnx onnx-int8 torch-int8
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+
+from processing.utils import create_backend
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+WORDS = (
+    "customer reported error E1042 after upgrading the firmware on the gateway "
+    "the invoice total does not match the purchase order please escalate to billing "
+    "reset the password from the admin console and confirm the audit log entry"
+).split()
+
+def make_texts(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 200))) for _ in range(count)]
+
+def measure(backend, texts, batch_size: int, queries: int):
+    backend.encode(texts[:8])  # warm up
+
+    latencies = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        backend.encode([text])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    vectors = np.vstack([
+        backend.encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)
+    ])
+    throughput = len(texts) / (time.perf_counter() - start)
+    return vectors, statistics.median(latencies), throughput
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8", "torch-int8"])
+    parser.add_argument("--texts", type=int, default=1024, help="Texts in the parity/throughput set")
+    parser.add_argument("--queries", type=int, default=100, help="Single-text calls for latency")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=0.98, help="Minimum cosine agreement")
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+    onnx_dir = tempfile.mkdtemp(prefix="onnx_")
+    reference, ref_latency, ref_rate = measure(
+        create_backend("torch", MODEL_NAME), texts, args.batch_size, args.queries
+    )
+
+    print(f"{'backend':>12} {'p50 ms':>8} {'texts/s':>9} {'mean cos':>9} {'min cos':>8} {'fp16 cos':>9}")
+    print(f"{'torch':>12} {ref_latency:>8.2f} {ref_rate:>9.1f} {1.0:>9.4f} {1.0:>8.4f} "
+          f"{cosine_rows(reference, reference.astype(np.float16)).min():>9.4f}")
+
+    failed = []
+    for name in args.backends:
+        backend = create_backend(name, MODEL_NAME, onnx_dir=onnx_dir)
+        vectors, latency, rate = measure(backend, texts, args.batch_size, args.queries)
+        cosines = cosine_rows(reference, vectors)
+        fp16 = cosine_rows(reference, vectors.astype(np.float16))
+        print(f"{name:>12} {latency:>8.2f} {rate:>9.1f} {cosines.mean():>9.4f} "
+              f"{cosines.min():>8.4f} {fp16.min():>9.4f}")
+        if cosines.min() < args.threshold:
+            failed.append(name)
+
+    if failed:
+        print(f"Parity below {args.threshold}: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,125 @@
+"""Extraction throughput per upload format, in-thread versus a worker-process pool.
+
+Builds synthetic PDF, DOCX, HTML and Markdown files and drains
+``DocumentExtractor.extract`` for each. Run from the repository root:
+
+    python -m benchmarks.bench_extractors --pages 200 --workers 4
+"""
+import argparse
+import io
+import random
+import time
+
+from processing.utils import DocumentExtractor
+
+WORDS = (
+    "invoice order shipment warehouse error code retry timeout customer account "
+    "refund policy release version deploy server cluster node cache index query"
+).split()
+
+def paragraphs(count: int, rng: random.Random):
+    for _ in range(count):
+        yield " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 90))) + "."
+
+def make_pdf(pages: int, rng: random.Random) -> bytes:
+    """A minimal PDF with one text stream of wrapped lines per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for _ in range(pages):
+        lines = []
+        for paragraph in paragraphs(6, rng):
+            words = paragraph.split()
+            lines.extend(" ".join(words[i:i + 12]) for i in range(0, len(words), 12))
+        ops = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines[:70]) + " ET"
+        stream = ops.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages)
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def make_docx(pages: int, rng: random.Random) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for i, paragraph in enumerate(paragraphs(pages * 6, rng)):
+        if i % 6 == 0:
+            document.add_heading(f"Section {i // 6 + 1}", level=2)
+        document.add_paragraph(paragraph)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+def make_markdown(pages: int, rng: random.Random) -> bytes:
+    blocks = []
+    for i, paragraph in enumerate(paragraphs(pages * 6, rng)):
+        if i % 6 == 0:
+            blocks.append(f"## Section {i // 6 + 1}")
+        blocks.append(paragraph.replace(" error ", " **error** "))
+    return "\n\n".join(blocks).encode("utf-8")
+
+def make_html(pages: int, rng: random.Random) -> bytes:
+    body = "".join(
+        f"<h2>Section {i // 6 + 1}</h2>" * (i % 6 == 0) + f"<p>{paragraph}</p>\n"
+        for i, paragraph in enumerate(paragraphs(pages * 6, rng))
+    )
+    return f"<html><head><style>p {{}}</style></head><body>{body}</body></html>".encode("utf-8")
+
+def drain(extractor: DocumentExtractor, data: bytes, filename: str) -> float:
+    started = time.perf_counter()
+    for _ in extractor.extract(io.BytesIO(data), filename):
+        pass
+    return time.perf_counter() - started
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="Pages (or page-equivalents) per document")
+    parser.add_argument("--workers", type=int, default=4, help="Extraction worker processes")
+    parser.add_argument("--pages-per-task", type=int, default=8, help="PDF pages per worker task")
+    parser.add_argument("--repeats", type=int, default=3, help="Best of this many runs")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    documents = {
+        "pdf": make_pdf(args.pages, rng),
+        "docx": make_docx(args.pages, rng),
+        "html": make_html(args.pages, rng),
+        "md": make_markdown(args.pages, rng),
+    }
+
+    inline = DocumentExtractor(max_workers=0)
+    pooled = DocumentExtractor(max_workers=args.workers, pages_per_task=args.pages_per_task)
+    # Start the worker processes before timing
+    drain(pooled, documents["md"], "warmup.md")
+
+    print(f"{'format':8} {'size':>9} {'in-thread':>12} {f'{args.workers} workers':>12}")
+    for suffix, data in documents.items():
+        filename = f"document.{suffix}"
+        inline_seconds = min(drain(inline, data, filename) for _ in range(args.repeats))
+        pooled_seconds = min(drain(pooled, data, filename) for _ in range(args.repeats))
+        mb = len(data) / 1e6
+        print(
+            f"{suffix:8} {mb:7.2f}MB {mb / inline_seconds:8.1f} MB/s {mb / pooled_seconds:8.1f} MB/s"
+        )
+
+    print("\nExtractor stats (pool):")
+    for format, stats in pooled.stats().items():
+        print(f"  {format:8} {stats}")
+    pooled.shutdown(wait=True)
@@ -0,0 +1,77 @@
+"""Retrieval quality and latency of vector, keyword and hybrid search.
+
+Builds a synthetic corpus where every document mentions one error code,
+then asks for each code and checks whether its document is retrieved.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_hybrid_search --docs 1000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from processing import DocumentProcessor
+
+WORDS = (
+    "invoice order shipment warehouse error code retry timeout customer account "
+    "refund policy release version deploy server cluster node cache index query"
+).split()
+
+def make_corpus(count: int, words_per_doc: int, seed: int = 0):
+    """Return ``(code, text)`` pairs; each code appears in exactly one document."""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        code = f"E{i:04d}-{rng.choice('ABCDEFGH')}"
+        words = [rng.choice(WORDS) for _ in range(words_per_doc)]
+        words.insert(rng.randrange(len(words)), code)
+        corpus.append((code, " ".join(words)))
+    return corpus
+
+async def measure(processor: DocumentProcessor, mode: str, queries, limit: int):
+    """Return (hit rate, p50 ms, p95 ms) for one search mode."""
+    hits, latencies = 0, []
+    for code, doc_id in queries:
+        start = time.perf_counter()
+        results = await processor.asearch_similar(f"what does error {code} mean?", limit, mode=mode)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += any(r["metadata"]["document_id"] == doc_id for r in results)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return hits / len(queries), statistics.median(latencies), p95
+
+async def main(args):
+    storage = tempfile.mkdtemp(prefix="bench_hybrid_")
+    try:
+        processor = DocumentProcessor(storage_path=storage)
+        corpus = make_corpus(args.docs, args.words)
+        summaries = processor.process_documents(([text], None, None) for _, text in corpus)
+        doc_ids = {code: summary["document_id"] for (code, _), summary in zip(corpus, summaries)}
+
+        rng = random.Random(1)
+        queries = [(code, doc_ids[code]) for code in rng.sample(sorted(doc_ids), min(args.queries, len(doc_ids)))]
+
+        print(f"{'mode':<8} {'hit@' + str(args.limit):>7} {'p50 ms':>8} {'p95 ms':>8}")
+        for mode in DocumentProcessor.SEARCH_MODES:
+            hit_rate, p50, p95 = await measure(processor, mode, queries, args.limit)
+            print(f"{mode:<8} {hit_rate:7.1%} {p50:8.2f} {p95:8.2f}")
+
+        processor.close()
+        processor.executor.shutdown()
+        processor.ingest_executor.shutdown()
+    finally:
+        shutil.rmtree(storage, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1000, help="Number of documents")
+    parser.add_argument("--words", type=int, default=120, help="Words per document")
+    parser.add_argument("--queries", type=int, default=200, help="Number of identifier queries")
+    parser.add_argument("--limit", type=int, default=3, help="Results per search")
+    args = parser.parse_args()
+    asyncio.run(main(args))
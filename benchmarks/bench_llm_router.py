@@ -0,0 +1,84 @@
+"""Chat throughput and failover across several stub Ollama servers.
+
+Starts stub servers in-process (see `benchmarks.stub_ollama`), so no
+models are needed. Reports throughput with one backend and with all of
+them, how requests were spread, and what happens when a backend is
+stopped part way through a burst.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_llm_router --backends 3 --requests 120
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+from processing import ChatEngine
+from benchmarks.stub_ollama import start_stub
+
+async def burst(engine: ChatEngine, requests: int, on_halfway=None):
+    """Send `requests` concurrent chats, alternating stream and non-stream."""
+    served = Counter()
+    errors = []
+
+    async def one(i: int):
+        try:
+            if i % 2:
+                answer = "".join([p async for p in await engine.generate_response(f"q{i}", [], stream=True)])
+            else:
+                answer = await engine.generate_response(f"q{i}", [], stream=False)
+            served[answer.split("-", 1)[0]] += 1
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(one(i)) for i in range(requests)]
+    if on_halfway:
+        await asyncio.sleep(0)
+        await asyncio.gather(*tasks[:requests // 2])
+        on_halfway()
+    await asyncio.gather(*tasks)
+    return requests / (time.perf_counter() - start), served, errors
+
+async def run(urls, args, on_halfway=None):
+    engine = ChatEngine(
+        ollama_urls=urls,
+        max_concurrent_generations=args.per_backend,
+        health_interval=0.5
+    )
+    await engine.start()
+    try:
+        return await burst(engine, args.requests, on_halfway)
+    finally:
+        await engine.close()
+
+async def main(args):
+    stubs = [start_stub(chr(ord("a") + i), args.tokens, args.delay_ms) for i in range(args.backends)]
+    urls = [url for _, url in stubs]
+
+    single, _, _ = await run(urls[:1], args)
+    pooled, served, errors = await run(urls, args)
+    print(f"1 backend:  {single:7.1f} req/s")
+    print(f"{len(urls)} backends: {pooled:7.1f} req/s ({pooled / single:.1f}x)  spread: {dict(sorted(served.items()))}")
+
+    def stop_first():
+        stubs[0][0].should_exit = True
+
+    _, served, errors = await run(urls, args, on_halfway=stop_first)
+    print(f"failover:   spread: {dict(sorted(served.items()))}  errors: {len(errors)}")
+    for error in sorted(set(errors))[:5]:
+        print(f"  {error}")
+
+    for server, _ in stubs:
+        server.should_exit = True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", type=int, default=3, help="Number of stub servers")
+    parser.add_argument("--requests", type=int, default=120, help="Requests per burst")
+    parser.add_argument("--per-backend", type=int, default=4, help="Concurrent generations per backend")
+    parser.add_argument("--tokens", type=int, default=20, help="Tokens per answer")
+    parser.add_argument("--delay-ms", type=float, default=10.0, help="Stub delay per token")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,48 @@
+"""Embedding throughput: single process vs sharded worker processes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_multiprocess_embeddings --texts 4096 --workers 2 4 8
+"""
+import argparse
+import random
+import time
+
+from processing.utils import EmbeddingsManager
+
+WORDS = (
+    "the quarterly report shows revenue growth across all regions while "
+    "operating costs fell due to lower cloud spend and improved utilisation"
+).split()
+
+def make_texts(count: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) for _ in range(count)]
+
+def throughput(manager: EmbeddingsManager, texts, batch_size: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        manager.get_embeddings(texts[i:i + batch_size])
+    return len(texts) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--texts", type=int, default=4096, help="Texts to encode per run")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per get_embeddings call")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4], help="Worker counts to try")
+    args = parser.parse_args()
+
+    # The cache is in-memory only here, and every run uses fresh texts so
+    # nothing is served from it
+    single = EmbeddingsManager()
+    single.get_embeddings(make_texts(32, seed=0))
+    base = throughput(single, make_texts(args.texts, seed=1), args.batch_size)
+    print(f"{'workers':>8} {'texts/sec':>10} {'speedup':>8}")
+    print(f"{'1 (in-process)':>8} {base:>10.1f} {1.0:>7.2f}x")
+
+    for seed, workers in enumerate(args.workers, start=2):
+        manager = EmbeddingsManager(num_workers=workers)
+        manager.get_embeddings(make_texts(workers * 32, seed=100 + seed))  # start workers
+        rate = throughput(manager, make_texts(args.texts, seed=seed), args.batch_size)
+        print(f"{workers:>8} {rate:>10.1f} {rate / base:>7.2f}x")
+        manager.close()
@@ -0,0 +1,57 @@
+"""Query embedding throughput with and without micro-batching.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_query_batching --queries 512
+"""
+import argparse
+import asyncio
+import time
+
+from processing.utils import EmbeddingsManager, BlockingExecutor, EmbeddingBatcher
+
+CONCURRENCY_LEVELS = [1, 8, 32, 128]
+
+async def run_clients(embed, clients: int, total_queries: int) -> float:
+    """Issue `total_queries` embeds from `clients` concurrent callers; return queries/sec."""
+    per_client = max(1, total_queries // clients)
+
+    async def client(client_id: int):
+        for i in range(per_client):
+            await embed(f"what does error code E{client_id:03d}-{i} mean?")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(c) for c in range(clients)])
+    return per_client * clients / (time.perf_counter() - start)
+
+async def main(args):
+    embeddings = EmbeddingsManager()
+    executor = BlockingExecutor(max_workers=args.workers, max_queue=1024)
+    batcher = EmbeddingBatcher(
+        embeddings.get_embeddings,
+        executor,
+        max_batch_size=args.batch_size,
+        max_wait_ms=args.wait_ms
+    )
+
+    async def unbatched(text):
+        return await executor.run(embeddings.get_embedding, text)
+
+    # Warm up the model before timing
+    embeddings.get_embeddings(["warm up"] * 8)
+
+    print(f"{'clients':>8} {'unbatched q/s':>14} {'batched q/s':>12} {'speedup':>8}")
+    for clients in CONCURRENCY_LEVELS:
+        base = await run_clients(unbatched, clients, args.queries)
+        batched = await run_clients(batcher.embed, clients, args.queries)
+        print(f"{clients:>8} {base:>14.1f} {batched:>12.1f} {batched / base:>7.2f}x")
+
+    executor.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=512, help="Queries per run")
+    parser.add_argument("--workers", type=int, default=4, help="Executor threads")
+    parser.add_argument("--batch-size", type=int, default=32, help="Max batch size")
+    parser.add_argument("--wait-ms", type=float, default=5.0, help="Batch window in ms")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,79 @@
+"""Time-to-first-token per conversation turn, with and without a chat session.
+
+Needs a running Ollama server with the model pulled. Run from the
+repository root:
+
+    python -m benchmarks.bench_session_ttft --host http://localhost:11434 --model mistral
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from processing import ChatEngine, ChatSession
+
+WORDS = (
+    "invoice order shipment warehouse error code retry timeout customer account "
+    "refund policy release version deploy server cluster node cache index query"
+).split()
+
+QUESTIONS = [
+    "What causes shipment retries?",
+    "How is a refund issued for a failed order?",
+    "Which error codes relate to the warehouse?",
+    "What happens when a cluster node times out?",
+    "Summarize the release and deploy policy.",
+]
+
+def make_context(chunks: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"chunk_{i}",
+            "content": " ".join(rng.choice(WORDS) for _ in range(words)),
+            "metadata": {},
+            "distance": i / chunks
+        }
+        for i in range(chunks)
+    ]
+
+async def first_token_ms(engine: ChatEngine, question: str, context, history=None, session=None):
+    start = time.perf_counter()
+    ttft = None
+    answer = []
+    async for piece in await engine.generate_response(
+        question, context, chat_history=history, stream=True, session=session
+    ):
+        if ttft is None and piece:
+            ttft = (time.perf_counter() - start) * 1000
+        answer.append(piece)
+    return ttft or 0.0, "".join(answer)
+
+async def main(args):
+    engine = ChatEngine(model_name=args.model, ollama_base_url=args.host, context_window=args.num_ctx)
+    await engine.start()
+    context = make_context(args.chunks, args.words)
+    try:
+        # Load the model so turn 1 does not include the load time
+        await engine.generate_response("Say ok.", [], stream=False)
+
+        session = ChatSession("bench")
+        history = []
+        print(f"{'turn':>4} {'session ms':>11} {'stateless ms':>13}")
+        for turn, question in enumerate(QUESTIONS, 1):
+            session_ttft, _ = await first_token_ms(engine, question, context, session=session)
+            stateless_ttft, answer = await first_token_ms(engine, question, context, history=history)
+            history.append({"user": question, "assistant": answer})
+            print(f"{turn:>4} {session_ttft:11.0f} {stateless_ttft:13.0f}")
+    finally:
+        await engine.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="http://localhost:11434", help="Ollama base URL")
+    parser.add_argument("--model", default="mistral", help="Ollama model name")
+    parser.add_argument("--num-ctx", type=int, default=4096, help="Model context window")
+    parser.add_argument("--chunks", type=int, default=6, help="Context chunks per prompt")
+    parser.add_argument("--words", type=int, default=150, help="Words per context chunk")
+    args = parser.parse_args()
+    asyncio.run(main(args))
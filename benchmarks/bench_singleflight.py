@@ -0,0 +1,55 @@
+"""Backend load under a burst of repeated questions, with request sharing.
+
+Sends a burst of chat requests drawn from a few distinct questions to a
+stub Ollama server (see `benchmarks.stub_ollama`) and counts how many
+generations the server actually ran.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_singleflight --requests 200 --distinct 5
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from processing import ChatEngine
+from benchmarks.stub_ollama import start_stub
+
+async def main(args):
+    server, url = start_stub("a", args.tokens, args.delay_ms)
+    app = server.config.app
+    engine = ChatEngine(ollama_urls=[url], max_concurrent_generations=args.requests)
+    await engine.start()
+
+    rng = random.Random(0)
+    questions = [f"What does error E{i:03d} mean?" for i in range(args.distinct)]
+    context = [{"id": "chunk_0", "content": "Error codes are listed in the manual.", "metadata": {}, "distance": 0.1}]
+
+    async def ask(i: int):
+        question = rng.choice(questions)
+        if i % 2:
+            return "".join([p async for p in await engine.generate_response(question, context, stream=True)])
+        return await engine.generate_response(question, context, stream=False)
+
+    try:
+        start = time.perf_counter()
+        answers = await asyncio.gather(*[ask(i) for i in range(args.requests)])
+        elapsed = time.perf_counter() - start
+    finally:
+        await engine.close()
+        server.should_exit = True
+
+    print(f"requests:    {len(answers)} ({args.distinct} distinct questions, half streamed)")
+    print(f"generations: {app.state.requests}")
+    print(f"elapsed:     {elapsed:.2f}s")
+    print(f"sharing:     {engine.flights.stats()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests in the burst")
+    parser.add_argument("--distinct", type=int, default=5, help="Distinct questions")
+    parser.add_argument("--tokens", type=int, default=20, help="Tokens per answer")
+    parser.add_argument("--delay-ms", type=float, default=10.0, help="Stub delay per token")
+    args = parser.parse_args()
+    asyncio.run(main(args))
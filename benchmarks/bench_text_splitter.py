@@ -0,0 +1,113 @@
+"""Chunking throughput (MB/s) of the TextSplitter against the previous implementation.
+
+Cleaning and splitting are also timed on their own, each against the
+previous implementation of that step.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_text_splitter --mb 8
+"""
+import argparse
+import random
+import re
+import time
+
+from processing.utils import TextSplitter
+
+WORDS = (
+    "invoice order shipment warehouse error code retry timeout customer account "
+    "refund policy release version deploy server cluster node cache index query"
+).split()
+
+class LegacyTextSplitter:
+    """The previous splitter: an rfind per separator at every chunk boundary
+    and full-string regex passes for cleaning. Kept only for comparison."""
+
+    def __init__(self, chunk_size: int = 512, chunk_overlap: int = 50):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = ["\n\n", "\n", ". ", " ", ""]
+
+    def clean_text(self, text: str) -> str:
+        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = re.sub(r' +', ' ', text)
+        return text.strip()
+
+    def split_text(self, text: str):
+        chunks = []
+        start = 0
+        while start < len(text):
+            end = start + self.chunk_size
+            if end >= len(text):
+                chunks.append(text[start:])
+                break
+            split_point = end
+            for separator in self.separators:
+                last_separator = text.rfind(separator, start, end)
+                if last_separator != -1:
+                    split_point = last_separator + len(separator)
+                    break
+            chunks.append(text[start:split_point])
+            next_start = split_point - self.chunk_overlap
+            if next_start <= start or next_start < split_point - self.chunk_size:
+                next_start = split_point
+            start = next_start
+        return chunks
+
+def make_text(megabytes: float, seed: int = 0) -> str:
+    """Paragraphs of sentences with the odd run of extra whitespace."""
+    rng = random.Random(seed)
+    paragraphs = []
+    size = 0
+    while size < megabytes * 1_000_000:
+        sentences = [
+            " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 20))) + "."
+            for _ in range(rng.randint(1, 8))
+        ]
+        paragraph = (" " if rng.random() < 0.9 else "   ").join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph)
+    return "\n\n".join(paragraphs)
+
+def throughput(fn, text: str, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text) / best / 1_000_000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=8, help="Megabytes of text")
+    parser.add_argument("--repeats", type=int, default=3, help="Best of this many runs")
+    parser.add_argument("--piece-kb", type=int, default=1024, help="Piece size for the streaming splitter")
+    args = parser.parse_args()
+
+    text = make_text(args.mb)
+    legacy = LegacyTextSplitter()
+    splitter = TextSplitter()
+    piece = args.piece_kb * 1024
+
+    assert splitter.split_text(splitter.clean_text(text)) == legacy.split_text(legacy.clean_text(text))
+
+    cleaned = splitter.clean_text(text)
+    results = {
+        "legacy clean + split": throughput(lambda t: legacy.split_text(legacy.clean_text(t)), text, args.repeats),
+        "clean + split": throughput(lambda t: splitter.split_text(splitter.clean_text(t)), text, args.repeats),
+        "legacy clean only": throughput(legacy.clean_text, text, args.repeats),
+        "clean only": throughput(splitter.clean_text, text, args.repeats),
+        "legacy split only": throughput(legacy.split_text, cleaned, args.repeats),
+        "split only": throughput(splitter.split_text, cleaned, args.repeats),
+        "streaming": throughput(
+            lambda t: sum(1 for _ in splitter.split_text_stream(t[i:i + piece] for i in range(0, len(t), piece))),
+            text,
+            args.repeats
+        ),
+    }
+    for name, mb_per_second in results.items():
+        # Each step against the previous implementation of the same step
+        baseline = results.get(f"legacy {name}", results["legacy clean + split"])
+        if name.startswith("legacy"):
+            baseline = mb_per_second
+        print(f"{name:<22} {mb_per_second:8.1f} MB/s ({mb_per_second / baseline:.1f}x)")
@@ -0,0 +1,121 @@
+"""Recall and query latency of the built-in NumPy vector store against Chroma.
+
+Fills each store with the same synthetic corpus of clustered embeddings
+(MiniLM-sized by default), then measures recall@k against exact search
+and per-query latency. The flat float32 store provides the exact answers.
+
+Run from the repository root (1M chunks needs ~6 GB of disk for all stores):
+
+    python -m benchmarks.bench_vector_stores --chunks 1000000 --chroma
+    python -m benchmarks.bench_vector_stores --chunks 100000 --probes 4,16,64
+"""
+import argparse
+import shutil
+import statistics
+import tempfile
+import time
+import numpy as np
+
+from processing.vector_stores import NumpyVectorStore
+
+def corpus_blocks(chunks: int, dimension: int, clusters: int, block: int, seed: int = 0):
+    """Yield ``(start, vectors)`` blocks of a corpus drawn around random topic centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    for start in range(0, chunks, block):
+        count = min(block, chunks - start)
+        labels = rng.integers(0, clusters, count)
+        yield start, centres[labels] + 0.5 * rng.normal(size=(count, dimension)).astype(np.float32)
+
+def make_queries(count: int, dimension: int, clusters: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    labels = np.random.default_rng(seed + 1).integers(0, clusters, count)
+    return centres[labels] + 0.5 * np.random.default_rng(seed + 2).normal(size=(count, dimension)).astype(np.float32)
+
+def fill(store, args) -> float:
+    started = time.perf_counter()
+    for start, vectors in corpus_blocks(args.chunks, args.dimension, args.clusters, args.batch):
+        ids = [f"chunk_{i}" for i in range(start, start + len(vectors))]
+        store.upsert(ids, vectors, [""] * len(ids), [{"document_id": f"doc_{i // 100}"} for i in range(start, start + len(ids))])
+    return time.perf_counter() - started
+
+def measure(store, queries: np.ndarray, k: int, truth=None):
+    latencies, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        hits = store.query(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([hit["id"] for hit in hits])
+    recall = None
+    if truth is not None:
+        recall = statistics.mean(len(set(found) & set(exact)) / k for found, exact in zip(results, truth))
+    latencies.sort()
+    return results, recall, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+def report(name: str, build: float, recall, p50: float, p95: float) -> None:
+    recall_text = "exact" if recall is None else f"{recall:.3f}"
+    print(f"{name:28} build {build:7.1f}s  recall@k {recall_text:>6}  p50 {p50:8.2f}ms  p95 {p95:8.2f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000, help="Topic centres in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=10000, help="Chunks per upsert")
+    parser.add_argument("--lists", type=int, default=1024, help="IVF lists")
+    parser.add_argument("--probes", default="8,32", help="Comma-separated IVF probe counts to sweep")
+    parser.add_argument("--chroma", action="store_true", help="Also benchmark the Chroma store")
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries, args.dimension, args.clusters)
+    root = tempfile.mkdtemp(prefix="bench_vector_stores_")
+    probes = [int(p) for p in args.probes.split(",")]
+    try:
+        exact = NumpyVectorStore(f"{root}/flat32")
+        build = fill(exact, args)
+        truth, _, p50, p95 = measure(exact, queries, args.k)
+        report("numpy flat float32", build, None, p50, p95)
+        exact.close()
+
+        half = NumpyVectorStore(f"{root}/flat16", dtype="float16")
+        build = fill(half, args)
+        _, recall, p50, p95 = measure(half, queries, args.k, truth)
+        report("numpy flat float16", build, recall, p50, p95)
+        half.close()
+
+        for index in ("ivf", "ivf-pq"):
+            store = NumpyVectorStore(
+                f"{root}/{index}",
+                dtype="float16",
+                index=index,
+                ivf_lists=args.lists,
+                # Train once on the full corpus rather than while filling
+                ivf_min_rows=args.chunks + 1
+            )
+            build = fill(store, args)
+            started = time.perf_counter()
+            store.build_index()
+            build += time.perf_counter() - started
+            for probe_count in probes:
+                store.ivf_probes = probe_count
+                _, recall, p50, p95 = measure(store, queries, args.k, truth)
+                report(f"numpy {index} f16 probes={probe_count}", build, recall, p50, p95)
+            store.close()
+
+        if args.chroma:
+            try:
+                from processing.vector_stores import ChromaVectorStore
+                store = ChromaVectorStore(f"{root}/chroma")
+            except ImportError:
+                print("chroma                       skipped: chromadb is not installed")
+            else:
+                # Chroma caps the batch size it accepts per call
+                args.batch = min(args.batch, 5000)
+                build = fill(store, args)
+                _, recall, p50, p95 = measure(store, queries, args.k, truth)
+                report("chroma hnsw", build, recall, p50, p95)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
@@ -0,0 +1,91 @@
+"""Synthetic document corpus for offline benchmarks.
+
+Documents are paragraphs of words drawn from a Zipf-like vocabulary, so a
+few words are very common and most are rare, as in real text. Each
+document belongs to a topic whose words it uses more often, and mentions
+one unique reference code, which gives searches a known right answer.
+The same seed always produces the same corpus.
+
+Run from the repository root to write a corpus to disk, e.g. for uploading:
+
+    python -m benchmarks.corpus --docs 1000 --out ./corpus
+"""
+import argparse
+import itertools
+import os
+import random
+from typing import Dict, Iterator, List, Tuple
+
+COMMON = (
+    "the of and to a in is for that on with as by this be are from at or it an "
+    "was which can not have has all will more when also new one any each been"
+).split()
+DOMAIN = (
+    "invoice order shipment warehouse error code retry timeout customer account "
+    "refund policy release version deploy server cluster node cache index query "
+    "contract clause payment tenant lease audit report revenue budget forecast "
+    "incident outage latency throughput replica backup restore migration schema "
+    "employee benefit leave review salary onboarding training security access token"
+).split()
+
+def vocabulary(size: int = 5000, seed: int = 0) -> List[str]:
+    """Common words, domain words, then made-up rare words up to ``size``."""
+    rng = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    rare = {"".join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(size)}
+    words = COMMON + DOMAIN + sorted(rare - set(COMMON) - set(DOMAIN))
+    return words[:size]
+
+def reference_code(index: int) -> str:
+    """The unique code mentioned in document ``index``."""
+    return f"REF-{index:07d}"
+
+def iter_corpus(
+    docs: int,
+    words_per_doc: int = 400,
+    topics: int = 20,
+    seed: int = 0,
+    vocabulary_size: int = 5000
+) -> Iterator[Tuple[str, Dict]]:
+    """Yield ``(text, metadata)`` for ``docs`` synthetic documents."""
+    rng = random.Random(seed)
+    words = vocabulary(vocabulary_size, seed)
+    # Zipf weights over the whole vocabulary
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    topic_words = [rng.sample(DOMAIN, 8) for _ in range(topics)]
+    for index in range(docs):
+        topic = index % topics
+        body = rng.choices(words, cum_weights=cum_weights, k=words_per_doc)
+        # About one word in ten comes from the document's topic
+        for position in rng.sample(range(words_per_doc), words_per_doc // 10):
+            body[position] = rng.choice(topic_words[topic])
+        body.insert(rng.randrange(words_per_doc), reference_code(index))
+        paragraphs = [" ".join(body[start:start + 80]) + "." for start in range(0, len(body), 80)]
+        text = f"Document {index} on topic {topic}\n\n" + "\n\n".join(paragraphs)
+        yield text, {"source": "synthetic", "topic": topic, "filename": f"doc_{index:07d}.txt"}
+
+def make_queries(count: int, docs: int, seed: int = 1) -> List[Tuple[str, int]]:
+    """``(query, document index)`` pairs asking for random documents' reference codes."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        index = rng.randrange(docs)
+        queries.append((f"which document mentions {reference_code(index)}", index))
+    return queries
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1000, help="Number of documents")
+    parser.add_argument("--words", type=int, default=400, help="Words per document")
+    parser.add_argument("--topics", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="Directory to write .txt files into")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    total = 0
+    for text, metadata in iter_corpus(args.docs, args.words, args.topics, args.seed):
+        with open(os.path.join(args.out, metadata["filename"]), "w", encoding="utf-8") as f:
+            f.write(text)
+        total += len(text)
+    print(f"Wrote {args.docs} documents ({total / 1e6:.1f} MB) to {args.out}")
@@ -0,0 +1,340 @@
+"""End-to-end benchmark suite: ingestion, search latency and a chat load test, written to JSON.
+
+Runs offline against a synthetic corpus (see `benchmarks.corpus`) and a
+stub Ollama server (see `benchmarks.stub_ollama`); only the embedding
+model has to be available locally. Components are built from the same
+settings as the API, so exporting e.g. VECTOR_STORE=numpy or
+EMBEDDING_BACKEND=onnx benchmarks that configuration. STORAGE_PATH and
+OLLAMA_HOST are always replaced by a temporary directory and the stub.
+
+1. ingest: the corpus is ingested in stages up to each --sizes value
+   through `DocumentProcessor.process_documents`; reports docs/sec,
+   chunks/sec and peak RSS.
+2. search: at each size, query embedding latency and vector, keyword and
+   hybrid search latency percentiles, plus how often the document that
+   holds the query's reference code is among the results.
+3. load: the API runs under uvicorn against the stub, and /chat/ and
+   /chat/stream are driven at each --concurrency level; reports
+   throughput, latency and time-to-first-token percentiles.
+
+Run from the repository root:
+
+    python -m benchmarks.run_suite --sizes 1000,5000 --output results.json
+    python -m benchmarks.run_suite --only load --tokens-per-second 30 --baseline results.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.corpus import iter_corpus, make_queries
+from benchmarks.stub_ollama import free_port, start_stub
+
+SECTIONS = ("ingest", "search", "load")
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank percentiles and mean of millisecond timings."""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 2)
+    return {
+        "p50": rank(0.50),
+        "p90": rank(0.90),
+        "p99": rank(0.99),
+        "max": round(ordered[-1], 2),
+        "mean": round(sum(ordered) / len(ordered), 2)
+    }
+
+def peak_rss_mb() -> Dict[str, float]:
+    """Peak resident set size of this process and of its largest child (encoder or extractor workers)."""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+def environment(args) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    from api.dependencies import get_settings
+    settings = get_settings()
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "arguments": vars(args),
+        "settings": {
+            key: settings[key] for key in (
+                "EMBEDDING_BACKEND", "EMBEDDING_DTYPE", "EMBEDDING_WORKERS", "VECTOR_STORE",
+                "VECTOR_STORE_INDEX", "SEARCH_MODE", "CHUNK_UNIT", "INGEST_BATCH_SIZE", "EXECUTOR_WORKERS"
+            )
+        }
+    }
+
+async def measure_search(processor, size: int, args) -> Dict:
+    queries = make_queries(args.queries, size, seed=size)
+    result: Dict = {"docs": size, "chunks": processor.vector_store.count()}
+
+    embed_ms, embeddings = [], []
+    for query, _ in queries:
+        started = time.perf_counter()
+        embeddings.append(await processor.aembed_query(query))
+        embed_ms.append((time.perf_counter() - started) * 1000)
+    result["query_embedding_ms"] = percentiles(embed_ms)
+
+    for mode in ("vector", "keyword", "hybrid"):
+        latencies, hits = [], 0
+        for (query, index), embedding in zip(queries, embeddings):
+            started = time.perf_counter()
+            found = await processor.asearch_similar(
+                query, n_results=args.k, mode=mode, query_embedding=embedding
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            hits += any(hit["metadata"].get("filename") == f"doc_{index:07d}.txt" for hit in found)
+        result[mode] = {"latency_ms": percentiles(latencies), "hit_rate": round(hits / len(queries), 3)}
+    return result
+
+def run_ingest_and_search(args, results: Dict) -> None:
+    from api.dependencies import get_document_processor
+
+    processor = get_document_processor()
+    corpus = iter_corpus(max(args.sizes), args.words, seed=args.seed)
+    ingested = 0
+    for size in args.sizes:
+        batch = itertools.islice(corpus, size - ingested)
+        started = time.perf_counter()
+        summaries = processor.process_documents(([text], metadata, None) for text, metadata in batch)
+        elapsed = time.perf_counter() - started
+        chunks = sum(summary.get("chunk_count", 0) for summary in summaries)
+        stage = {
+            "docs": len(summaries),
+            "total_docs": size,
+            "chunks": chunks,
+            "seconds": round(elapsed, 2),
+            "docs_per_second": round(len(summaries) / elapsed, 1),
+            "chunks_per_second": round(chunks / elapsed, 1),
+            "peak_rss_mb": peak_rss_mb()
+        }
+        ingested = size
+        results.setdefault("ingest", []).append(stage)
+        print(
+            f"ingest  {size:>7} docs  {stage['docs_per_second']:8.1f} docs/s  "
+            f"{stage['chunks_per_second']:8.1f} chunks/s  peak RSS {stage['peak_rss_mb']['self']:.0f} MB"
+        )
+
+        if "search" in args.only:
+            search = asyncio.run(measure_search(processor, size, args))
+            results.setdefault("search", []).append(search)
+            print(
+                f"search  {size:>7} docs  embed p50 {search['query_embedding_ms']['p50']:6.1f}ms  " + "  ".join(
+                    f"{mode} p50 {search[mode]['latency_ms']['p50']:6.1f}ms p99 {search[mode]['latency_ms']['p99']:6.1f}ms "
+                    f"hit {search[mode]['hit_rate']:.2f}"
+                    for mode in ("vector", "keyword", "hybrid")
+                )
+            )
+
+async def drive(client, endpoint: str, concurrency: int, requests: int, label: str) -> Dict:
+    """Send ``requests`` distinct questions with ``concurrency`` clients; time each and its first token."""
+    latencies, first_tokens, errors = [], [], []
+    counter = itertools.count()
+
+    async def one(i: int) -> None:
+        # Distinct questions, so neither the answer cache nor request sharing kicks in
+        body = {"messages": [{"role": "user", "content": f"{label} question {i}: which document mentions REF-{i:07d}"}]}
+        started = time.perf_counter()
+        if endpoint == "/chat/":
+            response = await client.post(endpoint, json=body)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+                return
+        else:
+            first = None
+            async with client.stream("POST", endpoint, json=body) as response:
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+                    return
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event:"):
+                        event = line[6:].strip()
+                    elif line.startswith("data:") and event == "message" and first is None:
+                        first = time.perf_counter()
+                    elif line.startswith("data:") and event == "error":
+                        errors.append("error event")
+                        return
+            if first is not None:
+                first_tokens.append((first - started) * 1000)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    async def worker() -> None:
+        for i in counter:
+            if i >= requests:
+                return
+            try:
+                await one(i)
+            except Exception as e:
+                errors.append(type(e).__name__)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    result = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": percentiles(latencies)
+    }
+    if endpoint != "/chat/":
+        result["first_token_ms"] = percentiles(first_tokens)
+    return result
+
+async def run_load(base_url: str, args, results: Dict) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        # Warm-up runs in the background; wait until the API says it is ready
+        while (await client.get("/ready")).status_code != 200:
+            await asyncio.sleep(0.1)
+        for concurrency in args.concurrency:
+            for endpoint in ("/chat/", "/chat/stream"):
+                label = f"c{concurrency}{endpoint.replace('/', '-')}"
+                result = await drive(client, endpoint, concurrency, args.requests, label)
+                results.setdefault("load", []).append(result)
+                line = (
+                    f"load    {endpoint:12} c={concurrency:<4} {result['throughput_rps']:7.2f} req/s  "
+                    f"p50 {result['latency_ms'].get('p50', 0):8.1f}ms  p99 {result['latency_ms'].get('p99', 0):8.1f}ms"
+                )
+                if "first_token_ms" in result:
+                    line += f"  ttft p50 {result['first_token_ms'].get('p50', 0):7.1f}ms"
+                print(line + f"  errors {result['errors']}")
+
+def start_api():
+    """Serve the API on a background thread; returns (server, thread, url)."""
+    import uvicorn
+    from api.main import app
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+def flatten(results, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves keyed by path; list entries are keyed by what identifies them."""
+    flat = {}
+    if isinstance(results, dict):
+        for key, value in results.items():
+            flat.update(flatten(value, f"{prefix}{key}."))
+    elif isinstance(results, list):
+        for item in results:
+            if isinstance(item, dict):
+                name = "/".join(str(item[key]) for key in ("total_docs", "docs", "endpoint", "concurrency") if key in item)
+                flat.update(flatten(item, f"{prefix}{name}."))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix.rstrip(".")] = results
+    return flat
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> None:
+    """Print metrics that moved by more than ``threshold`` (a fraction) since the baseline."""
+    before = flatten({section: baseline.get(section) for section in SECTIONS if section in baseline})
+    after = flatten({section: current.get(section) for section in SECTIONS if section in current})
+    print(f"\nChanges beyond {threshold:.0%} against baseline {baseline.get('environment', {}).get('commit')}:")
+    changed = 0
+    for key in sorted(before.keys() & after.keys()):
+        # Run parameters rather than measurements
+        if key.rsplit(".", 1)[-1] in ("docs", "total_docs", "requests", "concurrency"):
+            continue
+        old, new = before[key], after[key]
+        if old and abs(new - old) / abs(old) > threshold:
+            changed += 1
+            print(f"  {key:70} {old:>10} -> {new:>10} ({(new - old) / abs(old):+.0%})")
+    if not changed:
+        print("  none")
+
+def main(args) -> Dict:
+    storage = tempfile.mkdtemp(prefix="bench_suite_")
+    stub = None
+    os.environ["STORAGE_PATH"] = storage
+    if "load" in args.only:
+        stub, stub_url = start_stub("stub", args.answer_tokens, 1000 / args.tokens_per_second)
+        os.environ["OLLAMA_HOST"] = stub_url
+        os.environ.pop("OLLAMA_HOSTS", None)
+
+    results: Dict = {"environment": environment(args)}
+    try:
+        if "ingest" in args.only or "search" in args.only:
+            run_ingest_and_search(args, results)
+        if "load" in args.only:
+            if "ingest" not in args.only and "search" not in args.only:
+                # Give the chat requests something to retrieve
+                from api.dependencies import get_document_processor
+                get_document_processor().process_documents(
+                    ([text], metadata, None) for text, metadata in iter_corpus(min(args.sizes), args.words, seed=args.seed)
+                )
+            server, thread, url = start_api()
+            try:
+                asyncio.run(run_load(url, args, results))
+            finally:
+                # Let the lifespan close the processor before its storage is removed
+                server.should_exit = True
+                thread.join(timeout=60)
+    finally:
+        if stub is not None:
+            stub.should_exit = True
+        shutil.rmtree(storage, ignore_errors=True)
+    return results
+
+def integer_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS), help="Sections to run")
+    parser.add_argument("--sizes", type=integer_list, default=[1000, 5000], help="Corpus sizes in documents, comma-separated")
+    parser.add_argument("--words", type=int, default=400, help="Words per document")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=200, help="Search queries per corpus size")
+    parser.add_argument("--k", type=int, default=3, help="Results per search")
+    parser.add_argument("--concurrency", type=integer_list, default=[1, 8, 32], help="Load test client counts")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint and concurrency level")
+    parser.add_argument("--answer-tokens", type=int, default=100, help="Tokens per stub answer")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="Stub generation speed")
+    parser.add_argument("--output", default="benchmark-results.json", help="JSON file to write")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change worth reporting")
+    args = parser.parse_args()
+    args.sizes = sorted(args.sizes)
+
+    results = main(args)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nWrote {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results, args.threshold)
@@ -0,0 +1,99 @@
+"""Minimal stand-in for an Ollama server, for exercising routing without models.
+
+Implements /api/version, /api/tags, /api/chat and /api/generate. Answers
+are canned words emitted with a fixed per-token delay and name the stub
+that produced them. Final responses carry Ollama's token counters
+(``prompt_eval_count``, ``eval_count``, ``eval_duration``).
+
+Run from the repository root:
+
+    python -m benchmarks.stub_ollama --port 11435 --name a --delay-ms 20
+    python -m benchmarks.stub_ollama --tokens 200 --tokens-per-second 40
+"""
+import argparse
+import asyncio
+import json
+import socket
+import threading
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+def create_app(name: str = "stub", tokens: int = 20, delay_ms: float = 20.0) -> FastAPI:
+    app = FastAPI(title=f"stub-ollama-{name}")
+    app.state.requests = 0
+
+    def words():
+        return [f"{name}-{i} " for i in range(tokens)]
+
+    def counters(body: dict) -> dict:
+        prompt = body.get("prompt") or " ".join(m.get("content", "") for m in body.get("messages", []))
+        return {
+            "prompt_eval_count": len(prompt.split()),
+            "eval_count": tokens,
+            "eval_duration": int(delay_ms * tokens * 1e6)
+        }
+
+    async def generate(body: dict, key: str):
+        app.state.requests += 1
+        if not body.get("stream", True):
+            await asyncio.sleep(delay_ms * tokens / 1000)
+            text = "".join(words())
+            message = {"role": "assistant", "content": text}
+            return {"model": body.get("model"), key: message if key == "message" else text, "done": True, **counters(body)}
+
+        async def lines():
+            for word in words():
+                await asyncio.sleep(delay_ms / 1000)
+                piece = {"role": "assistant", "content": word} if key == "message" else word
+                yield json.dumps({"model": body.get("model"), key: piece, "done": False}) + "\n"
+            yield json.dumps({"model": body.get("model"), "done": True, **counters(body)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": f"stub-{name}"}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": "stub"}]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        return await generate(await request.json(), "message")
+
+    @app.post("/api/generate")
+    async def generate_endpoint(request: Request):
+        return await generate(await request.json(), "response")
+
+    return app
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_stub(name: str, tokens: int, delay_ms: float):
+    """Run a stub server on a background thread; returns (server, url)."""
+    port = free_port()
+    config = uvicorn.Config(create_app(name, tokens, delay_ms), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind")
+    parser.add_argument("--port", type=int, default=11435, help="Port to listen on")
+    parser.add_argument("--name", default="stub", help="Name included in answers")
+    parser.add_argument("--tokens", type=int, default=20, help="Tokens per answer")
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Delay per token")
+    parser.add_argument("--tokens-per-second", type=float, help="Generation speed; overrides --delay-ms")
+    args = parser.parse_args()
+    delay_ms = 1000 / args.tokens_per_second if args.tokens_per_second else args.delay_ms
+    uvicorn.run(create_app(args.name, args.tokens, delay_ms), host=args.host, port=args.port, log_level="warning")
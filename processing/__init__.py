@@ -1,4 +1,38 @@
 from .document_processor import DocumentProcessor
 from .chat_engine import ChatEngine
+from .jobs import IngestionJobManager
+from .manifest import DocumentManifest
+from .keyword_index import KeywordIndex
+from .vector_stores import VectorStore, ChromaVectorStore, NumpyVectorStore, create_vector_store
+from .answer_cache import AnswerCache
+from .sessions import ChatSession, SessionStore
+from .llm_router import LLMRouter, AllBackendsFailedError
+from .tenants import TenantRegistry, TenantLimiter, TenantLimitError, InvalidTenantError, validate_tenant_id
+from .utils.executor import BlockingExecutor, ExecutorBusyError
+from .utils.extractors import DocumentExtractor, ExtractionError
 
-__all__ = ['DocumentProcessor', 'ChatEngine']
\ No newline at end of file
+__all__ = [
+    'DocumentProcessor',
+    'ChatEngine',
+    'IngestionJobManager',
+    'DocumentManifest',
+    'KeywordIndex',
+    'VectorStore',
+    'ChromaVectorStore',
+    'NumpyVectorStore',
+    'create_vector_store',
+    'AnswerCache',
+    'ChatSession',
+    'SessionStore',
+    'LLMRouter',
+    'AllBackendsFailedError',
+    'TenantRegistry',
+    'TenantLimiter',
+    'TenantLimitError',
+    'InvalidTenantError',
+    'validate_tenant_id',
+    'BlockingExecutor',
+    'ExecutorBusyError',
+    'DocumentExtractor',
+    'ExtractionError'
+]
\ No newline at end of file
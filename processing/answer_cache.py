@@ -0,0 +1,161 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import time
+import numpy as np
+
+class AnswerCache:
+    """Semantic cache of generated answers.
+
+    An entry is reused when a new question's embedding is within
+    ``similarity_threshold`` (cosine) of a cached question and the question
+    was answered from exactly the same context chunks and chat history.
+    Entries expire after ``ttl_seconds``, the least recently used entry is
+    evicted beyond ``max_entries``, and entries are dropped when one of the
+    documents they were answered from changes. Entries belong to the tenant
+    they were cached for, which is None for the default collection, and
+    are only matched and invalidated within it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        similarity_threshold: float = 0.95
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        # Entries can only match within the same tenant, context and history
+        self._buckets: Dict[Tuple[Optional[str], str, str], Set[int]] = {}
+        self._by_document: Dict[Tuple[Optional[str], str], Set[int]] = {}
+        self._next_key = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidated = 0
+
+    @staticmethod
+    def context_fingerprint(context: List[Dict]) -> str:
+        """Fingerprint of the retrieved chunks; order does not matter."""
+        ids = sorted(chunk['id'] for chunk in context)
+        return hashlib.sha256("\0".join(ids).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def history_fingerprint(chat_history: Optional[List[Dict]]) -> str:
+        return hashlib.sha256(
+            json.dumps(chat_history or [], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get(
+        self,
+        query_embedding: np.ndarray,
+        context: List[Dict],
+        chat_history: Optional[List[Dict]] = None,
+        tenant_id: Optional[str] = None
+    ) -> Optional[str]:
+        """Return a cached answer for a similar question, or None."""
+        bucket_key = (tenant_id, self.context_fingerprint(context), self.history_fingerprint(chat_history))
+        vector = self._normalize(query_embedding)
+        now = time.monotonic()
+
+        with self._lock:
+            best_key, best_similarity = None, self.similarity_threshold
+            for key in list(self._buckets.get(bucket_key, ())):
+                entry = self._entries[key]
+                if now - entry["created_at"] > self.ttl_seconds:
+                    self._remove(key)
+                    continue
+                similarity = float(entry["embedding"] @ vector)
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+
+            if best_key is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key]["answer"]
+
+    def put(
+        self,
+        query_embedding: np.ndarray,
+        context: List[Dict],
+        answer: str,
+        chat_history: Optional[List[Dict]] = None,
+        tenant_id: Optional[str] = None
+    ) -> None:
+        """Cache the answer generated for a question and its context."""
+        bucket_key = (tenant_id, self.context_fingerprint(context), self.history_fingerprint(chat_history))
+        documents = {
+            (tenant_id, chunk['metadata']['document_id'])
+            for chunk in context
+            if chunk.get('metadata') and 'document_id' in chunk['metadata']
+        }
+
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = {
+                "embedding": self._normalize(query_embedding),
+                "answer": answer,
+                "bucket": bucket_key,
+                "documents": documents,
+                "created_at": time.monotonic()
+            }
+            self._buckets.setdefault(bucket_key, set()).add(key)
+            for document in documents:
+                self._by_document.setdefault(document, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_documents(self, document_ids: Iterable[str], tenant_id: Optional[str] = None) -> int:
+        """Drop every entry answered from any of a tenant's documents; returns the count."""
+        with self._lock:
+            keys = set()
+            for document_id in document_ids:
+                keys.update(self._by_document.get((tenant_id, document_id), ()))
+            for key in keys:
+                self._remove(key)
+            self._invalidated += len(keys)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._by_document.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidated": self._invalidated
+            }
+
+    def _remove(self, key: int) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        bucket = self._buckets.get(entry["bucket"])
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._buckets[entry["bucket"]]
+        for document in entry["documents"]:
+            keys = self._by_document.get(document)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_document[document]
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
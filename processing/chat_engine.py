@@ -1,77 +1,310 @@
-from typing import List, Dict, Optional, Union, AsyncGenerator
+from typing import List, Dict, Optional, Tuple, Union, AsyncGenerator
+import contextlib
 import json
+import time
 import httpx
+import numpy as np
 from datetime import datetime
 
+from .answer_cache import AnswerCache
+from .llm_router import LLMRouter
+from .sessions import ChatSession
+from .utils.tokens import TokenCounter
+from .utils.singleflight import SingleFlight
+from .utils.metrics import metrics, stage_seconds
+
+_tokens_per_second = metrics.histogram(
+    "intellidoc_llm_tokens_per_second",
+    "Generation speed reported by Ollama (eval_count / eval_duration)",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 40, 60, 80, 120, 200)
+)
+_llm_tokens = metrics.counter(
+    "intellidoc_llm_tokens_total", "Tokens evaluated by Ollama, by prompt or completion", labels=("kind",)
+)
+
+def _record_generation(data: Dict) -> None:
+    """Record Ollama's token counts from a final (``done``) response."""
+    if not metrics.enabled:
+        return
+    if data.get("prompt_eval_count"):
+        _llm_tokens.inc(data["prompt_eval_count"], "prompt")
+    if data.get("eval_count"):
+        _llm_tokens.inc(data["eval_count"], "completion")
+        # eval_duration is in nanoseconds
+        if data.get("eval_duration"):
+            _tokens_per_second.observe(data["eval_count"] / (data["eval_duration"] / 1e9))
+
 class ChatEngine:
     def __init__(
         self,
         model_name: str = "mistral",
         ollama_base_url: str = "http://localhost:11434",
-        context_window: int = 4096
+        context_window: int = 4096,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 120.0,
+        max_concurrent_generations: int = 8,
+        answer_cache: Optional[AnswerCache] = None,
+        answer_token_reserve: int = 512,
+        token_margin: float = 0.1,
+        keep_alive: str = "30m",
+        ollama_urls: Optional[List[str]] = None,
+        health_interval: float = 10.0
     ):
         self.model_name = model_name
         self.ollama_base_url = ollama_base_url.rstrip('/')
+        # Backends to balance across; a single-element pool by default
+        self.ollama_urls = [url.rstrip('/') for url in ollama_urls or [self.ollama_base_url]]
+        self.health_interval = health_interval
         self.context_window = context_window
+        # Tokens kept free for the answer, and the fraction of the window held
+        # back because counts come from a different tokenizer than the model's
+        self.answer_token_reserve = answer_token_reserve
+        self.token_margin = token_margin
+        self.token_counter = TokenCounter()
+        # How long Ollama keeps the model, and its evaluated prompt prefix, loaded
+        self.keep_alive = keep_alive
         self.system_prompt = """You are a helpful assistant answering questions based on the provided context.
 Please be concise and accurate. If the context doesn't contain relevant information, say so."""
+        
+        # Connection pool settings for the shared Ollama client
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=connect_timeout,
+            pool=read_timeout
+        )
+        # Concurrent generations allowed on each backend
+        self.max_concurrent_generations = max_concurrent_generations
+        self.answer_cache = answer_cache
+        self._router: Optional[LLMRouter] = None
+        # Identical concurrent generations share one Ollama request
+        self.flights = SingleFlight()
+    
+    async def start(self) -> None:
+        """Open the pooled HTTP clients used for all Ollama requests."""
+        if self._router is None:
+            router = LLMRouter(
+                self.ollama_urls,
+                limits=self.limits,
+                timeout=self.timeout,
+                max_concurrent_per_backend=self.max_concurrent_generations,
+                health_interval=self.health_interval
+            )
+            await router.start()
+            self._router = router
+    
+    async def close(self) -> None:
+        """Close the HTTP clients and release pooled connections."""
+        if self._router is not None:
+            await self._router.close()
+            self._router = None
+    
+    @property
+    def router(self) -> LLMRouter:
+        if self._router is None:
+            raise RuntimeError("ChatEngine is not started; call `await start()` first")
+        return self._router
     
     async def generate_response(
         self,
         question: str,
         context: List[Dict],
         chat_history: Optional[List[Dict]] = None,
-        stream: bool = False
+        stream: bool = False,
+        query_embedding: Optional[np.ndarray] = None,
+        session: Optional[ChatSession] = None,
+        tenant_id: Optional[str] = None
     ) -> Union[str, AsyncGenerator[str, None]]:
-        # Prepare context string
-        context_str = "\n\n".join([
-            f"[Content {i+1}]: {item['content']}"
-            for i, item in enumerate(context)
-        ])
+        """Generate an answer from Ollama, or an async generator of its pieces when streaming.
         
-        # Prepare chat history
-        history_str = ""
-        if chat_history:
-            history_str = "\n".join([
-                f"User: {msg['user']}\nAssistant: {msg['assistant']}"
-                for msg in chat_history[-3:]  # Include last 3 exchanges
-            ])
-        
-        # Construct the prompt
-        prompt = f"{self.system_prompt}\n\nContext:\n{context_str}\n"
-        if history_str:
-            prompt += f"\nPrevious conversation:\n{history_str}\n"
-        prompt += f"\nUser: {question}\nAssistant: "
-        
-        # Prepare the request
-        url = f"{self.ollama_base_url}/api/generate"
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": stream,
-            "options": {
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "num_ctx": self.context_window
-            }
-        }
+        When ``query_embedding`` is given and an answer cache is configured,
+        an answer cached for a similar question with the same context and
+        history is returned (or replayed as a single stream piece) instead.
+        Answers are only cached and shared within ``tenant_id``.
+        
+        With a ``session``, ``chat_history`` is ignored: the prompt is built
+        from the session's pinned context and messages, and the turn is
+        recorded in the session once answered.
         
-        async with httpx.AsyncClient() as client:
+        Without a session, concurrent requests with the same question,
+        context chunks and history share one streamed generation that is
+        fanned out to every caller, whether or not they asked to stream.
+        """
+        if session is not None:
+            pieces = self._generate(question, context, chat_history, stream, query_embedding, session, tenant_id)
+        else:
+            key = (
+                tenant_id,
+                " ".join(question.split()),
+                AnswerCache.context_fingerprint(context),
+                AnswerCache.history_fingerprint(chat_history)
+            )
+            pieces = self.flights.stream(
+                key,
+                lambda: self._generate(question, context, chat_history, True, query_embedding, None, tenant_id)
+            )
+        if stream:
+            return pieces
+        return "".join([piece async for piece in pieces])
+    
+    async def _generate(
+        self,
+        question: str,
+        context: List[Dict],
+        chat_history: Optional[List[Dict]],
+        stream: bool,
+        query_embedding: Optional[np.ndarray],
+        session: Optional[ChatSession],
+        tenant_id: Optional[str]
+    ) -> AsyncGenerator[str, None]:
+        router = self.router
+        cache = self.answer_cache if query_embedding is not None else None
+        
+        async with session.lock if session is not None else contextlib.nullcontext():
+            history_key = list(session.messages) if session is not None else chat_history
+            if cache is not None:
+                cached = cache.get(query_embedding, context, history_key, tenant_id)
+                if cached is not None:
+                    if session is not None:
+                        # Pin the first turn's context and record the turn as a generated answer would
+                        _, user_content = self._session_messages(session, question, context)
+                        self._record_turn(session, user_content, cached)
+                    yield cached
+                    return
+            
+            with stage_seconds.time("prompt_build"):
+                if session is not None:
+                    messages, user_content = self._session_messages(session, question, context)
+                else:
+                    messages, user_content = self._messages(question, context, chat_history), question
+            
+            # Prepare the request
+            payload = {
+                "model": self.model_name,
+                "messages": messages,
+                "stream": stream,
+                "keep_alive": self.keep_alive,
+                "options": {
+                    "temperature": 0.7,
+                    "top_p": 0.9,
+                    "num_ctx": self.context_window
+                }
+            }
+            
+            pieces = []
+            started = time.perf_counter()
             if not stream:
-                response = await client.post(url, json=payload)
-                response_data = response.json()
-                return response_data["response"]
+                response = await router.post("/api/chat", json=payload)
+                response.raise_for_status()
+                data = response.json()
+                _record_generation(data)
+                pieces.append(data["message"]["content"])
+                yield pieces[0]
             else:
-                async def stream_response():
-                    async with client.stream("POST", url, json=payload) as response:
-                        async for line in response.aiter_lines():
-                            if line:
-                                try:
-                                    data = json.loads(line)
-                                    yield data.get("response", "")
-                                except json.JSONDecodeError:
-                                    continue
-                return stream_response()
+                # The stream stays on one backend and holds its slot until done
+                async with router.stream("POST", "/api/chat", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line:
+                            try:
+                                data = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+                            if data.get("done"):
+                                _record_generation(data)
+                            piece = data.get("message", {}).get("content", "")
+                            if piece and not any(pieces):
+                                stage_seconds.observe(time.perf_counter() - started, "llm_first_token")
+                            pieces.append(piece)
+                            yield piece
+            stage_seconds.observe(time.perf_counter() - started, "llm_generation")
+            
+            # Only complete answers are recorded and cached
+            answer = "".join(pieces)
+            if session is not None:
+                self._record_turn(session, user_content, answer)
+            if cache is not None:
+                cache.put(query_embedding, context, answer, history_key, tenant_id)
+    
+    def _format_context(self, context: List[Dict], start: int = 1) -> str:
+        return "\n\n".join([
+            f"[Content {i}]: {item['content']}"
+            for i, item in enumerate(context, start)
+        ])
+    
+    def _messages(
+        self,
+        question: str,
+        context: List[Dict],
+        chat_history: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """Chat messages for a one-off request: system prompt with context, history, question."""
+        messages = [{
+            "role": "system",
+            "content": f"{self.system_prompt}\n\nContext:\n{self._format_context(context)}"
+        }]
+        for exchange in (chat_history or [])[-3:]:  # Include last 3 exchanges
+            messages.append({"role": "user", "content": exchange['user']})
+            messages.append({"role": "assistant", "content": exchange['assistant']})
+        messages.append({"role": "user", "content": question})
+        return messages
+    
+    def _session_messages(
+        self,
+        session: ChatSession,
+        question: str,
+        context: List[Dict]
+    ) -> Tuple[List[Dict], str]:
+        """Chat messages for the next turn of a session, and the new user message.
+        
+        The first turn pins its context into the system message. Later turns
+        keep that prefix untouched and send retrieved chunks that are not
+        pinned yet along with the question. The oldest turns are dropped
+        only when the conversation no longer fits the context window.
+        """
+        if not session.turns:
+            # Pin into half the budget so later turns have room for the conversation
+            session.pinned_context = self.prepare_context(context, max(self._prompt_budget(question) // 2, 0))
+            new_context = []
+        else:
+            budget = self._prompt_budget(question)
+            budget -= sum(self._chunk_tokens(chunk) for chunk in session.pinned_context)
+            while session.messages and sum(session.message_tokens) > budget:
+                session.drop_oldest_turn()
+            pinned_ids = session.pinned_ids
+            new_context = self.prepare_context(
+                [chunk for chunk in context if chunk['id'] not in pinned_ids],
+                max(budget - sum(session.message_tokens), 0)
+            )
+        
+        user_content = question
+        if new_context:
+            start = len(session.pinned_context) + 1
+            user_content = f"Additional context:\n{self._format_context(new_context, start)}\n\nQuestion: {question}"
+        
+        messages = [{
+            "role": "system",
+            "content": f"{self.system_prompt}\n\nContext:\n{self._format_context(session.pinned_context)}"
+        }]
+        messages.extend(session.messages)
+        messages.append({"role": "user", "content": user_content})
+        return messages, user_content
+    
+    def _record_turn(self, session: ChatSession, user_content: str, answer: str) -> None:
+        session.append_turn(
+            user_content,
+            answer,
+            self.token_counter.count(user_content) + 4,
+            self.token_counter.count(answer) + 4
+        )
     
     def prepare_context(
         self,
@@ -79,23 +312,77 @@ Please be concise and accurate. If the context doesn't contain relevant informat
         max_tokens: int = 2048
     ) -> List[Dict]:
         """Prepare context by selecting most relevant chunks within token limit."""
-        # Sort chunks by relevance (distance)
-        sorted_chunks = sorted(context_chunks, key=lambda x: x['distance'])
+        # Sort chunks by relevance: fusion score for hybrid results, else distance
+        sorted_chunks = sorted(
+            context_chunks,
+            key=lambda x: -x['fusion_score'] if 'fusion_score' in x else x['distance']
+        )
         
         selected_chunks = []
-        total_length = 0
-        avg_tokens_per_char = 0.25  # Rough estimate
+        total_tokens = 0
         
         for chunk in sorted_chunks:
-            chunk_length = len(chunk['content']) * avg_tokens_per_char
-            if total_length + chunk_length > max_tokens:
-                break
+            chunk_tokens = self._chunk_tokens(chunk)
+            # Skip chunks that do not fit; a less relevant, shorter one may
+            if total_tokens + chunk_tokens > max_tokens:
+                continue
             
             selected_chunks.append(chunk)
-            total_length += chunk_length
+            total_tokens += chunk_tokens
         
         return selected_chunks
     
+    def _chunk_tokens(self, chunk: Dict) -> int:
+        """Prompt tokens for a context chunk, using the count stored at ingest time."""
+        tokens = (chunk.get('metadata') or {}).get('token_count')
+        if tokens is None:
+            tokens = self.token_counter.count(chunk['content'])
+        return tokens + 8  # "[Content n]: " label and separator
+    
+    def _prompt_budget(self, question: str) -> int:
+        """Tokens left for context and history after the fixed parts of the prompt."""
+        budget = int(self.context_window * (1 - self.token_margin)) - self.answer_token_reserve
+        return budget - self.token_counter.count(self.system_prompt) - self.token_counter.count(question) - 32
+    
+    def pack_prompt(
+        self,
+        question: str,
+        context: List[Dict],
+        chat_history: Optional[List[Dict]] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Fit context chunks and chat history into the model's context window.
+        
+        After reserving room for the system prompt, the question and the
+        answer, context chunks are packed by relevance and then as many of
+        the most recent history exchanges as still fit.
+        """
+        with stage_seconds.time("prompt_packing"):
+            return self._pack_prompt(question, context, chat_history)
+    
+    def _pack_prompt(
+        self,
+        question: str,
+        context: List[Dict],
+        chat_history: Optional[List[Dict]]
+    ) -> Tuple[List[Dict], List[Dict]]:
+        budget = self._prompt_budget(question)
+        packed_context = self.prepare_context(context, max(budget, 0))
+        budget -= sum(self._chunk_tokens(chunk) for chunk in packed_context)
+        
+        packed_history: List[Dict] = []
+        for exchange in reversed((chat_history or [])[-3:]):
+            exchange_tokens = (
+                self.token_counter.count(exchange['user'])
+                + self.token_counter.count(exchange['assistant'])
+                + 8
+            )
+            if exchange_tokens > budget:
+                break
+            packed_history.insert(0, exchange)
+            budget -= exchange_tokens
+        
+        return packed_context, packed_history
+    
     def format_chat_history(
         self,
         messages: List[Dict],
@@ -1,36 +1,197 @@
 import os
-from typing import List, Dict, Optional
+import asyncio
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Dict, Optional, Tuple, Type, Union
 import json
+import hashlib
+import itertools
+import time
+import uuid
+from contextlib import contextmanager
+import numpy as np
 from datetime import datetime
-import chromadb
-from chromadb.config import Settings
 
+from .manifest import DocumentManifest
+from .keyword_index import KeywordIndex
+from .vector_stores import VectorStore, create_vector_store
 from .utils.text_splitter import TextSplitter
 from .utils.embeddings import EmbeddingsManager
+from .utils.executor import BlockingExecutor
+from .utils.extractors import DocumentExtractor, Page
+from .utils.batcher import EmbeddingBatcher
+from .utils.tokens import TokenCounter
+from .utils.singleflight import SingleFlight
+from .utils.metrics import metrics, stage_seconds
+
+_ingested_chunks = metrics.counter(
+    "intellidoc_ingested_chunks_total", "Chunks written during ingestion, by whether they were new", labels=("kind",)
+)
+
+def _flatten_metadata(metadata: Dict) -> Dict[str, Any]:
+    """Convert metadata values into types ChromaDB can store."""
+    flat = {}
+    for key, value in metadata.items():
+        if value is None:
+            continue
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, (list, tuple)):
+            value = ",".join(str(item) for item in value)
+        elif isinstance(value, dict):
+            value = json.dumps(value, default=str)
+        flat[key] = value
+    return flat
+
+# Marks, in the records read by `_ingest`, that the current document failed
+# part-way and its chunks must be dropped
+_DISCARD = object()
+
+def new_document_id() -> str:
+    """Generate a document id for uploads that do not name one."""
+    # Bulk ingestion creates many documents per millisecond, so add a
+    # random suffix to keep generated ids unique
+    return f"doc_{datetime.utcnow().timestamp()}_{uuid.uuid4().hex[:8]}"
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings of a query match."""
+    return " ".join(query.split())
+
+def _reciprocal_rank_fusion(result_lists: List[List[Dict]], n_results: int, k: int = 60) -> List[Dict]:
+    """Merge ranked result lists by reciprocal rank fusion, best first."""
+    scores: Dict[str, float] = {}
+    results: Dict[str, Dict] = {}
+    for result_list in result_lists:
+        for rank, result in enumerate(result_list):
+            scores[result['id']] = scores.get(result['id'], 0.0) + 1.0 / (k + rank + 1)
+            results.setdefault(result['id'], result)
+    ranked = sorted(scores, key=scores.get, reverse=True)[:n_results]
+    return [{**results[chunk_id], 'fusion_score': scores[chunk_id]} for chunk_id in ranked]
 
 class DocumentProcessor:
+    SEARCH_MODES = ("vector", "keyword", "hybrid")
+    
     def __init__(
         self,
         storage_path: str = "./storage",
-        collection_name: str = "documents"
+        collection_name: str = "documents",
+        executor: Optional[BlockingExecutor] = None,
+        ingest_executor: Optional[BlockingExecutor] = None,
+        query_batch_size: int = 32,
+        query_batch_wait_ms: float = 5.0,
+        embedding_cache_size: int = 10000,
+        embedding_disk_cache_size: int = 500000,
+        ingest_batch_size: int = 64,
+        embedding_workers: int = 0,
+        embedding_backend: str = "torch",
+        embedding_dtype: str = "float32",
+        search_mode: str = "vector",
+        chunk_unit: str = "chars",
+        extractor: Optional[DocumentExtractor] = None,
+        vector_store: str = "chroma",
+        vector_store_options: Optional[Dict] = None,
+        embeddings: Optional[EmbeddingsManager] = None,
+        query_batcher: Optional[EmbeddingBatcher] = None
     ):
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{search_mode}'; choose from {list(self.SEARCH_MODES)}")
         self.storage_path = storage_path
-        self.chroma_path = os.path.join(storage_path, "chroma")
-        os.makedirs(self.chroma_path, exist_ok=True)
+        self.search_mode = search_mode
+        self.ingest_batch_size = ingest_batch_size
+        # Seconds spent in each startup phase, reported when the API starts
+        self.startup_timings: Dict[str, float] = {}
         
         # Initialize components
-        self.text_splitter = TextSplitter()
-        self.embeddings = EmbeddingsManager()
+        self.token_counter = TokenCounter()
+        # Tenants' processors share one model, embedding cache and encoder pool;
+        # whoever created the manager closes it
+        self._owns_embeddings = embeddings is None
+        if embeddings is not None:
+            self.embeddings = embeddings
+        else:
+            with self._timed("embedding_model"):
+                self.embeddings = EmbeddingsManager(
+                    cache_dir=os.path.join(storage_path, "embedding_cache"),
+                    cache_size=embedding_cache_size,
+                    disk_cache_size=embedding_disk_cache_size,
+                    num_workers=embedding_workers,
+                    backend=embedding_backend,
+                    backend_options={"onnx_dir": os.path.join(storage_path, "onnx")},
+                    dtype=embedding_dtype
+                )
+        if chunk_unit == "tokens":
+            # Size chunks to what the embedding model sees, less [CLS] and [SEP]
+            backend = self.embeddings.backend
+            self.text_splitter = TextSplitter(
+                chunk_size=backend.max_seq_length - 2,
+                chunk_overlap=16,
+                tokenizer=backend.tokenizer
+            )
+        elif chunk_unit == "chars":
+            self.text_splitter = TextSplitter()
+        else:
+            raise ValueError(f"Unknown chunk unit '{chunk_unit}'; choose from ['chars', 'tokens']")
+        self.executor = executor or BlockingExecutor()
+        # Ingestion holds a worker for a whole file or batch, so it gets its own
+        # pool; a burst of uploads cannot starve query embedding and search
+        self.ingest_executor = ingest_executor or BlockingExecutor(
+            max_workers=2, max_queue=16, thread_name_prefix="ingest"
+        )
+        # Parses uploads into text ahead of the splitter
+        self.extractor = extractor or DocumentExtractor()
+        # Identical concurrent queries share one embedding and one search
+        self._flights = SingleFlight()
+        self.query_batcher = query_batcher or EmbeddingBatcher(
+            self.embeddings.get_embeddings,
+            self.executor,
+            max_batch_size=query_batch_size,
+            max_wait_ms=query_batch_wait_ms
+        )
         
-        # Initialize ChromaDB
-        self.chroma_client = chromadb.PersistentClient(path=self.chroma_path)
-        try:
-            self.collection = self.chroma_client.get_collection(collection_name)
-        except ValueError:
-            self.collection = self.chroma_client.create_collection(
-                name=collection_name,
-                metadata={"hnsw:space": "cosine"}
+        with self._timed("metadata_databases"):
+            self.manifest = DocumentManifest(os.path.join(storage_path, "manifest.sqlite"))
+            self.keyword_index = KeywordIndex(os.path.join(storage_path, "keywords.sqlite"))
+        # Called with a document id after the document is stored, replaced or deleted
+        self._change_listeners: List[Callable[[str], None]] = []
+        
+        # Chroma keeps its data under "chroma", the built-in store under "vectors"
+        store_options = dict(vector_store_options or {})
+        if vector_store == "chroma":
+            store_options.setdefault("collection_name", collection_name)
+        with self._timed("vector_store"):
+            self.vector_store: VectorStore = create_vector_store(
+                vector_store,
+                os.path.join(storage_path, "chroma" if vector_store == "chroma" else "vectors"),
+                **store_options
             )
+        
+        # Stores populated before the keyword index existed are indexed once
+        if self.keyword_index.count() == 0 and self.vector_store.count() > 0:
+            with self._timed("keyword_index_rebuild"):
+                self.rebuild_keyword_index()
+    
+    @contextmanager
+    def _timed(self, phase: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.startup_timings[phase] = time.perf_counter() - started
+    
+    def warm_up(self) -> Dict[str, float]:
+        """Pay the first-call costs of the model and the vector store ahead of traffic.
+        
+        Runs one encode straight through the backend, so nothing lands in the
+        embedding cache, starts the encoder worker processes if there are
+        any, and touches the stored vectors. Returns the seconds spent in
+        each startup phase so far.
+        """
+        with self._timed("first_encode"):
+            self.embeddings.backend.encode(["warm-up"])
+        if self.embeddings.pool is not None:
+            with self._timed("encoder_pool"):
+                self.embeddings.pool.warm_up()
+        with self._timed("vector_store_open"):
+            self.vector_store.count()
+        return dict(self.startup_timings)
     
     def process_document(
         self,
@@ -39,83 +200,552 @@ class DocumentProcessor:
         document_id: Optional[str] = None
     ) -> str:
         """Process a document and store its chunks in the vector store."""
-        # Clean and split the text
-        cleaned_text = self.text_splitter.clean_text(content)
-        chunks = self.text_splitter.split_text(cleaned_text)
+        return self.process_stream([content], metadata, document_id)["document_id"]
+    
+    def process_file(
+        self,
+        file: BinaryIO,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None,
+        path: Optional[str] = None
+    ) -> Dict:
+        """Extract the text of an uploaded file by its format and process it as a stream.
+        
+        ``path`` is where the server itself stored ``file``, if it did; see
+        `DocumentExtractor.extract`.
+        """
+        return self.process_stream(self.extractor.extract(file, filename, path), metadata, document_id, progress)
+    
+    def process_stream(
+        self,
+        pieces: Iterable[Union[str, Page]],
+        metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict:
+        """Process a document arriving as text pieces with bounded memory.
+        
+        Chunks are embedded and written to the vector store in batches of
+        ``ingest_batch_size``, so only one batch is held in memory at a time.
+        Chunk ids are derived from chunk content, so re-processing an existing
+        ``document_id`` only embeds new or changed chunks and deletes chunks
+        that disappeared. ``progress`` is called with the number of chunks
+        processed after every batch.
+        
+        ``pieces`` may instead be ``(page, text)`` pairs, as extracted from
+        PDFs. Each page is then split on its own and its chunks carry the
+        page number in their ``page`` metadata.
+        
+        Returns a summary with ``document_id``, ``chunk_count``, ``added``,
+        ``unchanged`` and ``removed``.
+        """
+        summary: Dict = {}
+        self._ingest(self._document_records(pieces, metadata, document_id, summary), progress)
+        return summary
+    
+    def process_documents(
+        self,
+        documents: Iterable[Tuple[Iterable[Union[str, Page]], Optional[Dict], Optional[str]]],
+        progress: Optional[Callable[[int], None]] = None,
+        skip_errors: Tuple[Type[Exception], ...] = ()
+    ) -> List[Dict]:
+        """Process many documents, pooling their chunks into shared batches.
+        
+        ``documents`` yields ``(pieces, metadata, document_id)`` tuples and is
+        consumed lazily, one document at a time. Chunks from consecutive
+        documents fill the same ``ingest_batch_size`` embedding batch and
+        vector store write. Returns one `process_stream` summary per document.
         
-        # Generate embeddings
-        embeddings = self.embeddings.get_embeddings(chunks)
+        A document whose ``pieces`` raise one of ``skip_errors`` is left as it
+        was stored before, and its summary gets the message as ``error``;
+        the other documents are still processed.
+        """
+        summaries: List[Dict] = []
         
-        # Prepare metadata
+        def records():
+            for pieces, metadata, document_id in documents:
+                summary: Dict = {}
+                summaries.append(summary)
+                try:
+                    yield from self._document_records(pieces, metadata, document_id, summary)
+                except skip_errors as e:
+                    summary.update(chunk_count=0, added=0, unchanged=0, removed=0, error=str(e))
+                    yield _DISCARD
+        
+        self._ingest(records(), progress)
+        return summaries
+    
+    def _prepare_document(
+        self,
+        metadata: Optional[Dict],
+        document_id: Optional[str]
+    ) -> Tuple[str, Dict]:
+        """Pick the document id and build the metadata shared by its chunks."""
+        doc_id = document_id or new_document_id()
         doc_metadata = {
             "timestamp": datetime.utcnow().isoformat(),
-            "chunk_count": len(chunks)
+            "document_id": doc_id
         }
         if metadata:
-            doc_metadata.update(metadata)
-        
-        # Generate IDs for chunks
-        doc_id = document_id or f"doc_{datetime.utcnow().timestamp()}"
-        chunk_ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
-        
-        # Store in ChromaDB
-        self.collection.add(
-            embeddings=embeddings.tolist(),
-            documents=chunks,
-            ids=chunk_ids,
-            metadatas=[doc_metadata] * len(chunks)
+            doc_metadata.update(_flatten_metadata(metadata))
+        return doc_id, doc_metadata
+    
+    def _document_records(
+        self,
+        pieces: Iterable[Union[str, Page]],
+        metadata: Optional[Dict],
+        document_id: Optional[str],
+        summary: Dict
+    ) -> Iterator[Union[Tuple[str, str, Dict, bool], Callable[[], None]]]:
+        """Yield ``(chunk_id, chunk, metadata, is_new)`` for each chunk of a document.
+        
+        Chunks already stored under the same content-derived id are marked as
+        not new. After the last chunk, yields a finalizer that deletes stored
+        chunks that no longer occur and records the document in the manifest;
+        `_ingest` runs it once all of the document's chunks are written.
+        ``summary`` is filled in as chunks are produced.
+        """
+        doc_id, doc_metadata = self._prepare_document(metadata, document_id)
+        summary.update(document_id=doc_id, chunk_count=0, added=0, unchanged=0, removed=0)
+        
+        # Generated ids are fresh, so only caller-supplied ids can have chunks stored
+        existing = set(self._stored_chunk_ids(doc_id)) if document_id else set()
+        chunk_ids: List[str] = []
+        occurrences: Dict[str, int] = {}
+        content_hash = hashlib.sha256()
+        
+        for index, (chunk, page) in enumerate(self._chunks(pieces)):
+            chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()[:16]
+            content_hash.update(chunk_hash.encode("ascii"))
+            # Repeated chunks within a document get an occurrence suffix
+            occurrence = occurrences.get(chunk_hash, 0)
+            occurrences[chunk_hash] = occurrence + 1
+            chunk_id = f"{doc_id}_{chunk_hash}" + (f"_{occurrence}" if occurrence else "")
+            chunk_ids.append(chunk_id)
+            
+            is_new = chunk_id not in existing
+            summary["added" if is_new else "unchanged"] += 1
+            summary["chunk_count"] += 1
+            chunk_metadata = {
+                **doc_metadata,
+                "chunk_index": index,
+                "chunk_hash": chunk_hash,
+                # Counted once here so prompt packing never re-tokenizes stored chunks
+                "token_count": self.token_counter.count(chunk)
+            }
+            if page is not None:
+                chunk_metadata["page"] = page
+            yield chunk_id, chunk, chunk_metadata, is_new
+        
+        removed = list(existing.difference(chunk_ids))
+        summary["removed"] = len(removed)
+        
+        def finalize():
+            if removed:
+                self._delete_chunks(removed)
+            self.manifest.put(doc_id, chunk_ids, content_hash.hexdigest(), doc_metadata)
+            self._notify_change(doc_id)
+        
+        yield finalize
+    
+    def _chunks(self, pieces: Iterable[Union[str, Page]]) -> Iterator[Tuple[str, Optional[int]]]:
+        """Yield ``(chunk, page)``, splitting paged text one page at a time."""
+        pieces = iter(pieces)
+        first = next(pieces, None)
+        if first is None:
+            return
+        pieces = itertools.chain([first], pieces)
+        if isinstance(first, str):
+            for chunk in self.text_splitter.split_text_stream(pieces):
+                yield chunk, None
+            return
+        for page, text in pieces:
+            for chunk in self.text_splitter.split_text_stream([text]):
+                yield chunk, page
+    
+    def add_change_listener(self, listener: Callable[[str], None]) -> None:
+        """Register a callback run with the document id whenever a document changes.
+        
+        Listeners run on the thread that wrote the document.
+        """
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self, document_id: str) -> None:
+        for listener in self._change_listeners:
+            listener(document_id)
+    
+    def _stored_chunk_ids(self, doc_id: str) -> List[str]:
+        """Ids of the chunks currently stored for a document."""
+        if self.manifest.get(doc_id) is not None:
+            return self.manifest.chunk_ids(doc_id)
+        # Documents ingested before the manifest existed are found by metadata
+        return [record["id"] for record in self.vector_store.get(where={"document_id": doc_id}, include=[])]
+    
+    def _ingest(
+        self,
+        records: Iterable[Union[Tuple[str, str, Dict, bool], Callable[[], None]]],
+        progress: Optional[Callable[[int], None]] = None
+    ) -> int:
+        """Store ``(chunk_id, chunk, metadata, is_new)`` records in batches.
+        
+        New chunks are embedded and upserted; unchanged chunks only get their
+        metadata refreshed. A callable in ``records`` is run as soon as every
+        record before it has been written. ``_DISCARD`` drops the records of
+        the document being read: queued chunks are forgotten and new chunks
+        already written are deleted. Returns the number of chunks processed.
+        
+        If reading or storing fails, the new chunks already written for
+        documents whose finalizer has not run are deleted before the error
+        propagates, so a failed ingest leaves no chunks outside the manifest.
+        """
+        processed = 0
+        new_batch, unchanged_batch = [], []
+        # Finalizers with the batches they are still waiting on and the ids of
+        # the new chunks their document wrote
+        waiting: List[Tuple[Callable[[], None], set, List[str]]] = []
+        # ``(chunk_id, is_new)`` of the document being read
+        current: List[Tuple[str, bool]] = []
+        
+        def flushed(batch_name: str) -> None:
+            for entry in list(waiting):
+                finalizer, pending, _ = entry
+                pending.discard(batch_name)
+                if not pending:
+                    finalizer()
+                    waiting.remove(entry)
+        
+        try:
+            for record in records:
+                if record is _DISCARD:
+                    dropped = {chunk_id for chunk_id, _ in current}
+                    queued = {chunk_id for chunk_id, _, _, _ in new_batch}
+                    new_batch = [kept for kept in new_batch if kept[0] not in dropped]
+                    unchanged_batch = [kept for kept in unchanged_batch if kept[0] not in dropped]
+                    written = [chunk_id for chunk_id, is_new in current if is_new and chunk_id not in queued]
+                    if written:
+                        self._delete_chunks(written)
+                    current = []
+                    continue
+                if callable(record):
+                    pending = {name for name, batch in (("new", new_batch), ("unchanged", unchanged_batch)) if batch}
+                    new_ids = [chunk_id for chunk_id, is_new in current if is_new]
+                    if pending:
+                        waiting.append((record, pending, new_ids))
+                    else:
+                        record()
+                    current = []
+                    continue
+                
+                processed += 1
+                current.append((record[0], record[3]))
+                if record[3]:
+                    new_batch.append(record)
+                    if len(new_batch) >= self.ingest_batch_size:
+                        self._store_chunks(new_batch)
+                        new_batch = []
+                        flushed("new")
+                        if progress:
+                            progress(processed)
+                else:
+                    unchanged_batch.append(record)
+                    if len(unchanged_batch) >= self.ingest_batch_size:
+                        self._update_chunk_metadata(unchanged_batch)
+                        unchanged_batch = []
+                        flushed("unchanged")
+                        if progress:
+                            progress(processed)
+            
+            if new_batch:
+                self._store_chunks(new_batch)
+                new_batch = []
+            if unchanged_batch:
+                self._update_chunk_metadata(unchanged_batch)
+            flushed("new")
+            flushed("unchanged")
+        except Exception:
+            # Documents that were never finalized are not in the manifest, so
+            # their new chunks would be orphans nothing deletes; drop the ones
+            # already written. Unchanged chunks still belong to the stored version.
+            queued = {record[0] for record in new_batch}
+            unfinished = [chunk_id for chunk_id, is_new in current if is_new]
+            written = [
+                chunk_id
+                for chunk_ids in [unfinished] + [chunk_ids for _, _, chunk_ids in waiting]
+                for chunk_id in chunk_ids
+                if chunk_id not in queued
+            ]
+            if written:
+                self._delete_chunks(written)
+            raise
+        if progress:
+            progress(processed)
+        
+        return processed
+    
+    def _delete_chunks(self, chunk_ids: List[str]) -> None:
+        """Remove chunks from the vector store and the keyword index."""
+        self.vector_store.delete(chunk_ids)
+        self.keyword_index.delete(chunk_ids)
+    
+    def _store_chunks(self, batch: List[Tuple[str, str, Dict, bool]]) -> None:
+        """Embed a batch of chunks and write it to the vector store and the keyword index."""
+        chunks = [chunk for _, chunk, _, _ in batch]
+        chunk_ids = [chunk_id for chunk_id, _, _, _ in batch]
+        with stage_seconds.time("ingest_embedding"):
+            embeddings = self.embeddings.get_embeddings(chunks)
+        
+        with stage_seconds.time("ingest_write"):
+            self.vector_store.upsert(
+                chunk_ids,
+                embeddings,
+                chunks,
+                [metadata for _, _, metadata, _ in batch]
+            )
+            self.keyword_index.add(chunk_ids, chunks)
+        _ingested_chunks.inc(len(batch), "new")
+    
+    def rebuild_keyword_index(self, batch_size: int = 1000) -> int:
+        """Index every chunk in the vector store; returns the number of chunks indexed."""
+        indexed = 0
+        while True:
+            page = self.vector_store.get(limit=batch_size, offset=indexed, include=["documents"])
+            if not page:
+                break
+            self.keyword_index.add([record["id"] for record in page], [record["content"] for record in page])
+            indexed += len(page)
+        return indexed
+    
+    def _update_chunk_metadata(self, batch: List[Tuple[str, str, Dict, bool]]) -> None:
+        """Refresh metadata of unchanged chunks without re-embedding them."""
+        self.vector_store.update_metadata(
+            [chunk_id for chunk_id, _, _, _ in batch],
+            [metadata for _, _, metadata, _ in batch]
+        )
+        _ingested_chunks.inc(len(batch), "unchanged")
+    
+    async def aprocess_document(
+        self,
+        content: str,
+        metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None
+    ) -> str:
+        """Run `process_document` on the ingestion executor."""
+        return await self.ingest_executor.run(
+            self.process_document, content, metadata, document_id
+        )
+    
+    async def aprocess_file(
+        self,
+        file: BinaryIO,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None
+    ) -> Dict:
+        """Run `process_file` on the ingestion executor."""
+        return await self.ingest_executor.run(
+            self.process_file, file, filename, metadata, document_id
         )
+    
+    async def aprocess_stream(
+        self,
+        pieces: Iterable[Union[str, Page]],
+        metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None
+    ) -> Dict:
+        """Run `process_stream` on the ingestion executor.
         
-        return doc_id
+        ``pieces`` is consumed on the worker thread, so it may lazily read
+        and decode a file.
+        """
+        return await self.ingest_executor.run(
+            self.process_stream, pieces, metadata, document_id
+        )
+    
+    async def aprocess_documents(
+        self,
+        documents: Iterable[Tuple[Iterable[Union[str, Page]], Optional[Dict], Optional[str]]],
+        skip_errors: Tuple[Type[Exception], ...] = ()
+    ) -> List[Dict]:
+        """Run `process_documents` on the ingestion executor."""
+        return await self.ingest_executor.run(self.process_documents, documents, skip_errors=skip_errors)
     
     def search_similar(
         self,
         query: str,
         n_results: int = 3,
-        metadata_filter: Optional[Dict] = None
+        metadata_filter: Optional[Dict] = None,
+        query_embedding: Optional[np.ndarray] = None
     ) -> List[Dict]:
         """Search for similar chunks in the vector store."""
         # Generate query embedding
-        query_embedding = self.embeddings.get_embedding(query)
+        if query_embedding is None:
+            query_embedding = self.embeddings.get_embedding(query)
+        
+        with stage_seconds.time("vector_search"):
+            return self.vector_store.query(query_embedding, n_results, where=metadata_filter)
+    
+    def keyword_search(
+        self,
+        query: str,
+        n_results: int = 3,
+        metadata_filter: Optional[Dict] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """Search chunks by BM25 keyword relevance.
         
-        # Search in ChromaDB
-        results = self.collection.query(
-            query_embeddings=[query_embedding.tolist()],
-            n_results=n_results,
-            where=metadata_filter
+        Results have the same shape as `search_similar`; ``distance`` is the
+        cosine distance between the query and the chunk's stored embedding.
+        """
+        # Over-fetch when filtering, since the keyword index has no metadata
+        with stage_seconds.time("keyword_search"):
+            hits = self.keyword_index.search(query, limit=n_results * 4 if metadata_filter else n_results)
+        if not hits:
+            return []
+        if query_embedding is None:
+            query_embedding = self.embeddings.get_embedding(query)
+        
+        stored = self.vector_store.get(
+            ids=[chunk_id for chunk_id, _ in hits],
+            where=metadata_filter,
+            include=["documents", "metadatas", "embeddings"]
         )
+        rows = {
+            record["id"]: (record["content"], record["metadata"], record["embedding"])
+            for record in stored
+        }
         
-        # Format results
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
         formatted_results = []
-        for i in range(len(results['documents'][0])):
+        for chunk_id, _ in hits:
+            if chunk_id not in rows:
+                continue
+            document, metadata, embedding = rows[chunk_id]
+            vector = np.asarray(embedding, dtype=np.float32)
+            similarity = float(vector @ query_vector) / max(float(np.linalg.norm(vector) * query_norm), 1e-12)
             formatted_results.append({
-                'content': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i],
-                'id': results['ids'][0][i],
-                'distance': results['distances'][0][i]
+                'content': document,
+                'metadata': metadata,
+                'id': chunk_id,
+                'distance': 1 - similarity
             })
+            if len(formatted_results) == n_results:
+                break
         
         return formatted_results
     
+    async def aembed_query(self, query: str) -> np.ndarray:
+        """Embed a query in a shared micro-batch."""
+        with stage_seconds.time("query_embedding"):
+            return await self._flights.do(
+                ("embed", _normalize_query(query)),
+                lambda: self.query_batcher.embed(query)
+            )
+    
+    async def asearch_similar(
+        self,
+        query: str,
+        n_results: int = 3,
+        metadata_filter: Optional[Dict] = None,
+        mode: Optional[str] = None,
+        query_embedding: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """Embed the query in a shared batch, then search on the blocking executor.
+        
+        ``mode`` is ``vector``, ``keyword`` or ``hybrid`` and defaults to the
+        processor's ``search_mode``. Hybrid search runs both retrievers
+        concurrently and merges their rankings with reciprocal rank fusion.
+        Pass ``query_embedding`` from `aembed_query` to skip embedding again.
+        Identical searches that arrive while one is running share its result.
+        """
+        mode = mode or self.search_mode
+        if mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}'; choose from {list(self.SEARCH_MODES)}")
+        
+        key = (
+            "search",
+            _normalize_query(query),
+            n_results,
+            json.dumps(metadata_filter, sort_keys=True, default=str),
+            mode
+        )
+        return await self._flights.do(
+            key,
+            lambda: self._asearch(query, n_results, metadata_filter, mode, query_embedding)
+        )
+    
+    async def _asearch(
+        self,
+        query: str,
+        n_results: int,
+        metadata_filter: Optional[Dict],
+        mode: str,
+        query_embedding: Optional[np.ndarray]
+    ) -> List[Dict]:
+        if query_embedding is None:
+            query_embedding = await self.aembed_query(query)
+        if mode == "vector":
+            return await self.executor.run(
+                self.search_similar, query, n_results, metadata_filter, query_embedding
+            )
+        if mode == "keyword":
+            return await self.executor.run(
+                self.keyword_search, query, n_results, metadata_filter, query_embedding
+            )
+        
+        # Fuse deeper candidate lists than we return so either retriever can promote a chunk
+        candidates = n_results * 3
+        vector_results, keyword_results = await asyncio.gather(
+            self.executor.run(self.search_similar, query, candidates, metadata_filter, query_embedding),
+            self.executor.run(self.keyword_search, query, candidates, metadata_filter, query_embedding)
+        )
+        return _reciprocal_rank_fusion([vector_results, keyword_results], n_results)
+    
     def delete_document(self, document_id: str) -> None:
         """Delete a document and its chunks from the vector store."""
-        # Find all chunks for this document
-        chunk_ids = self.collection.get(
-            where={"document_id": document_id}
-        )['ids']
+        chunk_ids = self._stored_chunk_ids(document_id)
         
-        # Delete the chunks
-        self.collection.delete(ids=chunk_ids)
+        # Delete the chunks, then forget the document
+        if chunk_ids:
+            self._delete_chunks(chunk_ids)
+        self.manifest.delete(document_id)
+        self._notify_change(document_id)
+    
+    async def adelete_document(self, document_id: str) -> None:
+        """Run `delete_document` on the blocking executor."""
+        await self.executor.run(self.delete_document, document_id)
     
     def get_document_metadata(self, document_id: str) -> Optional[Dict]:
         """Get metadata for a specific document."""
-        try:
-            result = self.collection.get(
-                where={"document_id": document_id},
-                limit=1
-            )
-            if result['metadatas']:
-                return result['metadatas'][0]
-            return None
-        except:
-            return None
\ No newline at end of file
+        entry = self.manifest.get(document_id)
+        return entry["metadata"] if entry else None
+    
+    def get_document(self, document_id: str) -> Optional[Dict]:
+        """Get the manifest entry (chunk count, content hash, metadata) for a document."""
+        return self.manifest.get(document_id)
+    
+    def list_documents(self, offset: int = 0, limit: int = 50) -> Tuple[List[Dict], int]:
+        """Return one page of documents and the total number of documents."""
+        return self.manifest.list_documents(offset, limit)
+    
+    def close(self) -> None:
+        """Release embedding worker processes, the vector store and the manifest and keyword databases."""
+        if self._owns_embeddings:
+            self.embeddings.close()
+        self.vector_store.close()
+        self.manifest.close()
+        self.keyword_index.close()
+    
+    def stats(self) -> Dict:
+        """Return executor, extraction, embedding cache, vector store, keyword index and request sharing statistics."""
+        return {
+            "executor": self.executor.stats(),
+            "ingest_executor": self.ingest_executor.stats(),
+            "extraction": self.extractor.stats(),
+            "embedding_cache": self.embeddings.cache.stats(),
+            "vector_store": self.vector_store.stats(),
+            "keyword_index": {"chunks": self.keyword_index.count()},
+            "singleflight": self._flights.stats()
+        }
\ No newline at end of file
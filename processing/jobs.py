@@ -0,0 +1,200 @@
+from typing import BinaryIO, Callable, ContextManager, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from .document_processor import DocumentProcessor, new_document_id
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+class IngestionJobManager:
+    """Run document ingestion in the background and persist job state.
+
+    Uploads are spooled to ``jobs_path`` and processed by a small thread
+    pool. Every job is stored as a JSON file next to its upload, so on
+    startup ``resume`` picks up queued and interrupted jobs. Chunk ids are
+    content-derived, so chunks stored before the interruption are not
+    embedded again. An upload is deleted once its job finishes, whether it
+    succeeded or failed, and finished jobs are forgotten after
+    ``retention_seconds``.
+
+    Each job belongs to a tenant (None for the default collection);
+    ``lease_processor(tenant_id)`` is entered around the ingestion and
+    yields that tenant's processor, keeping it open until the job is done.
+    """
+
+    def __init__(
+        self,
+        jobs_path: str,
+        lease_processor: Callable[[Optional[str]], ContextManager[DocumentProcessor]],
+        max_workers: int = 2,
+        retention_seconds: float = 7 * 24 * 3600
+    ):
+        self.jobs_path = jobs_path
+        os.makedirs(jobs_path, exist_ok=True)
+        self.lease_processor = lease_processor
+        self.retention_seconds = retention_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+
+        for name in os.listdir(jobs_path):
+            if name.endswith(".json"):
+                with open(os.path.join(jobs_path, name)) as f:
+                    job = json.load(f)
+                self._jobs[job["job_id"]] = job
+        # Uploads spooled by a process that stopped before saving their job
+        for name in os.listdir(jobs_path):
+            if name.endswith(".upload") and name[:-len(".upload")] not in self._jobs:
+                _remove(os.path.join(jobs_path, name))
+        self.prune()
+
+    def submit(
+        self,
+        file: BinaryIO,
+        filename: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+        document_id: Optional[str] = None,
+        tenant_id: Optional[str] = None
+    ) -> Dict:
+        """Spool an upload to disk and queue it for ingestion into a tenant's collection."""
+        job_id = uuid.uuid4().hex
+        upload_path = os.path.join(self.jobs_path, f"{job_id}.upload")
+        with open(upload_path, "wb") as f:
+            shutil.copyfileobj(file, f)
+
+        job = {
+            "job_id": job_id,
+            "tenant_id": tenant_id,
+            "status": QUEUED,
+            "document_id": document_id or new_document_id(),
+            "filename": filename,
+            "metadata": metadata or {},
+            "upload_path": upload_path,
+            "chunks_embedded": 0,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "elapsed_seconds": 0.0,
+            "error": None,
+        }
+        self._save(job)
+        self._pool.submit(self._run, job_id)
+        self.prune()
+        return self.get(job_id)
+
+    def resume(self) -> int:
+        """Requeue jobs that were queued or running when the process stopped."""
+        with self._lock:
+            pending = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in (QUEUED, RUNNING)
+            ]
+        for job_id in pending:
+            self._pool.submit(self._run, job_id)
+        return len(pending)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a copy of a job's state."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def list_jobs(self, tenant_id: Optional[str] = None) -> List[Dict]:
+        """Return a tenant's jobs, newest first."""
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values() if job.get("tenant_id") == tenant_id]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def prune(self) -> int:
+        """Forget jobs that finished more than ``retention_seconds`` ago; returns how many."""
+        cutoff = (datetime.utcnow() - timedelta(seconds=self.retention_seconds)).isoformat()
+        with self._lock:
+            expired = [
+                job for job in self._jobs.values()
+                if job["status"] in (COMPLETED, FAILED) and (job["finished_at"] or "") < cutoff
+            ]
+            for job in expired:
+                del self._jobs[job["job_id"]]
+        for job in expired:
+            _remove(os.path.join(self.jobs_path, f"{job['job_id']}.json"))
+            _remove(job["upload_path"])
+        return len(expired)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker pool; unfinished jobs resume on next start."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job_id: str) -> None:
+        job = self.get(job_id)
+        started = time.perf_counter()
+        elapsed_before = job["elapsed_seconds"]
+        self._update(job_id, status=RUNNING, started_at=job["started_at"] or datetime.utcnow().isoformat())
+
+        def progress(chunks_embedded: int) -> None:
+            self._update(
+                job_id,
+                chunks_embedded=chunks_embedded,
+                elapsed_seconds=elapsed_before + time.perf_counter() - started
+            )
+
+        try:
+            with self.lease_processor(job.get("tenant_id")) as processor, open(job["upload_path"], "rb") as f:
+                summary = processor.process_file(
+                    f,
+                    filename=job["filename"],
+                    metadata=job["metadata"],
+                    document_id=job["document_id"],
+                    progress=progress,
+                    path=job["upload_path"]
+                )
+        except Exception as e:
+            self._update(
+                job_id,
+                status=FAILED,
+                error=str(e),
+                finished_at=datetime.utcnow().isoformat(),
+                elapsed_seconds=elapsed_before + time.perf_counter() - started
+            )
+            _remove(job["upload_path"])
+            return
+
+        self._update(
+            job_id,
+            status=COMPLETED,
+            added=summary["added"],
+            unchanged=summary["unchanged"],
+            removed=summary["removed"],
+            finished_at=datetime.utcnow().isoformat(),
+            elapsed_seconds=elapsed_before + time.perf_counter() - started
+        )
+        _remove(job["upload_path"])
+
+    def _update(self, job_id: str, **changes) -> None:
+        with self._lock:
+            job = dict(self._jobs[job_id], **changes)
+        self._save(job)
+
+    def _save(self, job: Dict) -> None:
+        # Write to a temporary file first so a crash never leaves a torn record
+        path = os.path.join(self.jobs_path, f"{job['job_id']}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(job, f, default=str)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._jobs[job["job_id"]] = job
@@ -0,0 +1,107 @@
+from typing import Iterable, List, Tuple
+import os
+import re
+import sqlite3
+import threading
+
+# Keep identifiers such as error codes and part numbers ("E-1042", "part_77") whole
+_TOKENIZER = "unicode61 tokenchars '-_'"
+_QUERY_TOKEN = re.compile(r"[\w\-]+")
+
+class KeywordIndex:
+    """Disk-backed BM25 inverted index over chunk text, built on SQLite FTS5.
+
+    Updated incrementally alongside the vector store, keyed by the same
+    chunk ids.
+    """
+
+    def __init__(self, path: str, max_query_terms: int = 32):
+        self.path = path
+        self.max_query_terms = max_query_terms
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS chunk_rows (
+                rowid INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunk_text USING fts5(
+                content,
+                tokenize = "{_TOKENIZER}"
+            );
+        """)
+
+    def add(self, chunk_ids: List[str], texts: List[str]) -> None:
+        """Index chunk texts, replacing any existing entries for the same ids."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(chunk_ids)
+                for chunk_id, text in zip(chunk_ids, texts):
+                    rowid = self._conn.execute(
+                        "INSERT INTO chunk_rows (chunk_id) VALUES (?)", (chunk_id,)
+                    ).lastrowid
+                    self._conn.execute(
+                        "INSERT INTO chunk_text (rowid, content) VALUES (?, ?)", (rowid, text)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, chunk_ids: Iterable[str]) -> None:
+        """Remove chunks from the index."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete(list(chunk_ids))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _delete(self, chunk_ids: List[str]) -> None:
+        # Stay well below SQLite's bound-parameter limit
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rowids = [
+                (row[0],) for row in self._conn.execute(
+                    f"SELECT rowid FROM chunk_rows WHERE chunk_id IN ({placeholders})", batch
+                )
+            ]
+            self._conn.executemany("DELETE FROM chunk_text WHERE rowid = ?", rowids)
+            self._conn.executemany("DELETE FROM chunk_rows WHERE rowid = ?", rowids)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Return ``(chunk_id, bm25_score)`` pairs, best match first."""
+        terms = _QUERY_TOKEN.findall(query)[:self.max_query_terms]
+        if not terms:
+            return []
+        # Quote every term so FTS5 query syntax in user input is taken literally
+        match = " OR ".join(f'"{term}"' for term in terms)
+
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT chunk_rows.chunk_id, bm25(chunk_text) AS rank
+                FROM chunk_text JOIN chunk_rows ON chunk_rows.rowid = chunk_text.rowid
+                WHERE chunk_text MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (match, limit)
+            ).fetchall()
+        # FTS5 reports BM25 as a negative number where lower is better
+        return [(chunk_id, -rank) for chunk_id, rank in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_rows").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
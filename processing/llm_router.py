@@ -0,0 +1,191 @@
+from typing import AsyncIterator, Dict, List, Optional, Set
+from contextlib import asynccontextmanager
+import asyncio
+import httpx
+
+# Errors raised before a backend has received the request, so retrying on
+# another backend cannot run a generation twice
+FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+class AllBackendsFailedError(RuntimeError):
+    """Raised when no Ollama backend could be reached."""
+
+class OllamaBackend:
+    """One Ollama endpoint with its own connection pool and concurrency limit."""
+
+    def __init__(
+        self,
+        url: str,
+        limits: httpx.Limits,
+        timeout: httpx.Timeout,
+        max_concurrent: int
+    ):
+        self.url = url.rstrip('/')
+        self.client = httpx.AsyncClient(base_url=self.url, limits=limits, timeout=timeout)
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        # Requests routed here that have not finished, including ones waiting for a slot
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+
+    def mark_down(self, error: Exception) -> None:
+        self.healthy = False
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+    def stats(self) -> Dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+class LLMRouter:
+    """Spread Ollama requests over several backends.
+
+    Each request goes to the healthy backend with the fewest outstanding
+    requests, rotating between backends that are tied. A backend that
+    refuses connections is marked down and the request is retried on the
+    next one; a background task probes every backend each
+    ``health_interval`` seconds and brings it back once it answers. Streams
+    stay on the backend that accepted them.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        limits: Optional[httpx.Limits] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        max_concurrent_per_backend: int = 8,
+        health_interval: float = 10.0,
+        health_timeout: float = 2.0
+    ):
+        if not urls:
+            raise ValueError("LLMRouter needs at least one backend URL")
+        self.urls = urls
+        self.limits = limits or httpx.Limits()
+        self.timeout = timeout or httpx.Timeout(120.0)
+        self.max_concurrent_per_backend = max_concurrent_per_backend
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.backends: List[OllamaBackend] = []
+        self._health_task: Optional[asyncio.Task] = None
+        # Rotates which backend wins ties on outstanding requests
+        self._turn = 0
+
+    async def start(self) -> None:
+        """Open a client per backend and start the health checks."""
+        if self.backends:
+            return
+        self.backends = [
+            OllamaBackend(url, self.limits, self.timeout, self.max_concurrent_per_backend)
+            for url in self.urls
+        ]
+        await self.check_health()
+        if self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for backend in self.backends:
+            await backend.client.aclose()
+        self.backends = []
+
+    def _pick(self, tried: Set[OllamaBackend]) -> Optional[OllamaBackend]:
+        candidates = [backend for backend in self.backends if backend not in tried]
+        # When every backend looks down, try them anyway rather than fail outright
+        healthy = [backend for backend in candidates if backend.healthy] or candidates
+        if not healthy:
+            return None
+        self._turn += 1
+        count = len(self.backends)
+        rotation = {backend: (i - self._turn) % count for i, backend in enumerate(self.backends)}
+        return min(healthy, key=lambda backend: (backend.outstanding, rotation[backend]))
+
+    async def post(self, path: str, json: Dict) -> httpx.Response:
+        """POST to the least loaded backend, failing over on connection errors."""
+        tried: Set[OllamaBackend] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._pick(tried)
+            if backend is None:
+                raise AllBackendsFailedError(f"No Ollama backend reachable: {last_error}")
+            tried.add(backend)
+            backend.outstanding += 1
+            try:
+                async with backend.slots:
+                    backend.requests += 1
+                    response = await backend.client.post(path, json=json)
+                backend.healthy = True
+                return response
+            except FAILOVER_ERRORS as e:
+                backend.mark_down(e)
+                last_error = e
+            finally:
+                backend.outstanding -= 1
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, json: Dict) -> AsyncIterator[httpx.Response]:
+        """Open a streaming request on one backend, failing over only until it connects.
+
+        The backend's concurrency slot is held until the stream is closed.
+        """
+        tried: Set[OllamaBackend] = set()
+        last_error: Optional[Exception] = None
+        while True:
+            backend = self._pick(tried)
+            if backend is None:
+                raise AllBackendsFailedError(f"No Ollama backend reachable: {last_error}")
+            tried.add(backend)
+            backend.outstanding += 1
+            try:
+                async with backend.slots:
+                    backend.requests += 1
+                    try:
+                        request = backend.client.build_request(method, path, json=json)
+                        response = await backend.client.send(request, stream=True)
+                    except FAILOVER_ERRORS as e:
+                        backend.mark_down(e)
+                        last_error = e
+                        continue
+                    backend.healthy = True
+                    try:
+                        yield response
+                    finally:
+                        await response.aclose()
+                    return
+            finally:
+                backend.outstanding -= 1
+
+    async def check_health(self) -> None:
+        """Probe every backend once and update its health."""
+        async def probe(backend: OllamaBackend):
+            try:
+                response = await backend.client.get("/api/version", timeout=self.health_timeout)
+                response.raise_for_status()
+                backend.healthy = True
+                backend.last_error = None
+            except Exception as e:
+                backend.healthy = False
+                backend.last_error = f"{type(e).__name__}: {e}"
+
+        await asyncio.gather(*[probe(backend) for backend in self.backends])
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await self.check_health()
+
+    def stats(self) -> List[Dict]:
+        return [backend.stats() for backend in self.backends]
@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+
+class DocumentManifest:
+    """SQLite index of stored documents and the ids of their chunks.
+
+    Lets document lookups, listings and deletes go straight to chunk ids
+    instead of filtering the vector store by metadata. Entries are written
+    only after the corresponding vector store writes have succeeded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                document_id TEXT PRIMARY KEY,
+                chunk_count INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                document_id TEXT NOT NULL,
+                position INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_by_document ON chunks (document_id, position);
+            CREATE INDEX IF NOT EXISTS documents_by_update ON documents (updated_at DESC, document_id);
+        """)
+
+    def put(
+        self,
+        document_id: str,
+        chunk_ids: List[str],
+        content_hash: str,
+        metadata: Dict
+    ) -> None:
+        """Record a document's current chunks, replacing any previous entry."""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (chunk_id, document_id, position) VALUES (?, ?, ?)",
+                    [(chunk_id, document_id, i) for i, chunk_id in enumerate(chunk_ids)]
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO documents (document_id, chunk_count, content_hash, metadata, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (document_id) DO UPDATE SET
+                        chunk_count = excluded.chunk_count,
+                        content_hash = excluded.content_hash,
+                        metadata = excluded.metadata,
+                        updated_at = excluded.updated_at
+                    """,
+                    (document_id, len(chunk_ids), content_hash, json.dumps(metadata, default=str), now, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def chunk_ids(self, document_id: str) -> List[str]:
+        """Ids of a document's chunks in document order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE document_id = ? ORDER BY position",
+                (document_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, document_id: str) -> Optional[Dict]:
+        """Return a document's manifest entry, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM documents WHERE document_id = ?", (document_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_documents(self, offset: int = 0, limit: int = 50) -> Tuple[List[Dict], int]:
+        """Return one page of documents, most recently updated first, and the total count."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM documents ORDER BY updated_at DESC, document_id LIMIT ? OFFSET ?",
+                (limit, offset)
+            ).fetchall()
+            total = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        return [self._to_dict(row) for row in rows], total
+
+    def delete(self, document_id: str) -> None:
+        """Remove a document and its chunk ids from the manifest."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+                self._conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row: tuple) -> Dict:
+        document_id, chunk_count, content_hash, metadata, created_at, updated_at = row
+        return {
+            "document_id": document_id,
+            "chunk_count": chunk_count,
+            "content_hash": content_hash,
+            "metadata": json.loads(metadata),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
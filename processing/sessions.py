@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import threading
+import time
+import uuid
+
+class ChatSession:
+    """Server-side conversation whose prompt prefix stays identical across turns.
+
+    The prompt is always the system prompt with the context pinned on the
+    first turn, then every earlier message exactly as it was sent, then the
+    new turn. Ollama can therefore reuse the evaluated prefix of the
+    previous turn instead of processing the whole conversation again.
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.pinned_context: List[Dict] = []
+        self.messages: List[Dict] = []
+        # Token count of each entry in `messages`
+        self.message_tokens: List[int] = []
+        self.turns = 0
+        self.updated_at = time.monotonic()
+        # Turns of one session run one at a time so the history stays ordered
+        self.lock = asyncio.Lock()
+
+    @property
+    def pinned_ids(self) -> set:
+        return {chunk['id'] for chunk in self.pinned_context}
+
+    def append_turn(self, user_content: str, answer: str, user_tokens: int, answer_tokens: int) -> None:
+        self.messages.extend([
+            {"role": "user", "content": user_content},
+            {"role": "assistant", "content": answer}
+        ])
+        self.message_tokens.extend([user_tokens, answer_tokens])
+        self.turns += 1
+        self.updated_at = time.monotonic()
+
+    def drop_oldest_turn(self) -> None:
+        del self.messages[:2]
+        del self.message_tokens[:2]
+
+class SessionStore:
+    """In-memory chat sessions with idle expiry and LRU eviction.
+
+    Sessions are keyed by tenant and session id together, so tenants
+    choosing the same session id never share a session.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800.0):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # (tenant id, session id) -> session; the tenant is None for the default collection
+        self._sessions: "OrderedDict[Tuple[Optional[str], str], ChatSession]" = OrderedDict()
+
+    def get_or_create(self, session_id: Optional[str] = None, tenant_id: Optional[str] = None) -> ChatSession:
+        """Return the tenant's live session with this id, or start a new one under it."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get((tenant_id, session_id)) if session_id else None
+            key = (tenant_id, session_id or uuid.uuid4().hex)
+            if session is None:
+                session = ChatSession(key[1])
+                self._sessions[key] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            session.updated_at = now
+            self._sessions.move_to_end(key)
+            return session
+
+    def get(self, session_id: str, tenant_id: Optional[str] = None) -> Optional[ChatSession]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._sessions.get((tenant_id, session_id))
+
+    def delete(self, session_id: str, tenant_id: Optional[str] = None) -> bool:
+        with self._lock:
+            return self._sessions.pop((tenant_id, session_id), None) is not None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"sessions": len(self._sessions)}
+
+    def _expire(self, now: float) -> None:
+        # Least recently used sessions are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.updated_at <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
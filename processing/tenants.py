@@ -0,0 +1,238 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import re
+import threading
+import time
+
+from .document_processor import DocumentProcessor
+
+# Tenant ids become directory names, so keep them to a safe alphabet
+_TENANT_ID = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")
+
+class InvalidTenantError(ValueError):
+    """Raised for tenant ids that are not 1-64 letters, digits, '_', '.' or '-'."""
+
+class TenantLimitError(Exception):
+    """Raised when a tenant is over its request rate or concurrency limit."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def validate_tenant_id(tenant_id: str) -> str:
+    if not _TENANT_ID.fullmatch(tenant_id):
+        raise InvalidTenantError(f"Invalid tenant id '{tenant_id}'")
+    return tenant_id
+
+class _Tenant:
+    __slots__ = ("processor", "leases", "last_used", "open_lock")
+
+    def __init__(self):
+        self.processor: Optional[DocumentProcessor] = None
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.open_lock = threading.Lock()
+
+class TenantRegistry:
+    """Per-tenant DocumentProcessors, opened on first use and closed when idle.
+
+    ``open_processor(tenant_id)`` builds a tenant's processor; it is expected
+    to give each tenant its own vector store, manifest and keyword index, so
+    a small tenant searches a small index, while sharing the embedding model
+    and worker pools. At most ``max_open`` tenants stay open: the least
+    recently used are closed first, as are tenants unused for
+    ``idle_seconds`` when `evict_idle` runs. A tenant is never closed while
+    leased, so ``max_open`` is exceeded rather than closing a store in use.
+    """
+
+    def __init__(
+        self,
+        open_processor: Callable[[str], DocumentProcessor],
+        max_open: int = 64,
+        idle_seconds: float = 600.0
+    ):
+        self.open_processor = open_processor
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self._lock = threading.Lock()
+        # Least recently used first
+        self._tenants: "OrderedDict[str, _Tenant]" = OrderedDict()
+        # Tenants being closed; reopening one waits for its close to finish
+        self._closing: Dict[str, threading.Event] = {}
+        self._opened = 0
+        self._evicted = 0
+
+    def acquire(self, tenant_id: str) -> None:
+        """Lease a tenant so it is not closed until `release`. Does not open it."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                tenant = self._tenants[tenant_id] = _Tenant()
+            tenant.leases += 1
+            tenant.last_used = time.monotonic()
+            self._tenants.move_to_end(tenant_id)
+
+    def release(self, tenant_id: str) -> None:
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                tenant.leases -= 1
+                tenant.last_used = time.monotonic()
+                if tenant.leases == 0 and tenant.processor is None:
+                    # Leased but never opened; nothing to keep
+                    del self._tenants[tenant_id]
+        self._evict(self._over_limit())
+
+    def get(self, tenant_id: str) -> DocumentProcessor:
+        """A leased tenant's processor, opening it if needed. Blocking; call off the event loop."""
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None or tenant.leases <= 0:
+                raise RuntimeError(f"Tenant '{tenant_id}' is not leased; call acquire() first")
+            closing = self._closing.get(tenant_id)
+        if tenant.processor is None:
+            with tenant.open_lock:
+                if tenant.processor is None:
+                    if closing is not None:
+                        closing.wait()
+                    tenant.processor = self.open_processor(tenant_id)
+                    with self._lock:
+                        self._opened += 1
+            self._evict(self._over_limit())
+        return tenant.processor
+
+    @contextmanager
+    def lease(self, tenant_id: str) -> Iterator[DocumentProcessor]:
+        """Acquire, open and release a tenant around a block of blocking work."""
+        self.acquire(tenant_id)
+        try:
+            yield self.get(tenant_id)
+        finally:
+            self.release(tenant_id)
+
+    def evict_idle(self) -> int:
+        """Close tenants unused for ``idle_seconds``; returns how many were closed."""
+        cutoff = time.monotonic() - self.idle_seconds
+        with self._lock:
+            idle = [
+                tenant_id for tenant_id, tenant in self._tenants.items()
+                if tenant.leases == 0 and tenant.last_used < cutoff
+            ]
+            evicted = self._detach(idle)
+        self._evict(evicted)
+        return len(evicted)
+
+    def _over_limit(self) -> List:
+        """Detach least recently used unleased tenants beyond ``max_open``."""
+        with self._lock:
+            open_ids = [tenant_id for tenant_id, tenant in self._tenants.items() if tenant.processor is not None]
+            excess = len(open_ids) - self.max_open
+            if excess <= 0:
+                return []
+            candidates = [tenant_id for tenant_id in open_ids if self._tenants[tenant_id].leases == 0]
+            return self._detach(candidates[:excess])
+
+    def _detach(self, tenant_ids: List[str]) -> List:
+        # Called with the lock held
+        detached = []
+        for tenant_id in tenant_ids:
+            tenant = self._tenants.pop(tenant_id)
+            if tenant.processor is not None:
+                self._closing[tenant_id] = threading.Event()
+                detached.append((tenant_id, tenant.processor))
+        self._evicted += len(detached)
+        return detached
+
+    def _evict(self, detached: List) -> None:
+        for tenant_id, processor in detached:
+            try:
+                processor.close()
+            finally:
+                with self._lock:
+                    self._closing.pop(tenant_id).set()
+
+    def close(self) -> None:
+        """Close every open tenant, leased or not; for shutdown."""
+        with self._lock:
+            evicted = self._detach(list(self._tenants))
+        self._evict(evicted)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "open": sum(1 for tenant in self._tenants.values() if tenant.processor is not None),
+                "leased": sum(1 for tenant in self._tenants.values() if tenant.leases > 0),
+                "max_open": self.max_open,
+                "opened": self._opened,
+                "evicted": self._evicted
+            }
+
+class TenantLimiter:
+    """Per-tenant request rate (token bucket) and concurrency caps.
+
+    ``rate`` requests per second are allowed with bursts of ``burst``, and at
+    most ``max_concurrent`` requests in flight; 0 disables either limit.
+    Called from the event loop only, so it takes no locks. Tenants with no
+    requests in flight and a refilled bucket are forgotten, which bounds
+    memory however many tenants there are.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: int = 0, max_concurrent: int = 0, max_tracked: int = 10000):
+        self.rate = rate
+        self.burst = max(burst, 1) if rate > 0 else 0
+        self.max_concurrent = max_concurrent
+        self.max_tracked = max_tracked
+        # tenant -> [tokens, last refill, in flight]
+        self._state: Dict[str, list] = {}
+        self._rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 or self.max_concurrent > 0
+
+    def acquire(self, tenant_id: str) -> None:
+        """Admit one request or raise `TenantLimitError`; pair with `release`."""
+        now = time.monotonic()
+        state = self._state.get(tenant_id)
+        if state is None:
+            if len(self._state) >= self.max_tracked:
+                self._forget_idle(now)
+            state = self._state[tenant_id] = [float(self.burst), now, 0]
+
+        if self.max_concurrent and state[2] >= self.max_concurrent:
+            self._rejected += 1
+            raise TenantLimitError(
+                f"{state[2]} requests already in flight for this tenant", retry_after=1.0
+            )
+        if self.rate > 0:
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+            state[1] = now
+            if state[0] < 1:
+                self._rejected += 1
+                raise TenantLimitError(
+                    f"Over {self.rate:g} requests per second for this tenant",
+                    retry_after=(1 - state[0]) / self.rate
+                )
+            state[0] -= 1
+        state[2] += 1
+
+    def release(self, tenant_id: str) -> None:
+        state = self._state.get(tenant_id)
+        if state is not None:
+            state[2] -= 1
+
+    def _forget_idle(self, now: float) -> None:
+        refill = self.burst / self.rate if self.rate > 0 else 0.0
+        for tenant_id in [
+            tenant_id for tenant_id, (_, updated, in_flight) in self._state.items()
+            if in_flight == 0 and now - updated >= refill
+        ]:
+            del self._state[tenant_id]
+
+    def stats(self) -> Dict:
+        return {
+            "tracked": len(self._state),
+            "in_flight": sum(state[2] for state in self._state.values()),
+            "rejected": self._rejected
+        }
@@ -1,4 +1,39 @@
 from .text_splitter import TextSplitter
 from .embeddings import EmbeddingsManager
+from .embedding_backends import EmbeddingBackend, create_backend
+from .embedding_cache import EmbeddingCache
+from .embedding_pool import EncoderPool
+from .executor import BlockingExecutor, ExecutorBusyError
+from .batcher import EmbeddingBatcher
+from .text_stream import iter_text, detect_encoding, UndecodableContentError
+from .archives import iter_files, is_archive
+from .extractors import DocumentExtractor, ExtractionError, detect_format
+from .tokens import TokenCounter
+from .streaming import coalesce
+from .singleflight import SingleFlight
+from .metrics import MetricsRegistry, metrics
 
-__all__ = ['TextSplitter', 'EmbeddingsManager']
\ No newline at end of file
+__all__ = [
+    'TextSplitter',
+    'EmbeddingsManager',
+    'EmbeddingBackend',
+    'create_backend',
+    'EmbeddingCache',
+    'EncoderPool',
+    'BlockingExecutor',
+    'ExecutorBusyError',
+    'EmbeddingBatcher',
+    'iter_text',
+    'detect_encoding',
+    'UndecodableContentError',
+    'iter_files',
+    'is_archive',
+    'DocumentExtractor',
+    'ExtractionError',
+    'detect_format',
+    'TokenCounter',
+    'coalesce',
+    'SingleFlight',
+    'MetricsRegistry',
+    'metrics'
+]
\ No newline at end of file
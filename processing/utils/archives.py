@@ -0,0 +1,37 @@
+from typing import BinaryIO, Iterator, Tuple
+import tarfile
+import zipfile
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+def is_archive(filename: str) -> bool:
+    """Whether a file name looks like a supported archive."""
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+def iter_files(file: BinaryIO, filename: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """Yield ``(name, stream)`` for an upload, expanding zip and tar archives.
+
+    Archive members are opened one at a time, so each stream must be consumed
+    before the next member is requested. Non-archive uploads are yielded as-is.
+    """
+    if not is_archive(filename):
+        yield filename, file
+        return
+
+    if filename.lower().endswith('.zip'):
+        with zipfile.ZipFile(file) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _is_hidden(info.filename):
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member
+    else:
+        with tarfile.open(fileobj=file, mode='r|*') as archive:
+            for info in archive:
+                if not info.isfile() or _is_hidden(info.name):
+                    continue
+                yield info.name, archive.extractfile(info)
+
+def _is_hidden(path: str) -> bool:
+    # Skip OS metadata such as __MACOSX/ folders and ._ resource forks
+    return any(part.startswith(('.', '__MACOSX')) for part in path.split('/'))
@@ -0,0 +1,77 @@
+from typing import Callable, List, Optional, Set, Tuple
+import asyncio
+import numpy as np
+
+from .executor import BlockingExecutor
+from .metrics import metrics, SIZE_BUCKETS
+
+_query_batch_size = metrics.histogram(
+    "intellidoc_query_batch_size", "Queries embedded together per micro-batch", buckets=SIZE_BUCKETS
+)
+
+class EmbeddingBatcher:
+    """Collect query texts from concurrent callers into shared encode batches.
+
+    Texts arriving within ``max_wait_ms`` of the first pending text are
+    encoded together with one call to ``encode``, up to ``max_batch_size``
+    texts per batch. Each caller gets back its own row of the result.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        executor: BlockingExecutor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        self.encode = encode
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Queue a text for the next batch and wait for its embedding."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Skip callers that gave up while waiting for the window to close
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if not batch:
+            return
+        _query_batch_size.observe(len(batch))
+
+        try:
+            embeddings = await self.executor.run(self.encode, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
@@ -0,0 +1,177 @@
+from typing import Dict, List, Optional, Type
+import os
+import numpy as np
+
+class EmbeddingBackend:
+    """Turns texts into embedding vectors for one model."""
+
+    # Hugging Face tokenizer of the model and the most tokens it embeds;
+    # longer inputs are truncated
+    tokenizer = None
+    max_seq_length = 256
+
+    def __init__(self, model_name: str, device: str = "cpu", **options):
+        self.model_name = model_name
+        self.device = device
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts into a float32 matrix with one row per text."""
+        raise NotImplementedError
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """PyTorch fp32 SentenceTransformer, the reference implementation."""
+
+    def __init__(self, model_name: str, device: str = "cpu", **options):
+        super().__init__(model_name, device)
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device=device)
+        self.tokenizer = self.model.tokenizer
+        self.max_seq_length = self.model.max_seq_length
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, convert_to_numpy=True)
+
+class QuantizedSentenceTransformerBackend(SentenceTransformerBackend):
+    """SentenceTransformer with its Linear layers dynamically quantized to int8."""
+
+    def __init__(self, model_name: str, device: str = "cpu", **options):
+        super().__init__(model_name, "cpu")
+        import torch
+        self.model = torch.quantization.quantize_dynamic(
+            self.model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+class OnnxBackend(EmbeddingBackend):
+    """ONNX Runtime export of the transformer with mean pooling and L2 normalization.
+
+    The model is exported to ``onnx_dir`` on first use. With ``quantize``
+    the exported graph is also dynamically quantized to int8 weights.
+    Pooling and normalization match all-MiniLM-L6-v2's SentenceTransformer
+    pipeline. ``intra_op_threads`` caps the threads one encode call uses
+    (ONNX Runtime's default is one per core).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        onnx_dir: Optional[str] = None,
+        quantize: bool = False,
+        max_seq_length: int = 256,
+        batch_size: int = 32,
+        intra_op_threads: Optional[int] = None,
+        **options
+    ):
+        super().__init__(model_name, device)
+        import onnxruntime
+        from transformers import AutoTokenizer
+
+        self.max_seq_length = max_seq_length
+        self.batch_size = batch_size
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        onnx_dir = onnx_dir or os.path.join("storage", "onnx")
+        slug = model_name.replace("/", "_")
+        path = os.path.join(onnx_dir, f"{slug}.onnx")
+        if not os.path.exists(path):
+            self._export(path)
+        if quantize:
+            path = self._quantize(path)
+
+        session_options = onnxruntime.SessionOptions()
+        if intra_op_threads:
+            session_options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(
+            path, sess_options=session_options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _export(self, path: str) -> None:
+        import torch
+        from transformers import AutoModel
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        model = AutoModel.from_pretrained(self.model_name).eval()
+        sample = self.tokenizer(["export"], return_tensors="pt")
+        # Positional order must follow the model's forward() signature
+        input_names = [
+            name for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in sample
+        ]
+        axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=axes,
+                opset_version=14
+            )
+
+    def _quantize(self, path: str) -> str:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = path.replace(".onnx", ".int8.onnx")
+        if not os.path.exists(quantized_path):
+            quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        batches = [
+            self._encode_batch(texts[i:i + self.batch_size])
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        return np.vstack(batches) if batches else np.empty((0, self.dimension), dtype=np.float32)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np"
+        )
+        inputs = {name: tokens[name].astype(np.int64) for name in tokens if name in self._input_names}
+        hidden = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+class QuantizedOnnxBackend(OnnxBackend):
+    """ONNX Runtime backend with int8 dynamically quantized weights."""
+
+    def __init__(self, model_name: str, device: str = "cpu", **options):
+        options["quantize"] = True
+        super().__init__(model_name, device, **options)
+
+BACKENDS: Dict[str, Type[EmbeddingBackend]] = {
+    "torch": SentenceTransformerBackend,
+    "torch-int8": QuantizedSentenceTransformerBackend,
+    "onnx": OnnxBackend,
+    "onnx-int8": QuantizedOnnxBackend,
+}
+
+def create_backend(name: str, model_name: str, device: str = "cpu", **options) -> EmbeddingBackend:
+    """Instantiate an embedding backend by its config name."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}'; choose from {sorted(BACKENDS)}")
+    return BACKENDS[name](model_name, device, **options)
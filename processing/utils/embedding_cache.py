@@ -0,0 +1,232 @@
+from typing import Dict, List, Optional
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import re
+import threading
+import numpy as np
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed on (model name, normalized text hash).
+
+    Recently used vectors live in an in-memory LRU. When ``cache_dir`` is
+    given, every vector is also appended to a matrix on disk (``vectors.f32``,
+    or ``vectors.f16`` for float16) with an append-only ``index.tsv`` mapping
+    keys to rows, so cached embeddings survive restarts. The matrix is read
+    back through a memory map.
+
+    The disk tier is an LRU too: once it holds a quarter more than
+    ``max_disk_items`` vectors, it is rewritten with only the
+    ``max_disk_items`` most recently used. Rows are fsynced in groups of
+    ``sync_rows`` rather than on every insert, and index lines are only
+    written for synced rows, so a crash loses recent entries, never
+    corrupts them.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[str] = None,
+        max_memory_items: int = 10000,
+        dtype: np.dtype = np.float32,
+        max_disk_items: int = 500000,
+        sync_rows: int = 256
+    ):
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.sync_rows = sync_rows
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.cache_dir = None
+        # Least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        # Rows appended but not yet fsynced, whose index lines are held back
+        self._unsynced: List[str] = []
+        self._compactions = 0
+        self._dim: Optional[int] = None
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+        if cache_dir:
+            slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+            if self.dtype != np.float32:
+                # Rows of different widths cannot share an index
+                slug = f"{slug}-{self.dtype.name}"
+            self.cache_dir = os.path.join(cache_dir, slug)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load()
+
+    @property
+    def _vectors_path(self) -> str:
+        suffix = "f16" if self.dtype == np.float16 else "f32"
+        return os.path.join(self.cache_dir, f"vectors.{suffix}")
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.tsv")
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.cache_dir, "meta.json")
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path) as f:
+            self._dim = json.load(f)["dim"]
+
+        # Vectors are written before their index lines, so any row listed in
+        # the index is complete. Drop a partially written trailing row.
+        if os.path.exists(self._vectors_path):
+            row_bytes = self._dim * self.dtype.itemsize
+            self._rows = os.path.getsize(self._vectors_path) // row_bytes
+            os.truncate(self._vectors_path, self._rows * row_bytes)
+        if os.path.exists(self._index_path):
+            with open(self._index_path) as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) == 2 and int(parts[1]) < self._rows:
+                        self._index[parts[0]] = int(parts[1])
+
+    def key(self, text: str) -> str:
+        """Content address for a text under this cache's model."""
+        normalized = " ".join(text.split())
+        return hashlib.sha256(f"{self.model_name}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up embeddings for texts; missing entries are None."""
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for text in texts:
+                key = self.key(text)
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                    if key in self._index:
+                        self._index.move_to_end(key)
+                    self.hits += 1
+                elif key in self._index:
+                    self._index.move_to_end(key)
+                    embedding = np.array(self._read_row(self._index[key]))
+                    self._remember(key, embedding)
+                    self.hits += 1
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                results.append(embedding)
+        return results
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray) -> None:
+        """Store embeddings for texts in memory and, if enabled, on disk."""
+        with self._lock:
+            new_keys, new_rows, seen = [], [], set()
+            for text, embedding in zip(texts, embeddings):
+                key = self.key(text)
+                # An owned copy: a row view would keep the caller's whole batch
+                # alive, and every tier returns the same dtype
+                embedding = np.array(embedding, dtype=self.dtype)
+                self._remember(key, embedding)
+                if self.cache_dir and key not in self._index and key not in seen:
+                    seen.add(key)
+                    new_keys.append(key)
+                    new_rows.append(embedding)
+            if new_rows:
+                self._append(new_keys, np.asarray(new_rows, dtype=self.dtype))
+
+    def _remember(self, key: str, embedding: np.ndarray) -> None:
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_row(self, row: int) -> np.ndarray:
+        if self._matrix is None or row >= self._matrix.shape[0]:
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self._dim)
+            )
+        return self._matrix[row]
+
+    def _append(self, keys: List[str], rows: np.ndarray) -> None:
+        if self._dim is None:
+            self._dim = rows.shape[1]
+            with open(self._meta_path, "w") as f:
+                json.dump({"model_name": self.model_name, "dim": self._dim}, f)
+
+        with open(self._vectors_path, "ab") as f:
+            f.write(rows.tobytes())
+        for offset, key in enumerate(keys):
+            self._index[key] = self._rows + offset
+        self._rows += len(keys)
+        self._unsynced.extend(keys)
+
+        if len(self._index) > self.max_disk_items * 1.25:
+            self._compact()
+        elif len(self._unsynced) >= self.sync_rows:
+            self._sync()
+
+    def _sync(self) -> None:
+        """Fsync appended rows, then write the index lines that point at them."""
+        if not self._unsynced:
+            return
+        with open(self._vectors_path, "ab") as f:
+            os.fsync(f.fileno())
+        with open(self._index_path, "a") as f:
+            for key in self._unsynced:
+                # Keys evicted by a compaction since are simply not listed
+                if key in self._index:
+                    f.write(f"{key}\t{self._index[key]}\n")
+        self._unsynced = []
+
+    def _compact(self) -> None:
+        """Rewrite the disk tier keeping the ``max_disk_items`` most recently used rows."""
+        matrix = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self._dim))
+        keep = list(self._index.items())[-self.max_disk_items:]
+        with open(self._vectors_path + ".tmp", "wb") as f:
+            for start in range(0, len(keep), 4096):
+                rows = [row for _, row in keep[start:start + 4096]]
+                f.write(np.ascontiguousarray(matrix[rows]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._index_path + ".tmp", "w") as f:
+            for new_row, (key, _) in enumerate(keep):
+                f.write(f"{key}\t{new_row}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        del matrix
+        self._matrix = None
+        # Without an index every row is unreferenced, so a crash between
+        # these steps leaves an empty cache rather than mismatched rows
+        if os.path.exists(self._index_path):
+            os.remove(self._index_path)
+        os.replace(self._vectors_path + ".tmp", self._vectors_path)
+        os.replace(self._index_path + ".tmp", self._index_path)
+
+        self._index = OrderedDict((key, new_row) for new_row, (key, _) in enumerate(keep))
+        self._rows = len(keep)
+        self._unsynced = []
+        self._compactions += 1
+
+    def close(self) -> None:
+        """Write out rows and index lines not yet synced."""
+        with self._lock:
+            if self.cache_dir:
+                self._sync()
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit and miss counters and tier sizes."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+                "disk_items": len(self._index),
+                "disk_compactions": self._compactions,
+            }
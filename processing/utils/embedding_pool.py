@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import math
+import multiprocessing
+import os
+import threading
+import numpy as np
+
+from .embedding_backends import BACKENDS, SentenceTransformerBackend, create_backend
+
+# Embedding backend owned by each worker process
+_worker_backend = None
+
+def _init_worker(
+    backend: str,
+    model_name: str,
+    device: str,
+    backend_options: Dict,
+    threads: int
+) -> None:
+    global _worker_backend
+
+    # Split the cores between workers instead of letting each grab them all.
+    # Only torch backends import torch; ONNX Runtime sizes its own thread pool
+    backend_class = BACKENDS.get(backend)
+    if backend_class is not None and issubclass(backend_class, SentenceTransformerBackend):
+        import torch
+        torch.set_num_threads(threads)
+    else:
+        backend_options = dict(backend_options, intra_op_threads=threads)
+    _worker_backend = create_backend(backend, model_name, device, **backend_options)
+    # Pay the first call's lazy setup here rather than on a real shard
+    _worker_backend.encode(["warm-up"])
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return _worker_backend.encode(texts)
+
+class EncoderPool:
+    """Shard encode batches across worker processes that each hold the model once.
+
+    Shards are encoded in parallel and reassembled in input order. If a
+    worker dies, the pool is rebuilt and the batch retried once.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        device: str = "cpu",
+        num_workers: int = 2,
+        min_shard_size: int = 16,
+        backend: str = "torch",
+        backend_options: Optional[Dict] = None
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.backend = backend
+        self.backend_options = backend_options or {}
+        self.num_workers = num_workers
+        self.min_shard_size = min_shard_size
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // num_workers)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = self._create_pool()
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # Spawn rather than fork: forking a process that already loaded
+        # torch can deadlock in its thread pools
+        return ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                self.backend,
+                self.model_name,
+                self.device,
+                self.backend_options,
+                self.threads_per_worker
+            )
+        )
+
+    def warm_up(self) -> None:
+        """Start every worker process and load its model ahead of the first large batch."""
+        pool = self._pool
+        if pool is None:
+            raise RuntimeError("EncoderPool is closed")
+        # Workers are spawned on demand; as many concurrent tasks start them all
+        futures = [pool.submit(_encode_shard, ["warm-up"]) for _ in range(self.num_workers)]
+        for future in futures:
+            future.result()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts across the worker processes, preserving order."""
+        pool = self._pool
+        try:
+            return self._encode(pool, texts)
+        except BrokenProcessPool:
+            self._restart(pool)
+            return self._encode(self._pool, texts)
+
+    def _encode(self, pool: Optional[ProcessPoolExecutor], texts: List[str]) -> np.ndarray:
+        if pool is None:
+            raise RuntimeError("EncoderPool is closed")
+
+        shard_size = max(self.min_shard_size, math.ceil(len(texts) / self.num_workers))
+        futures = [
+            pool.submit(_encode_shard, texts[i:i + shard_size])
+            for i in range(0, len(texts), shard_size)
+        ]
+        return np.vstack([future.result() for future in futures])
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            # Another thread may already have replaced the broken pool
+            if self._pool is broken and broken is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._create_pool()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
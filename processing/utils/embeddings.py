@@ -1,22 +1,82 @@
-from typing import List
+from typing import Dict, List, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from .embedding_backends import create_backend
+from .embedding_cache import EmbeddingCache
+from .embedding_pool import EncoderPool
+from .metrics import metrics, stage_seconds, SIZE_BUCKETS
+
+_encode_batch_size = metrics.histogram(
+    "intellidoc_embedding_batch_size", "Texts per embedding model call (cache misses only)", buckets=SIZE_BUCKETS
+)
 
 class EmbeddingsManager:
     def __init__(
         self,
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
-        device: str = "cpu"
+        device: str = "cpu",
+        cache_dir: Optional[str] = None,
+        cache_size: int = 10000,
+        disk_cache_size: int = 500000,
+        num_workers: int = 0,
+        backend: str = "torch",
+        backend_options: Optional[Dict] = None,
+        dtype: str = "float32"
     ):
-        self.model = SentenceTransformer(model_name, device=device)
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.backend = create_backend(backend, model_name, device, **(backend_options or {}))
+        
+        # Vectors from different backends differ slightly, so they get
+        # separate cache namespaces; the reference backend keeps the plain name
+        cache_namespace = model_name if backend == "torch" else f"{model_name}@{backend}"
+        self.cache = EmbeddingCache(
+            cache_namespace, cache_dir, max_memory_items=cache_size, dtype=self.dtype,
+            max_disk_items=disk_cache_size
+        )
+        
+        # Optional worker processes for large batches; small batches such as
+        # queries stay in-process where there is no IPC overhead
+        self.pool = EncoderPool(
+            model_name, device, num_workers, backend=backend, backend_options=backend_options
+        ) if num_workers > 0 else None
     
     def get_embeddings(self, texts: List[str]) -> np.ndarray:
-        """Generate embeddings for a list of texts."""
-        return self.model.encode(texts, convert_to_numpy=True)
+        """Generate embeddings for a list of texts, encoding only cache misses."""
+        if not texts:
+            return np.empty((0, self.backend.dimension), dtype=self.dtype)
+        
+        embeddings = self.cache.get_many(texts)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # Encode each distinct missing text once
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = self._encode(missing_texts)
+            self.cache.put_many(missing_texts, encoded)
+            by_text = dict(zip(missing_texts, encoded))
+            for i in missing:
+                embeddings[i] = by_text[texts[i]]
+        
+        return np.vstack(embeddings)
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        _encode_batch_size.observe(len(texts))
+        with stage_seconds.time("embedding_encode"):
+            if self.pool is not None and len(texts) > self.pool.min_shard_size:
+                encoded = self.pool.encode(texts)
+            else:
+                encoded = self.backend.encode(texts)
+        return encoded.astype(self.dtype, copy=False)
+    
+    def close(self) -> None:
+        """Stop encoder worker processes, if any, and sync the embedding cache."""
+        if self.pool is not None:
+            self.pool.close()
+        self.cache.close()
     
     def get_embedding(self, text: str) -> np.ndarray:
         """Generate embedding for a single text."""
-        return self.model.encode(text, convert_to_numpy=True)
+        return self.get_embeddings([text])[0]
     
     def similarity_score(self, text1: str, text2: str) -> float:
         """Calculate similarity score between two texts."""
@@ -0,0 +1,89 @@
+from typing import Any, Callable, Dict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the blocking-work queue is full."""
+
+class BlockingExecutor:
+    """Bounded thread pool for blocking model and vector store calls.
+
+    At most ``max_workers`` calls run at once; up to ``max_queue`` more wait
+    for a free worker. Callers beyond that are rejected with
+    ``ExecutorBusyError`` instead of piling up on the event loop.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        max_queue: int = 64,
+        thread_name_prefix: str = "blocking"
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result."""
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorBusyError(
+                    f"Too many pending requests ({self._queued}); try again later"
+                )
+            self._queued += 1
+
+        future = self._pool.submit(self._call, time.perf_counter(), fn, args, kwargs)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Drop work that never started so it does not count as queued
+            if future.cancel():
+                with self._lock:
+                    self._queued -= 1
+            raise
+
+    def _call(self, submitted: float, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        waited = time.perf_counter() - submitted
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and wait time statistics."""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": (self._total_wait / started * 1000) if started else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting work and release the worker threads."""
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,314 @@
+from typing import BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from .text_stream import iter_text, detect_encoding
+
+# Extracted text of one page, with its 1-based page number
+Page = Tuple[int, str]
+
+FORMAT_SUFFIXES = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.html': 'html',
+    '.htm': 'html',
+    '.md': 'markdown',
+    '.markdown': 'markdown'
+}
+
+# Elements that end a paragraph when HTML is flattened to text
+_BLOCK_TAGS = [
+    'p', 'div', 'section', 'article', 'header', 'footer', 'li', 'tr', 'table',
+    'pre', 'blockquote', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'
+]
+
+class ExtractionError(ValueError):
+    """Raised when an upload cannot be parsed as its format."""
+
+def detect_format(filename: Optional[str]) -> str:
+    """Format of an upload from its file name; anything unknown is treated as text."""
+    suffix = os.path.splitext(filename or "")[1].lower()
+    return FORMAT_SUFFIXES.get(suffix, 'text')
+
+# The functions below run in the worker processes
+
+# PDF reader of the file the worker is reading pages from, keyed by path and
+# inode so a reused temporary file name is not mistaken for the same file.
+# The reader holds the whole file in memory, so it is dropped once the file
+# is done.
+_worker_pdf: Tuple[Optional[Tuple], object] = (None, None)
+
+def _open_pdf(path: str):
+    global _worker_pdf
+    stat = os.stat(path)
+    key = (path, stat.st_ino, stat.st_mtime_ns)
+    if _worker_pdf[0] != key:
+        from PyPDF2 import PdfReader
+        _worker_pdf = (key, PdfReader(path))
+    return _worker_pdf[1]
+
+def _release_pdf(path: str) -> None:
+    global _worker_pdf
+    if _worker_pdf[0] is not None and _worker_pdf[0][0] == path:
+        _worker_pdf = (None, None)
+
+def _pdf_page_count(path: str) -> int:
+    return len(_open_pdf(path).pages)
+
+def _pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    reader = _open_pdf(path)
+    pages = [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+    if stop >= len(reader.pages):
+        _release_pdf(path)
+    return pages
+
+def _docx_text(path: str) -> str:
+    import docx
+
+    document = docx.Document(path)
+    blocks = [paragraph.text for paragraph in document.paragraphs]
+    for table in document.tables:
+        for row in table.rows:
+            blocks.append(" | ".join(cell.text for cell in row.cells))
+    return "\n\n".join(block for block in blocks if block.strip())
+
+def _html_text(data: Union[bytes, str]) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(data, "html.parser")
+    for tag in soup(["script", "style", "noscript", "template", "head"]):
+        tag.decompose()
+    # Keep paragraphs apart so the splitter can break between them
+    for tag in soup.find_all(_BLOCK_TAGS):
+        tag.append("\n\n")
+    for tag in soup.find_all("br"):
+        tag.replace_with("\n")
+    return soup.get_text()
+
+def _markdown_text(data: bytes) -> str:
+    import markdown
+
+    text = data.decode(detect_encoding(data[:64 * 1024]), errors='replace')
+    return _html_text(markdown.markdown(text, extensions=["tables", "fenced_code"]))
+
+class _CountingReader:
+    """File wrapper that counts the bytes read through it."""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.file.read(size)
+        self.bytes_read += len(data)
+        return data
+
+class DocumentExtractor:
+    """Turn uploads into text, parsing binary and markup formats in worker processes.
+
+    PDFs are extracted ``pages_per_task`` pages at a time. Up to two tasks
+    per worker run ahead of the consumer, so later pages are parsed while
+    earlier ones are chunked and embedded, and only that window of pages
+    is ever held in memory. Pages are yielded as ``(page, text)`` pairs.
+    DOCX, HTML and Markdown files are parsed whole in a worker, and plain
+    text is decoded incrementally in the calling thread.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        pages_per_task: int = 8,
+        spool_path: Optional[str] = None
+    ):
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
+        self.spool_path = spool_path
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+        self._pool: Optional[ProcessPoolExecutor] = self._create_pool() if max_workers > 0 else None
+
+    def _create_pool(self) -> ProcessPoolExecutor:
+        # Spawn rather than fork: the server process may already hold torch
+        # and open database handles. Workers start on first use.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def extract(
+        self,
+        file: BinaryIO,
+        filename: Optional[str] = None,
+        path: Optional[str] = None
+    ) -> Iterator[Union[str, Page]]:
+        """Yield the text of an upload: ``(page, text)`` pairs for PDFs, text pieces otherwise.
+
+        Parsing starts when the iterator is first advanced, so the file
+        must stay open until it is exhausted. ``path`` is where ``file``
+        already lies on disk, e.g. a background job's spooled upload, so
+        PDFs and DOCX files are not copied again; only pass paths the
+        server wrote itself. Without it the file is always spooled, whatever
+        its ``name`` says.
+        """
+        format = detect_format(filename)
+        if format == 'text':
+            reader = _CountingReader(file)
+            return self._measure(format, iter_text(reader), lambda: reader.bytes_read)
+        size = {"bytes": 0}
+        return self._measure(format, self._extract_binary(format, file, path, size), lambda: size["bytes"])
+
+    def _extract_binary(
+        self,
+        format: str,
+        file: BinaryIO,
+        path: Optional[str],
+        size: Dict
+    ) -> Iterator[Union[str, Page]]:
+        if format in ('html', 'markdown'):
+            data = file.read()
+            size["bytes"] = len(data)
+            yield self._result(format, self._submit(_html_text if format == 'html' else _markdown_text, data))
+            return
+
+        # PDF and DOCX parsers need a seekable file that workers can open by path
+        with self._spooled(file, path) as path:
+            size["bytes"] = os.path.getsize(path)
+            if format == 'docx':
+                yield self._result(format, self._submit(_docx_text, path))
+                return
+
+            page_count = self._result(format, self._submit(_pdf_page_count, path))
+            window = max(self.max_workers, 1) * 2
+            pending: Deque[Tuple[int, Future]] = deque()
+            try:
+                for start in range(0, page_count, self.pages_per_task):
+                    stop = min(start + self.pages_per_task, page_count)
+                    pending.append((start, self._submit(_pdf_pages, path, start, stop)))
+                    if len(pending) >= window:
+                        yield from self._pages(format, *pending.popleft())
+                while pending:
+                    yield from self._pages(format, *pending.popleft())
+            finally:
+                running = [future for _, future in pending if not future.cancel()]
+                # Windows already running would reopen the reader after the release
+                wait(running)
+                self._release_pdf_readers(path)
+
+    def _pages(self, format: str, start: int, future: Future) -> Iterator[Page]:
+        for offset, text in enumerate(self._result(format, future)):
+            yield start + offset + 1, text
+
+    @contextmanager
+    def _spooled(self, file: BinaryIO, path: Optional[str]) -> Iterator[str]:
+        """Path of the file on disk, copying it to a temporary file unless ``path`` is given."""
+        if path is not None:
+            yield path
+            return
+        # Never trust ``file.name``: an archive member's name is whatever the
+        # archive says, e.g. the path of a local file the server can read
+        fd, path = tempfile.mkstemp(suffix=".upload", dir=self.spool_path)
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                shutil.copyfileobj(file, spool)
+            yield path
+        finally:
+            os.remove(path)
+
+    def _release_pdf_readers(self, path: str) -> None:
+        """Ask the workers to drop their reader for a finished PDF, without waiting.
+
+        The worker that read the final window has already dropped its own;
+        others that read earlier windows still hold one. One task is queued
+        per worker, but the pool picks which worker runs each, so a reader
+        can survive until its worker next opens a PDF.
+        """
+        for _ in range(max(self.max_workers, 1)):
+            try:
+                self._submit(_release_pdf, path)
+            except RuntimeError:
+                # The pool is shutting down, taking the workers with it
+                return
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        if self._pool is not None:
+            pool = self._pool
+            try:
+                return pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died, e.g. on a malformed file; replace the pool
+                with self._lock:
+                    if self._pool is pool:
+                        self._pool = self._create_pool()
+                    pool = self._pool
+                return pool.submit(fn, *args)
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _result(self, format: str, future: Future):
+        try:
+            return future.result()
+        except Exception as e:
+            raise ExtractionError(f"Could not parse {format} file: {e}") from e
+
+    def _measure(
+        self,
+        format: str,
+        pieces: Iterable[Union[str, Page]],
+        size: Callable[[], int]
+    ) -> Iterator[Union[str, Page]]:
+        """Pass ``pieces`` through, timing only the work done to produce them."""
+        pages = 0
+        seconds = 0.0
+        iterator = iter(pieces)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    piece = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    seconds += time.perf_counter() - started
+                if isinstance(piece, tuple):
+                    pages += 1
+                yield piece
+        finally:
+            self._record(format, size(), pages, seconds)
+
+    def _record(self, format: str, size: int, pages: int, seconds: float) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                format, {"documents": 0, "pages": 0, "bytes": 0, "seconds": 0.0}
+            )
+            stats["documents"] += 1
+            stats["pages"] += pages
+            stats["bytes"] += size
+            stats["seconds"] += seconds
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-format totals and extraction throughput in MB/s."""
+        with self._lock:
+            return {
+                format: {
+                    **stats,
+                    "mb_per_second": stats["bytes"] / stats["seconds"] / 1e6 if stats["seconds"] else None
+                }
+                for format, stats in self._stats.items()
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Stop the worker processes, cancelling extraction tasks that have not started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
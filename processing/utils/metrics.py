@@ -0,0 +1,219 @@
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+import bisect
+import contextlib
+import math
+import threading
+import time
+
+# Seconds; spans a cache hit (sub-millisecond) to a long generation
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Items per batch
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+# Returned by Histogram.time while metrics are disabled; reusable and stateless
+_NO_TIMER = contextlib.nullcontext()
+
+# A sample reported by a collector: (name, help, type, labels, value)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labels: Sequence[str]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, label_values: Tuple) -> Tuple[str, ...]:
+        if len(label_values) != len(self.label_names):
+            raise ValueError(f"{self.name} takes labels {list(self.label_names)}, got {list(label_values)}")
+        return tuple(str(value) for value in label_values)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """A monotonically increasing total, optionally per label values."""
+    type_name = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *label_values) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values]
+
+class Gauge(Counter):
+    """A value that goes up and down, such as requests in flight."""
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1.0, *label_values) -> None:
+        self.inc(-amount, *label_values)
+
+    def set(self, value: float, *label_values) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    """Observations counted into cumulative ``le`` buckets, with their sum and count."""
+    type_name = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: [count per bucket plus +Inf, sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._key(label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *label_values):
+        """Context manager observing the seconds spent in its block."""
+        if not self.registry.enabled:
+            return _NO_TIMER
+        return self._timer(label_values)
+
+    @contextlib.contextmanager
+    def _timer(self, label_values: Tuple):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Metrics are created once at import time and recorded into from any
+    thread. While the registry is disabled every ``inc``, ``set`` and
+    ``observe`` returns after a single attribute check and ``time`` hands
+    back a shared no-op context manager, so instrumented code pays next to
+    nothing. Collectors report values that components already track, such
+    as cache hit counts, and are only called when the metrics are rendered.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Modules may be imported twice under different names; share the metric
+                if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(self, name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(self, name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(self, name, help, labels, buckets=buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        """Call ``collector`` at every render for ``(name, help, type, labels, value)`` samples."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics and collected samples in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            samples = metric.render()
+            if samples:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.type_name}")
+                lines.extend(samples)
+
+        # Collected samples are grouped by name so each gets one HELP and TYPE
+        collected: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in collectors:
+            for name, help, type_name, labels, value in collector():
+                if value is None:
+                    continue
+                _, _, samples = collected.setdefault(name, (help, type_name, []))
+                samples.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        for name, (help, type_name, samples) in collected.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_name}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+# The process-wide registry that the processing modules record into
+metrics = MetricsRegistry()
+
+# Latency of each step between a request arriving and its answer, shared by all modules
+stage_seconds = metrics.histogram(
+    "intellidoc_stage_seconds", "Seconds spent in each request and ingestion stage", labels=("stage",)
+)
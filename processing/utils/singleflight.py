@@ -0,0 +1,118 @@
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+import asyncio
+
+class _Broadcast:
+    """One upstream stream whose pieces are replayed to every subscriber."""
+
+    def __init__(self):
+        self.pieces: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.changed = asyncio.Condition()
+        self.task: Optional[asyncio.Task] = None
+
+class SingleFlight:
+    """Let concurrent identical requests share one computation.
+
+    Callers pass a key describing the request. While a call for that key
+    is in flight, later callers wait for its result instead of starting
+    their own; once it finishes the key is free again, so nothing is
+    cached beyond the lifetime of the call.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self._started = 0
+        self._shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``await fn()``, sharing the call with concurrent callers of ``key``."""
+        task = self._calls.get(key)
+        if task is None:
+            # Run in its own task so one caller's cancellation does not fail the rest
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._started += 1
+            task.add_done_callback(lambda done: self._finish_call(key, done))
+        else:
+            self._shared += 1
+        return await asyncio.shield(task)
+
+    def _finish_call(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stream(
+        self,
+        key: Hashable,
+        fn: Callable[[], AsyncIterator[Any]]
+    ) -> AsyncGenerator[Any, None]:
+        """Subscribe to the stream ``fn()``, shared with concurrent subscribers of ``key``.
+
+        Subscribers that join late first receive every piece produced so
+        far. The upstream stream is cancelled once every subscriber has left.
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            self._started += 1
+            broadcast.task = asyncio.ensure_future(self._pump(key, broadcast, fn))
+        else:
+            self._shared += 1
+        broadcast.subscribers += 1
+        return self._subscribe(key, broadcast)
+
+    async def _pump(self, key: Hashable, broadcast: _Broadcast, fn: Callable[[], AsyncIterator[Any]]) -> None:
+        try:
+            async for piece in fn():
+                async with broadcast.changed:
+                    broadcast.pieces.append(piece)
+                    broadcast.changed.notify_all()
+        except BaseException as e:
+            broadcast.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            # Later requests start a fresh stream
+            if self._streams.get(key) is broadcast:
+                del self._streams[key]
+            async with broadcast.changed:
+                broadcast.done = True
+                broadcast.changed.notify_all()
+
+    async def _subscribe(self, key: Hashable, broadcast: _Broadcast) -> AsyncGenerator[Any, None]:
+        position = 0
+        try:
+            while True:
+                async with broadcast.changed:
+                    await broadcast.changed.wait_for(
+                        lambda: position < len(broadcast.pieces) or broadcast.done
+                    )
+                    pieces = broadcast.pieces[position:]
+                    done = broadcast.done
+                position += len(pieces)
+                for piece in pieces:
+                    yield piece
+                if done and position == len(broadcast.pieces):
+                    if broadcast.error is not None:
+                        raise broadcast.error
+                    return
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.task.done():
+                broadcast.task.cancel()
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "started": self._started,
+            "shared": self._shared
+        }
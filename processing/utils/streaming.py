@@ -0,0 +1,75 @@
+from typing import AsyncGenerator, AsyncIterator
+import asyncio
+
+_DONE = object()
+
+async def coalesce(
+    pieces: AsyncIterator[str],
+    max_chars: int = 64,
+    max_delay_ms: float = 50.0
+) -> AsyncGenerator[str, None]:
+    """Merge a fast stream of small text pieces into fewer, larger ones.
+
+    Buffered text is emitted once it reaches ``max_chars`` or has waited
+    ``max_delay_ms``, whichever comes first. The first piece is emitted
+    immediately so time to first token is unaffected.
+
+    ``pieces`` is consumed to completion in its own task, so context
+    managers inside it are entered and exited by the same task.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        try:
+            async for piece in pieces:
+                if piece:
+                    await queue.put(piece)
+            await queue.put(_DONE)
+        except BaseException as e:
+            await queue.put(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+    producer = asyncio.create_task(produce())
+    loop = asyncio.get_running_loop()
+    max_delay = max_delay_ms / 1000
+    first = True
+    buffer = []
+    size = 0
+    deadline = None
+
+    try:
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+                continue
+
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                # Deliver what arrived before the failure, then surface it
+                if buffer:
+                    yield "".join(buffer)
+                raise item
+
+            if first:
+                first = False
+                yield item
+                continue
+            buffer.append(item)
+            size += len(item)
+            if deadline is None:
+                deadline = loop.time() + max_delay
+            if size >= max_chars:
+                yield "".join(buffer)
+                buffer, size, deadline = [], 0, None
+
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        if not producer.done():
+            producer.cancel()
@@ -1,28 +1,107 @@
-from typing import List, Optional
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from bisect import bisect_left
 import re
 
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SPACE_RUN = re.compile(r'  +')
+
+def _word_start(text: str, end: int) -> int:
+    """Offset where the word ending at ``end`` starts."""
+    while end > 0 and not text[end - 1].isspace():
+        end -= 1
+    return end
+
 class TextSplitter:
     def __init__(
         self,
         chunk_size: int = 512,
         chunk_overlap: int = 50,
-        separators: Optional[List[str]] = None
+        separators: Optional[List[str]] = None,
+        tokenizer: Optional[Any] = None
     ):
+        """Split text at the highest-priority separator that keeps chunks within size.
+        
+        Sizes are in characters, or in tokens when ``tokenizer`` (a Hugging
+        Face fast tokenizer) is given, so chunks can be matched to an
+        embedding model's sequence limit.
+        """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.separators = separators or ["\n\n", "\n", ". ", " ", ""]
+        self.tokenizer = tokenizer
     
     def split_text(self, text: str) -> List[str]:
         """Split text into chunks using specified separators."""
+        chunks, _ = self._split(text, final=True)
+        return chunks
+    
+    def split_text_stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Clean and split text that arrives in pieces, yielding chunks as they complete.
+        
+        Produces the same chunks as ``split_text(clean_text("".join(pieces)))``
+        while holding only the current piece and one chunk of lookahead in memory.
+        """
+        pending = ""  # Raw trailing whitespace that may continue in the next piece
+        buffer = ""  # Cleaned text that has not been emitted yet
+        token_starts: List[int] = []  # Offsets of the final tokens in ``buffer``, in token mode
+        started = False
+        
+        for piece in pieces:
+            pending += piece
+            cut = len(pending.rstrip())
+            if cut == 0:
+                continue
+            
+            # Clean up to the last non-whitespace character so whitespace runs
+            # are never split between two pieces
+            cleaned = self._normalize_whitespace(pending[:cut])
+            pending = pending[cut:]
+            if not started:
+                cleaned = cleaned.lstrip()
+                started = True
+            buffer += cleaned
+            if self.tokenizer is not None:
+                self._extend_token_starts(buffer, token_starts, len(buffer) - len(cleaned), final=False)
+            
+            chunks, start = self._split(buffer, final=False, token_starts=token_starts)
+            yield from chunks
+            if start:
+                buffer = buffer[start:]
+                token_starts = [offset - start for offset in token_starts[bisect_left(token_starts, start):]]
+        
+        if buffer:
+            if self.tokenizer is not None:
+                self._extend_token_starts(buffer, token_starts, len(buffer), final=True)
+            chunks, _ = self._split(buffer, final=True, token_starts=token_starts)
+            yield from chunks
+    
+    def _split(self, text: str, final: bool, token_starts: Optional[List[int]] = None) -> Tuple[List[str], int]:
+        """Split text into chunks.
+        
+        When ``final`` is False, stop before the last partial chunk and return
+        the offset where splitting should resume once more text is available.
+        In token mode, ``token_starts`` may give the token offsets of ``text``
+        when the caller already has them; a chunk never ends past the last one.
+        """
         chunks = []
         start = 0
+        if self.tokenizer is None:
+            token_starts = None
+        elif token_starts is None:
+            token_starts = self._token_starts(text)
         
         while start < len(text):
             # Find the end of the chunk
-            end = start + self.chunk_size
+            if token_starts is None:
+                end = start + self.chunk_size
+            else:
+                last = bisect_left(token_starts, start) + self.chunk_size
+                end = token_starts[last] if last < len(token_starts) else len(text)
             
             if end >= len(text):
-                chunks.append(text[start:])
+                if final:
+                    chunks.append(text[start:])
+                    start = len(text)
                 break
             
             # Try different separators to find the best split point
@@ -37,20 +116,50 @@ class TextSplitter:
             chunks.append(text[start:split_point])
             
             # Move start point for next chunk, considering overlap
-            start = split_point - self.chunk_overlap
+            if token_starts is None:
+                next_start = split_point - self.chunk_overlap
+                too_far = next_start < split_point - self.chunk_size
+            else:
+                # Overlap reaching before the first known token reaches before
+                # ``start`` too, whether or not ``text`` is a streamed buffer
+                first = bisect_left(token_starts, split_point) - self.chunk_overlap
+                next_start = token_starts[first] if first >= 0 else start
+                too_far = False
             
-            # Ensure we're not stuck at the same position
-            if start < split_point - self.chunk_size:
-                start = split_point
+            # Ensure we always move forward
+            if next_start <= start or too_far:
+                next_start = split_point
+            start = next_start
         
-        return chunks
+        return chunks, start
+    
+    def _token_starts(self, text: str, offset: int = 0) -> List[int]:
+        """Character offset where each token of ``text`` starts, plus ``offset``."""
+        encoding = self.tokenizer.backend_tokenizer.encode(text, add_special_tokens=False)
+        return [offset + start for start, _ in encoding.offsets]
+    
+    def _extend_token_starts(self, text: str, token_starts: List[int], known: int, final: bool) -> None:
+        """Add the tokens of ``text`` after its first ``known`` characters to ``token_starts``.
+        
+        The model tokenizers split on whitespace first, so only the word
+        ``known`` ends in is tokenized again. Unless ``final``, the tokens of
+        the last word are left out, since it may continue in the next piece.
+        """
+        resume = _word_start(text, known)
+        del token_starts[bisect_left(token_starts, resume):]
+        tail = self._token_starts(text[resume:], resume)
+        if not final:
+            del tail[bisect_left(tail, _word_start(text, len(text))):]
+        token_starts.extend(tail)
     
     def clean_text(self, text: str) -> str:
         """Clean text by removing extra whitespace and normalizing newlines."""
+        return self._normalize_whitespace(text).strip()
+    
+    def _normalize_whitespace(self, text: str) -> str:
         # Replace multiple newlines with double newline
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        # Replace multiple spaces with single space
-        text = re.sub(r' +', ' ', text)
-        # Strip whitespace
-        text = text.strip()
+        text = _PARAGRAPH_BREAK.sub('\n\n', text)
+        # Replace multiple spaces with single space; single spaces are left alone
+        if '  ' in text:
+            text = _SPACE_RUN.sub(' ', text)
         return text
\ No newline at end of file
@@ -0,0 +1,50 @@
+from typing import BinaryIO, Iterator, List
+import codecs
+import chardet
+
+FALLBACK_ENCODINGS: List[str] = ['utf-8', 'latin1', 'cp1252', 'iso-8859-1']
+
+class UndecodableContentError(ValueError):
+    """Raised when uploaded bytes cannot be decoded as text."""
+
+def detect_encoding(sample: bytes) -> str:
+    """Pick an encoding for a byte sample, trying common encodings if detection fails."""
+    result = chardet.detect(sample)
+    candidates = [result['encoding']] if result['encoding'] else []
+    candidates += FALLBACK_ENCODINGS
+
+    for encoding in candidates:
+        try:
+            # The sample may end inside a multi-byte character, so decode it
+            # incrementally without flushing
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+
+    raise UndecodableContentError(
+        "Could not decode file content. Please ensure it's a valid text file."
+    )
+
+def iter_text(
+    file: BinaryIO,
+    read_size: int = 1024 * 1024,
+    sample_size: int = 64 * 1024
+) -> Iterator[str]:
+    """Decode a binary file into text pieces without reading it all into memory.
+
+    The encoding is detected from the first ``sample_size`` bytes only.
+    """
+    sample = file.read(sample_size)
+    decoder = codecs.getincrementaldecoder(detect_encoding(sample))(errors='replace')
+
+    data = sample
+    while data:
+        text = decoder.decode(data)
+        if text:
+            yield text
+        data = file.read(read_size)
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
@@ -0,0 +1,35 @@
+from typing import Optional
+import math
+
+class TokenCounter:
+    """Count prompt tokens with tiktoken, or estimate them when it is unavailable.
+
+    tiktoken's BPE is not the served model's tokenizer, so counts are
+    approximate; callers should keep a margin below hard limits.
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base", chars_per_token: float = 4.0):
+        self.encoding_name = encoding_name
+        self.chars_per_token = chars_per_token
+        self._encoding = self._load_encoding(encoding_name)
+
+    @staticmethod
+    def _load_encoding(encoding_name: str):
+        try:
+            import tiktoken
+            return tiktoken.get_encoding(encoding_name)
+        except Exception:
+            # Not installed, or the BPE file cannot be downloaded
+            return None
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from tiktoken rather than the character estimate."""
+        return self._encoding is not None
+
+    def count(self, text: Optional[str]) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / self.chars_per_token)
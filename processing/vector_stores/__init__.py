@@ -0,0 +1,24 @@
+from typing import Dict, Type
+
+from .base import VectorStore
+from .chroma import ChromaVectorStore
+from .numpy_store import NumpyVectorStore
+
+VECTOR_STORES: Dict[str, Type[VectorStore]] = {
+    "chroma": ChromaVectorStore,
+    "numpy": NumpyVectorStore,
+}
+
+def create_vector_store(name: str, path: str, **options) -> VectorStore:
+    """Instantiate a vector store by its config name."""
+    if name not in VECTOR_STORES:
+        raise ValueError(f"Unknown vector store '{name}'; choose from {sorted(VECTOR_STORES)}")
+    return VECTOR_STORES[name](path, **options)
+
+__all__ = [
+    'VectorStore',
+    'ChromaVectorStore',
+    'NumpyVectorStore',
+    'VECTOR_STORES',
+    'create_vector_store'
+]
@@ -0,0 +1,59 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+class VectorStore:
+    """Stores chunk embeddings with their text and metadata, and finds nearest chunks.
+
+    Records returned by `query` and `get` are dicts with ``id`` and, as
+    requested, ``content``, ``metadata`` and ``embedding``; `query` adds the
+    cosine ``distance``. ``where`` filters use the Chroma operator subset:
+    plain equality, ``$eq``, ``$ne``, ``$gt``, ``$gte``, ``$lt``, ``$lte``,
+    ``$in`` and ``$nin`` on metadata keys, combined with ``$and`` and ``$or``.
+    """
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        """Insert chunks, replacing any stored under the same ids."""
+        raise NotImplementedError
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict]) -> None:
+        """Replace the metadata of stored chunks; unknown ids are ignored."""
+        raise NotImplementedError
+
+    def query(
+        self,
+        embedding: np.ndarray,
+        n_results: int,
+        where: Optional[Dict] = None
+    ) -> List[Dict]:
+        """The ``n_results`` chunks closest to ``embedding``, nearest first."""
+        raise NotImplementedError
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> List[Dict]:
+        """Stored chunks by id and/or filter. ``include`` may name ``documents``,
+        ``metadatas`` and ``embeddings``."""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> None:
+        raise NotImplementedError
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        return {"backend": type(self).__name__, "chunks": self.count()}
+
+    def close(self) -> None:
+        pass
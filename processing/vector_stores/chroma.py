@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional, Sequence
+import os
+import numpy as np
+
+from .base import VectorStore
+
+class ChromaVectorStore(VectorStore):
+    """A persistent ChromaDB collection with cosine distance."""
+
+    def __init__(self, path: str, collection_name: str = "documents"):
+        # Imported here so the built-in store never pays for loading chromadb
+        import chromadb
+
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.client = chromadb.PersistentClient(path=path)
+        try:
+            self.collection = self.client.get_collection(collection_name)
+        except ValueError:
+            self.collection = self.client.create_collection(
+                name=collection_name,
+                metadata={"hnsw:space": "cosine"}
+            )
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        self.collection.upsert(
+            embeddings=np.asarray(embeddings).tolist(),
+            documents=documents,
+            ids=ids,
+            metadatas=metadatas
+        )
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict]) -> None:
+        self.collection.update(ids=ids, metadatas=metadatas)
+
+    def query(
+        self,
+        embedding: np.ndarray,
+        n_results: int,
+        where: Optional[Dict] = None
+    ) -> List[Dict]:
+        results = self.collection.query(
+            query_embeddings=[np.asarray(embedding).tolist()],
+            n_results=n_results,
+            where=where or None
+        )
+        return [
+            {
+                'content': results['documents'][0][i],
+                'metadata': results['metadatas'][0][i],
+                'id': results['ids'][0][i],
+                'distance': results['distances'][0][i]
+            }
+            for i in range(len(results['ids'][0]))
+        ]
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> List[Dict]:
+        stored = self.collection.get(
+            ids=ids,
+            where=where or None,
+            limit=limit,
+            offset=offset or None,
+            include=list(include)
+        )
+        fields = {"documents": "content", "metadatas": "metadata", "embeddings": "embedding"}
+        records = [{"id": chunk_id} for chunk_id in stored['ids']]
+        for name in include:
+            for record, value in zip(records, stored[name]):
+                record[fields[name]] = value
+        return records
+
+    def delete(self, ids: List[str]) -> None:
+        self.collection.delete(ids=ids)
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def stats(self) -> Dict:
+        return {"backend": "chroma", "chunks": self.count()}
+
+    def close(self) -> None:
+        # Chroma caches one system (with its loaded HNSW segments) per path for
+        # the life of the process; stop and drop ours so a closed tenant's
+        # index leaves memory. These are client internals, hence the guard.
+        try:
+            system = self.client._system
+            type(self.client)._identifer_to_system.pop(self.client._identifier, None)
+        except (AttributeError, KeyError):
+            return
+        system.stop()
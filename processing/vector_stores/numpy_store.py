@@ -0,0 +1,561 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import sqlite3
+import threading
+import numpy as np
+
+from .base import VectorStore
+
+INDEX_TYPES = ("flat", "ivf", "ivf-pq")
+
+# Filter comparisons, applied to the JSON metadata column
+_SQL_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+
+def _where_sql(where: Dict) -> Tuple[str, List]:
+    """Translate a Chroma-style metadata filter into an SQL condition and its parameters."""
+    clauses: List[str] = []
+    params: List = []
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            parts = [_where_sql(part) for part in condition]
+            joiner = " AND " if key == "$and" else " OR "
+            clauses.append("(" + joiner.join(sql for sql, _ in parts) + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, value in condition.items():
+            path = f'$."{key}"'
+            if operator in ("$in", "$nin"):
+                negate = "NOT " if operator == "$nin" else ""
+                clauses.append(f"json_extract(metadata, ?) {negate}IN ({', '.join('?' * len(value))})")
+                params.append(path)
+                params.extend(value)
+            elif operator in _SQL_OPERATORS:
+                clauses.append(f"json_extract(metadata, ?) {_SQL_OPERATORS[operator]} ?")
+                params.extend([path, value])
+            else:
+                raise ValueError(f"Unsupported filter operator '{operator}'")
+    return " AND ".join(clauses) or "1", params
+
+def _nearest(
+    data: np.ndarray,
+    centroids: np.ndarray,
+    spherical: bool,
+    block_rows: int = 16384
+) -> np.ndarray:
+    """Index of the closest centroid to each row: by inner product, or by L2 distance."""
+    assignment = np.empty(len(data), dtype=np.int32)
+    squared_norms = None if spherical else (centroids ** 2).sum(axis=1)
+    for start in range(0, len(data), block_rows):
+        block = np.asarray(data[start:start + block_rows], dtype=np.float32)
+        products = block @ centroids.T
+        if spherical:
+            assignment[start:start + len(block)] = products.argmax(axis=1)
+        else:
+            assignment[start:start + len(block)] = (squared_norms - 2 * products).argmin(axis=1)
+    return assignment
+
+def _kmeans(
+    data: np.ndarray,
+    k: int,
+    iterations: int,
+    rng: np.random.Generator,
+    spherical: bool
+) -> np.ndarray:
+    """Lloyd's k-means; spherical k-means keeps centroids on the unit sphere."""
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _nearest(data, centroids, spherical)
+        order = np.argsort(assignment, kind="stable")
+        ordered = assignment[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        clusters = ordered[starts]
+        counts = np.diff(np.r_[starts, len(data)])
+        centroids[clusters] = np.add.reduceat(data[order], starts, axis=0) / counts[:, None]
+        # Reseed clusters that lost every point
+        empty = np.setdiff1d(np.arange(k), clusters)
+        if len(empty):
+            centroids[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        if spherical:
+            centroids /= np.clip(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12, None)
+    return centroids
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    if len(scores) > k:
+        best = np.argpartition(-scores, k - 1)[:k]
+        scores, rows = scores[best], rows[best]
+    return scores, rows
+
+class NumpyVectorStore(VectorStore):
+    """In-process vector store: a memory-mapped embedding matrix with a SQLite sidecar.
+
+    Embeddings are L2-normalized and written to row slots of a float32 or
+    float16 matrix in ``vectors.bin``, so the OS page cache, not the Python
+    heap, holds them. Chunk ids, text and metadata live in ``meta.sqlite``,
+    which also resolves ``where`` filters. Deleted rows are reused.
+
+    With ``index="flat"`` every query is an exact, blocked matrix-vector
+    scan. ``"ivf"`` clusters the vectors into ``ivf_lists`` lists once the
+    store holds ``ivf_min_rows`` chunks and scores only the ``ivf_probes``
+    lists closest to the query. ``"ivf-pq"`` also scores those candidates
+    from ``pq_subquantizers`` byte codes per vector and re-ranks the best
+    ``rerank_factor * n_results`` exactly. The clustering is retrained
+    whenever the store has doubled since it was trained. Filtered queries
+    always scan the matching rows exactly.
+
+    float16 halves memory and disk use, but numpy converts it back to
+    float32 for scoring, so exact scans over float16 are several times
+    slower than over float32. IVF scores few enough rows that it barely
+    matters there.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        dtype: str = "float32",
+        index: str = "flat",
+        ivf_lists: int = 1024,
+        ivf_probes: int = 16,
+        ivf_min_rows: int = 50000,
+        pq_subquantizers: int = 48,
+        rerank_factor: int = 50,
+        block_rows: int = 32768,
+        seed: int = 0
+    ):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unknown vector dtype '{dtype}'; choose from ['float32', 'float16']")
+        if index not in INDEX_TYPES:
+            raise ValueError(f"Unknown vector index '{index}'; choose from {list(INDEX_TYPES)}")
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.index = index
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self.ivf_min_rows = ivf_min_rows
+        self.pq_subquantizers = pq_subquantizers
+        self.rerank_factor = rerank_factor
+        self.block_rows = block_rows
+        self.seed = seed
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            os.path.join(path, "meta.sqlite"), check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE,
+                document TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        settings = dict(self._conn.execute("SELECT key, value FROM settings").fetchall())
+        # The matrix keeps the precision it was created with
+        if settings.get("dtype", dtype) != dtype:
+            raise ValueError(
+                f"Vector store at {path} holds {settings['dtype']} vectors; "
+                f"set its dtype to {settings['dtype']} or use a new path"
+            )
+        self.dtype = np.dtype(dtype)
+        self.dimension: Optional[int] = int(settings["dimension"]) if "dimension" in settings else None
+
+        self._capacity = 0
+        self._vectors: Optional[np.memmap] = None
+        self._lists: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._codebooks: Optional[np.ndarray] = None
+        self._trained_rows = 0
+
+        rows = np.array([row for row, in self._conn.execute("SELECT row FROM chunks")], dtype=np.int64)
+        self._size = int(rows.max()) + 1 if len(rows) else 0
+        self._alive = np.zeros(max(self._size, 1024), dtype=bool)
+        self._alive[rows] = True
+        if self.dimension is not None:
+            self._capacity = os.path.getsize(self._file("vectors.bin")) // (self.dimension * self.dtype.itemsize)
+            self._reserve(self._size)
+            self._load_index()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _map(self, name: str, dtype, columns: Optional[int]) -> np.memmap:
+        """Map a row-aligned file, growing it to the current capacity."""
+        path = self._file(name)
+        shape = (self._capacity, columns) if columns else (self._capacity,)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab"):
+            pass
+        if os.path.getsize(path) < size:
+            os.truncate(path, size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _reserve(self, rows: int) -> None:
+        """Make room for ``rows`` rows, doubling the files when they are full."""
+        if rows > len(self._alive):
+            alive = np.zeros(max(rows, 2 * len(self._alive)), dtype=bool)
+            alive[:len(self._alive)] = self._alive
+            self._alive = alive
+        if rows > self._capacity or not self._capacity:
+            self._capacity = max(rows, 2 * self._capacity, 1024)
+        elif self._vectors is not None:
+            return
+        self._vectors = self._map("vectors.bin", self.dtype, self.dimension)
+        if self._lists is not None:
+            self._lists = self._map("lists.bin", np.int32, None)
+        if self._codes is not None:
+            self._codes = self._map("codes.bin", np.uint8, self.pq_subquantizers)
+
+    def _load_index(self) -> None:
+        if self.index == "flat" or not os.path.exists(self._file("ivf.npz")):
+            return
+        with np.load(self._file("ivf.npz")) as saved:
+            self._centroids = saved["centroids"]
+            self._codebooks = saved["codebooks"] if "codebooks" in saved else None
+            self._trained_rows = int(saved["trained_rows"])
+        if self.index == "ivf-pq" and self._codebooks is None:
+            # Trained as plain IVF; train again to get the codes
+            self._centroids = None
+            return
+        self._lists = self._map("lists.bin", np.int32, None)
+        if self._codebooks is not None:
+            self._codes = self._map("codes.bin", np.uint8, self.pq_subquantizers)
+
+    def upsert(
+        self,
+        ids: List[str],
+        embeddings: np.ndarray,
+        documents: List[str],
+        metadatas: List[Dict]
+    ) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    [("dimension", str(self.dimension)), ("dtype", self.dtype.name)]
+                )
+            elif vectors.shape[1] != self.dimension:
+                raise ValueError(f"Expected {self.dimension}-dimensional embeddings, got {vectors.shape[1]}")
+
+            # Stored ids keep their row; new ids fill freed rows, then new ones
+            rows_by_id = self._rows_by_id(ids)
+            free = iter(np.flatnonzero(~self._alive[:self._size]).tolist())
+            rows = []
+            for chunk_id in ids:
+                row = rows_by_id.get(chunk_id)
+                if row is None:
+                    row = next(free, None)
+                    if row is None:
+                        row = self._size
+                        self._size += 1
+                    rows_by_id[chunk_id] = row
+                rows.append(row)
+            self._reserve(self._size)
+
+            rows_array = np.array(rows, dtype=np.int64)
+            self._vectors[rows_array] = vectors.astype(self.dtype)
+            if self._centroids is not None:
+                lists = _nearest(vectors, self._centroids, spherical=True)
+                self._lists[rows_array] = lists
+                if self._codes is not None:
+                    self._codes[rows_array] = self._encode(vectors - self._centroids[lists])
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO chunks (row, chunk_id, document, metadata) VALUES (?, ?, ?, ?)",
+                    [
+                        (row, chunk_id, document, json.dumps(metadata))
+                        for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)
+                    ]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._alive[rows_array] = True
+
+            count = int(self._alive.sum())
+            if self.index != "flat" and count >= max(self.ivf_min_rows, 2 * self._trained_rows):
+                self._train()
+
+    def _rows_by_id(self, ids: List[str]) -> Dict[str, int]:
+        rows: Dict[str, int] = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows.update(self._conn.execute(
+                f"SELECT chunk_id, row FROM chunks WHERE chunk_id IN ({', '.join('?' * len(batch))})",
+                batch
+            ).fetchall())
+        return rows
+
+    def update_metadata(self, ids: List[str], metadatas: List[Dict]) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "UPDATE chunks SET metadata = ? WHERE chunk_id = ?",
+                    [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas)]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def build_index(self) -> None:
+        """Train the IVF (and PQ) index now instead of waiting for ``ivf_min_rows``."""
+        if self.index == "flat":
+            raise ValueError("A flat vector store has no index to build")
+        with self._lock:
+            self._train()
+
+    def _train(self) -> None:
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        codebook_size = 256 if self.index == "ivf-pq" else 0
+        if len(alive_rows) < max(self.ivf_lists, codebook_size):
+            return
+        if codebook_size and self.dimension % self.pq_subquantizers:
+            raise ValueError(
+                f"pq_subquantizers ({self.pq_subquantizers}) must divide the dimension ({self.dimension})"
+            )
+        rng = np.random.default_rng(self.seed)
+        sample_rows = np.sort(rng.choice(alive_rows, min(len(alive_rows), self.ivf_lists * 64), replace=False))
+        sample = np.asarray(self._vectors[sample_rows], dtype=np.float32)
+
+        centroids = _kmeans(sample, self.ivf_lists, 10, rng, spherical=True).astype(np.float32)
+        codebooks = None
+        if codebook_size:
+            # Codes quantize each vector's offset from its list centroid
+            residuals = sample - centroids[_nearest(sample, centroids, spherical=True)]
+            width = self.dimension // self.pq_subquantizers
+            codebooks = np.stack([
+                _kmeans(residuals[:, j * width:(j + 1) * width], codebook_size, 10, rng, spherical=False)
+                for j in range(self.pq_subquantizers)
+            ]).astype(np.float32)
+
+        self._centroids, self._codebooks = centroids, codebooks
+        self._lists = self._map("lists.bin", np.int32, None)
+        self._codes = self._map("codes.bin", np.uint8, self.pq_subquantizers) if codebooks is not None else None
+        for start in range(0, self._size, self.block_rows):
+            block = np.asarray(self._vectors[start:start + self.block_rows], dtype=np.float32)
+            lists = _nearest(block, centroids, spherical=True)
+            self._lists[start:start + len(block)] = lists
+            if self._codes is not None:
+                self._codes[start:start + len(block)] = self._encode(block - centroids[lists])
+        self._trained_rows = len(alive_rows)
+
+        saved = {"centroids": centroids, "trained_rows": np.array(self._trained_rows)}
+        if codebooks is not None:
+            saved["codebooks"] = codebooks
+        with open(self._file("ivf.tmp.npz"), "wb") as f:
+            np.savez(f, **saved)
+        os.replace(self._file("ivf.tmp.npz"), self._file("ivf.npz"))
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        width = self.dimension // self.pq_subquantizers
+        return np.stack([
+            _nearest(vectors[:, j * width:(j + 1) * width], self._codebooks[j], spherical=False)
+            for j in range(self.pq_subquantizers)
+        ], axis=1).astype(np.uint8)
+
+    def query(
+        self,
+        embedding: np.ndarray,
+        n_results: int,
+        where: Optional[Dict] = None
+    ) -> List[Dict]:
+        query = np.asarray(embedding, dtype=np.float32).ravel()
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        with self._lock:
+            if self.dimension is None or n_results <= 0:
+                return []
+            # Scoring runs outside the lock on a snapshot of the live rows
+            size = self._size
+            vectors, lists, codes = self._vectors, self._lists, self._codes
+            centroids, codebooks = self._centroids, self._codebooks
+            alive = self._alive[:size].copy()
+            filtered = self._filter_rows(where) if where else None
+
+        if filtered is not None:
+            scores, rows = self._score_rows(vectors, filtered, query, n_results)
+        elif centroids is None:
+            scores, rows = self._scan(vectors, alive, query, n_results)
+        else:
+            centroid_scores = centroids @ query
+            probes = np.argsort(-centroid_scores)[:self.ivf_probes]
+            probed = np.zeros(len(centroids), dtype=bool)
+            probed[probes] = True
+            candidates = np.flatnonzero(probed[lists[:size]] & alive)
+            if codes is not None and len(candidates) > n_results * self.rerank_factor:
+                # Approximate scores from the PQ codes pick what gets scored exactly:
+                # the centroid's score plus the looked-up scores of the residual codes
+                width = self.dimension // self.pq_subquantizers
+                tables = np.einsum("jcw,jw->jc", codebooks, query.reshape(self.pq_subquantizers, width))
+                approximate = centroid_scores[lists[candidates]] + tables[
+                    np.arange(self.pq_subquantizers), codes[candidates]
+                ].sum(axis=1)
+                _, candidates = _top_k(approximate, candidates, n_results * self.rerank_factor)
+            scores, rows = self._score_rows(vectors, np.sort(candidates), query, n_results)
+
+        order = np.argsort(-scores)
+        with self._lock:
+            return self._records(rows[order].tolist(), ("documents", "metadatas"), (1 - scores[order]).tolist())
+
+    def _scan(
+        self,
+        vectors: np.ndarray,
+        alive: np.ndarray,
+        query: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top ``k`` over every live row, one block at a time."""
+        best_scores, best_rows = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        # float16 blocks are converted into one reused buffer before scoring
+        buffer = np.empty((self.block_rows, self.dimension), dtype=np.float32) if self.dtype != np.float32 else None
+        for start in range(0, len(alive), self.block_rows):
+            block_alive = alive[start:start + self.block_rows]
+            block = vectors[start:start + len(block_alive)]
+            if buffer is not None:
+                block = buffer[:len(block_alive)]
+                block[...] = vectors[start:start + len(block_alive)]
+            scores = block @ query
+            rows = np.flatnonzero(block_alive)
+            best_scores, best_rows = _top_k(
+                np.concatenate([best_scores, scores[rows]]),
+                np.concatenate([best_rows, rows + start]),
+                k
+            )
+        return best_scores, best_rows
+
+    def _score_rows(
+        self,
+        vectors: np.ndarray,
+        rows: np.ndarray,
+        query: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top ``k`` among the given rows."""
+        best_scores, best_rows = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for start in range(0, len(rows), self.block_rows):
+            block = rows[start:start + self.block_rows]
+            scores = np.asarray(vectors[block], dtype=np.float32) @ query
+            best_scores, best_rows = _top_k(
+                np.concatenate([best_scores, scores]),
+                np.concatenate([best_rows, block]),
+                k
+            )
+        return best_scores, best_rows
+
+    def _filter_rows(self, where: Dict) -> np.ndarray:
+        sql, params = _where_sql(where)
+        rows = [row for row, in self._conn.execute(f"SELECT row FROM chunks WHERE {sql}", params)]
+        return np.array(sorted(rows), dtype=np.int64)
+
+    def _records(
+        self,
+        rows: List[int],
+        include: Sequence[str],
+        distances: Optional[List[float]] = None
+    ) -> List[Dict]:
+        """Records for ``rows`` in the given order; rows deleted meanwhile are skipped."""
+        stored: Dict[int, Tuple] = {}
+        for start in range(0, len(rows), 500):
+            batch = rows[start:start + 500]
+            for row, chunk_id, document, metadata in self._conn.execute(
+                f"SELECT row, chunk_id, document, metadata FROM chunks WHERE row IN ({', '.join('?' * len(batch))})",
+                batch
+            ):
+                stored[row] = (chunk_id, document, metadata)
+
+        records = []
+        for i, row in enumerate(rows):
+            if row not in stored:
+                continue
+            chunk_id, document, metadata = stored[row]
+            record: Dict = {"id": chunk_id}
+            if "documents" in include:
+                record["content"] = document
+            if "metadatas" in include:
+                record["metadata"] = json.loads(metadata)
+            if "embeddings" in include:
+                record["embedding"] = np.asarray(self._vectors[row], dtype=np.float32)
+            if distances is not None:
+                record["distance"] = distances[i]
+            records.append(record)
+        return records
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Sequence[str] = ("documents", "metadatas")
+    ) -> List[Dict]:
+        sql, params = _where_sql(where) if where else ("1", [])
+        with self._lock:
+            if ids is None:
+                rows = [row for row, in self._conn.execute(
+                    f"SELECT row FROM chunks WHERE {sql} ORDER BY row LIMIT ? OFFSET ?",
+                    params + [-1 if limit is None else limit, offset]
+                )]
+            else:
+                rows = []
+                for start in range(0, len(ids), 500):
+                    batch = ids[start:start + 500]
+                    rows.extend(row for row, in self._conn.execute(
+                        f"SELECT row FROM chunks WHERE chunk_id IN ({', '.join('?' * len(batch))}) AND {sql}",
+                        batch + params
+                    ))
+                rows = rows[offset:None if limit is None else offset + limit]
+            return self._records(rows, include)
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            rows = list(self._rows_by_id(ids).values())
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for start in range(0, len(rows), 500):
+                    batch = rows[start:start + 500]
+                    self._conn.execute(
+                        f"DELETE FROM chunks WHERE row IN ({', '.join('?' * len(batch))})", batch
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._alive[rows] = False
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._alive.sum())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": "numpy",
+                "chunks": int(self._alive.sum()),
+                "dimension": self.dimension,
+                "dtype": self.dtype.name,
+                "index": self.index,
+                "index_trained": self._centroids is not None,
+                "capacity": self._capacity
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            for mapped in (self._vectors, self._lists, self._codes):
+                if mapped is not None:
+                    mapped.flush()
+            self._conn.close()
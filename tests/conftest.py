@@ -0,0 +1,45 @@
+import socket
+import time
+from typing import Dict
+
+import pytest
+
+from benchmarks.stub_ollama import free_port, start_stub
+
+class Stubs:
+    """Stub Ollama servers started for one test, each on its own thread."""
+
+    def __init__(self):
+        self.servers: Dict = {}
+
+    def start(self, name: str, tokens: int = 5, delay_ms: float = 1.0) -> str:
+        """Start a stub whose answers are prefixed with ``name``; returns its URL."""
+        server, url = start_stub(name, tokens, delay_ms)
+        self.servers[url] = server
+        return url
+
+    def stop(self, url: str) -> None:
+        """Stop a stub and wait until its port refuses connections."""
+        self.servers.pop(url).should_exit = True
+        port = int(url.rsplit(":", 1)[1])
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            except OSError:
+                return
+            time.sleep(0.01)
+
+    def close(self) -> None:
+        for server in self.servers.values():
+            server.should_exit = True
+
+@pytest.fixture
+def stubs():
+    stubs = Stubs()
+    yield stubs
+    stubs.close()
+
+@pytest.fixture
+def dead_url():
+    """Make URLs nothing listens on, so connecting fails at once."""
+    return lambda: f"http://127.0.0.1:{free_port()}"
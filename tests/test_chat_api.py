@@ -0,0 +1,44 @@
+"""The chat routes' answers to bad requests and to unreachable LLM backends."""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.dependencies import get_chat_engine, get_request_processor
+from api.routes import chat
+from processing import ChatEngine
+
+class NoDocuments:
+    """Stands in for a DocumentProcessor with an empty collection."""
+
+    async def aembed_query(self, query):
+        return None
+
+    async def asearch_similar(self, query, n_results=3, metadata_filter=None, query_embedding=None):
+        return []
+
+@pytest.mark.asyncio
+async def test_chat_answers_503_when_every_backend_is_down(dead_url):
+    engine = ChatEngine(ollama_urls=[dead_url(), dead_url()], health_interval=0)
+    await engine.start()
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_chat_engine] = lambda: engine
+    app.dependency_overrides[get_request_processor] = NoDocuments
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/chat/", json={"messages": [{"role": "user", "content": "hi"}]})
+        assert response.status_code == 503
+        assert "No Ollama backend reachable" in response.json()["detail"]
+    finally:
+        await engine.close()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("messages", [[], [{"role": "assistant", "content": "hello"}]])
+async def test_stream_rejects_a_request_not_ending_with_a_user_message(messages):
+    app = FastAPI()
+    app.include_router(chat.router)
+    app.dependency_overrides[get_chat_engine] = lambda: None
+    app.dependency_overrides[get_request_processor] = NoDocuments
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/chat/stream", json={"messages": messages})
+    assert response.status_code == 400
@@ -0,0 +1,39 @@
+"""Parity of the quantized and ONNX embedding backends with the PyTorch fp32 reference.
+
+Loads the real model, so it is skipped unless sentence-transformers and
+onnxruntime are installed. `benchmarks.bench_embedding_backends` reports
+the same agreement alongside latency and throughput.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+
+from benchmarks.bench_embedding_backends import MODEL_NAME, cosine_rows, make_texts
+from processing.utils import create_backend
+
+# Lowest cosine similarity to the fp32 vector accepted for any text
+THRESHOLD = 0.98
+
+@pytest.fixture(scope="module")
+def texts():
+    return make_texts(64)
+
+@pytest.fixture(scope="module")
+def reference(texts):
+    return create_backend("torch", MODEL_NAME).encode(texts)
+
+@pytest.fixture(scope="module")
+def onnx_dir(tmp_path_factory):
+    return str(tmp_path_factory.mktemp("onnx"))
+
+@pytest.mark.parametrize("backend", ["onnx", "onnx-int8", "torch-int8"])
+def test_backend_agrees_with_fp32_reference(backend, texts, reference, onnx_dir):
+    vectors = create_backend(backend, MODEL_NAME, onnx_dir=onnx_dir).encode(texts)
+    assert vectors.shape == reference.shape
+    assert vectors.dtype == np.float32
+    assert cosine_rows(reference, vectors).min() >= THRESHOLD
+
+def test_float16_storage_keeps_vectors(reference):
+    assert cosine_rows(reference, reference.astype(np.float16)).min() >= 0.999
@@ -0,0 +1,24 @@
+"""Uploads are parsed from their own bytes, never from a local file they name."""
+import io
+import zipfile
+
+from processing.utils import DocumentExtractor, iter_files
+
+def test_archive_member_named_after_local_file_is_spooled(tmp_path):
+    local = tmp_path / "secret.pdf"
+    local.write_bytes(b"server-side file")
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr(str(local), b"member bytes")
+    archive.seek(0)
+
+    extractor = DocumentExtractor(max_workers=0)
+    spooled = []
+    for name, member in iter_files(archive, "upload.zip"):
+        assert name == str(local)
+        with extractor._spooled(member, None) as path:
+            with open(path, "rb") as f:
+                spooled.append((path, f.read()))
+    assert len(spooled) == 1
+    assert spooled[0][0] != str(local)
+    assert spooled[0][1] == b"member bytes"
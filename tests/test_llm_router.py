@@ -0,0 +1,107 @@
+"""LLMRouter routing and failover against in-process stub Ollama servers."""
+import json
+
+import pytest
+
+from processing.llm_router import AllBackendsFailedError, LLMRouter
+
+CHAT = {"model": "stub", "messages": [{"role": "user", "content": "hi"}]}
+
+def answered_by(text: str) -> str:
+    """Name of the stub that wrote an answer; stub answers are "<name>-<i> ..." words."""
+    return text.split("-", 1)[0]
+
+async def started_router(urls):
+    # No background probes, so health only changes through requests
+    router = LLMRouter(urls, health_interval=0)
+    await router.start()
+    return router
+
+@pytest.mark.asyncio
+async def test_routes_to_backend_with_fewest_outstanding_requests(stubs):
+    urls = [stubs.start("a"), stubs.start("b")]
+    router = await started_router(urls)
+    try:
+        async with router.stream("POST", "/api/chat", json={**CHAT, "stream": True}):
+            busy = next(backend for backend in router.backends if backend.outstanding == 1)
+            busy_name = "ab"[urls.index(busy.url)]
+            for _ in range(3):
+                response = await router.post("/api/chat", json={**CHAT, "stream": False})
+                assert answered_by(response.json()["message"]["content"]) != busy_name
+        assert busy.outstanding == 0
+    finally:
+        await router.close()
+
+@pytest.mark.asyncio
+async def test_spreads_sequential_requests_across_idle_backends(stubs):
+    router = await started_router([stubs.start("a"), stubs.start("b")])
+    try:
+        names = []
+        for _ in range(4):
+            response = await router.post("/api/chat", json={**CHAT, "stream": False})
+            names.append(answered_by(response.json()["message"]["content"]))
+        assert sorted(names) == ["a", "a", "b", "b"]
+    finally:
+        await router.close()
+
+@pytest.mark.asyncio
+async def test_fails_over_when_a_backend_refuses_connections(stubs):
+    first, second = stubs.start("a"), stubs.start("b")
+    router = await started_router([first, second])
+    try:
+        # Healthy at startup, gone by the time requests arrive
+        stubs.stop(first)
+        for _ in range(4):
+            response = await router.post("/api/chat", json={**CHAT, "stream": False})
+            assert answered_by(response.json()["message"]["content"]) == "b"
+        down = router.backends[0]
+        assert not down.healthy
+        assert down.failures == 1
+        assert "ConnectError" in down.last_error
+    finally:
+        await router.close()
+
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_it_connects(stubs, dead_url):
+    router = await started_router([dead_url(), stubs.start("b")])
+    # Pretend the dead backend passed its last probe, and make it win the
+    # tie on outstanding requests so it is tried first
+    router.backends[0].healthy = True
+    router._turn = -1
+    try:
+        async with router.stream("POST", "/api/chat", json={**CHAT, "stream": True}) as stream:
+            lines = [json.loads(line) async for line in stream.aiter_lines() if line]
+        pieces = [line["message"]["content"] for line in lines if not line["done"]]
+        assert {answered_by(piece) for piece in pieces} == {"b"}
+        assert router.backends[0].failures == 1
+    finally:
+        await router.close()
+
+@pytest.mark.asyncio
+async def test_stream_stays_on_one_backend(stubs):
+    router = await started_router([stubs.start("a", tokens=20), stubs.start("b", tokens=20)])
+    try:
+        names = set()
+        async with router.stream("POST", "/api/chat", json={**CHAT, "stream": True}) as stream:
+            async for line in stream.aiter_lines():
+                data = json.loads(line)
+                if not data["done"]:
+                    names.add(answered_by(data["message"]["content"]))
+                # Other traffic while the stream is open must not move it
+                await router.post("/api/chat", json={**CHAT, "stream": False})
+        assert len(names) == 1
+    finally:
+        await router.close()
+
+@pytest.mark.asyncio
+async def test_raises_when_every_backend_is_down(dead_url):
+    router = await started_router([dead_url(), dead_url()])
+    try:
+        assert not any(backend.healthy for backend in router.backends)
+        with pytest.raises(AllBackendsFailedError):
+            await router.post("/api/chat", json={**CHAT, "stream": False})
+        with pytest.raises(AllBackendsFailedError):
+            async with router.stream("POST", "/api/chat", json={**CHAT, "stream": True}):
+                pass
+    finally:
+        await router.close()
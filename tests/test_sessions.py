@@ -0,0 +1,17 @@
+"""SessionStore keeps tenants' sessions apart."""
+from processing.sessions import SessionStore
+
+def test_tenants_never_share_a_session():
+    store = SessionStore()
+    acme = store.get_or_create("s9", "acme")
+    acme.append_turn("question", "answer", 1, 1)
+
+    assert store.get_or_create("s9", "acme") is acme
+    # Neither the same id under another tenant nor a look-alike id without one
+    assert store.get_or_create("s9", "globex") is not acme
+    assert store.get_or_create("s9") is not acme
+    assert store.get_or_create("acme/s9").turns == 0
+
+    assert not store.delete("s9", "other")
+    assert store.delete("s9", "acme")
+    assert store.get("s9", "acme") is None
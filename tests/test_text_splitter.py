@@ -0,0 +1,48 @@
+"""Streaming splits match splitting the whole cleaned text, in characters and tokens."""
+import random
+
+import pytest
+
+from processing.utils.text_splitter import TextSplitter
+
+WORDS = ["otters", "herons", "tokenization", "unbelievable", "naïve", "re-entrant", "3.14", "e.g.", "(aside)"]
+
+def make_text(paragraphs: int = 200) -> str:
+    rng = random.Random(0)
+    return "".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 80))) + ".\n\n  "
+        for _ in range(paragraphs)
+    )
+
+def pieces(text: str, max_size: int):
+    rng = random.Random(max_size)
+    start = 0
+    while start < len(text):
+        size = rng.randint(1, max_size)
+        yield text[start:start + size]
+        start += size
+
+class FastTokenizer:
+    """A small WordPiece tokenizer shaped like a Hugging Face fast tokenizer."""
+
+    def __init__(self, text: str):
+        tokenizers = pytest.importorskip("tokenizers")
+        backend = tokenizers.Tokenizer(tokenizers.models.WordPiece(unk_token="[UNK]"))
+        backend.normalizer = tokenizers.normalizers.BertNormalizer(lowercase=True)
+        backend.pre_tokenizer = tokenizers.pre_tokenizers.BertPreTokenizer()
+        backend.train_from_iterator([text], tokenizers.trainers.WordPieceTrainer(vocab_size=60, special_tokens=["[UNK]"]))
+        self.backend_tokenizer = backend
+
+@pytest.mark.parametrize("max_piece", [3, 50, 5000])
+def test_stream_matches_whole_text_in_characters(max_piece):
+    text = make_text()
+    splitter = TextSplitter(chunk_size=300, chunk_overlap=30)
+    expected = splitter.split_text(splitter.clean_text(text))
+    assert list(splitter.split_text_stream(pieces(text, max_piece))) == expected
+
+@pytest.mark.parametrize("max_piece", [3, 50, 5000])
+def test_stream_matches_whole_text_in_tokens(max_piece):
+    text = make_text()
+    splitter = TextSplitter(chunk_size=128, chunk_overlap=16, tokenizer=FastTokenizer(text))
+    expected = splitter.split_text(splitter.clean_text(text))
+    assert list(splitter.split_text_stream(pieces(text, max_piece))) == expected